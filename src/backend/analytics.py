@@ -0,0 +1,217 @@
+"""
+Vectorized transaction analytics shared by app.py and api/run_full_server.py.
+
+Transactions are converted once into TransactionColumns: dates as int64
+day numbers, amounts as int64 cents, and categories / merchants
+dictionary-encoded as int32 codes (in first-seen order, so ties break the
+same way the old dict/Counter based code did). Every metric is then a few
+NumPy reductions over those arrays.
+
+  • analyze_transactions – totals, category %, top merchants, monthly trend (/api/chat)
+  • compute_metrics      – categories, topMerchants, spendingBreakdown, weekdaySpending (/memories)
+  • detect_peaks         – the two highest-spend months (/memories)
+"""
+from typing import Dict, Iterable, List, Sequence
+
+import numpy as np
+
+# Categories counted as "experiences" in spendingBreakdown; everything else is essential
+EXPERIENCE_CATEGORIES = frozenset({
+    'food', 'entertainment', 'travel', 'personal', 'shopping', 'gifts', 'subscriptions', 'pets'
+})
+
+WEEKDAY_NAMES = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')
+
+
+def _encode(values: Iterable[str]):
+    """Dictionary-encode values in first-seen order -> (codes, dictionary)."""
+    index: Dict[str, int] = {}
+    codes = np.fromiter((index.setdefault(v, len(index)) for v in values), dtype=np.int32)
+    return codes, list(index)
+
+
+class TransactionColumns:
+    """
+    Columnar view of a transaction list.
+
+    Attributes:
+        days: int64 days since 1970-01-01.
+        amounts: int64 signed amounts in cents.
+        category_codes / categories: int32 codes into the category dictionary.
+        merchant_codes / merchants: int32 codes into the merchant dictionary.
+    """
+
+    def __init__(self, days: np.ndarray, amounts: np.ndarray,
+                 category_codes: np.ndarray, categories: Sequence[str],
+                 merchant_codes: np.ndarray, merchants: Sequence[str]):
+        self.days = days
+        self.amounts = amounts
+        self.category_codes = category_codes
+        self.categories = list(categories)
+        self.merchant_codes = merchant_codes
+        self.merchants = list(merchants)
+
+    def __len__(self) -> int:
+        return len(self.amounts)
+
+    @classmethod
+    def from_records(cls, txns: Sequence[Dict], date_key: str = 'date', amount_key: str = 'amount',
+                     category_key: str = 'category', merchant_key: str = 'merchant') -> 'TransactionColumns':
+        """
+        Build columns from transaction dicts. `date_key` may hold a date or a
+        full timestamp; only the YYYY-MM-DD prefix is used.
+        """
+        n = len(txns)
+        days = np.array([t[date_key][:10] for t in txns], dtype='datetime64[D]').astype(np.int64)
+        amounts = np.rint(np.fromiter((t[amount_key] for t in txns), dtype=np.float64, count=n) * 100).astype(np.int64)
+        category_codes, categories = _encode(t[category_key] for t in txns)
+        merchant_codes, merchants = _encode(t[merchant_key] for t in txns)
+        return cls(days, amounts, category_codes, categories, merchant_codes, merchants)
+
+
+def as_columns(txns, **keys) -> TransactionColumns:
+    """Pass TransactionColumns through; convert anything else with from_records."""
+    if isinstance(txns, TransactionColumns):
+        return txns
+    return TransactionColumns.from_records(txns if isinstance(txns, (list, tuple)) else list(txns), **keys)
+
+
+def _month_offsets(days: np.ndarray):
+    """
+    Month of each day as an offset from the earliest month -> (offsets, first_month).
+    Months are looked up in a per-day table spanning min..max day, which is
+    much cheaper than a datetime64 conversion of every row.
+    """
+    first_day = int(days.min())
+    span = np.arange(first_day, int(days.max()) + 1).astype('datetime64[D]')
+    table = span.astype('datetime64[M]').astype(np.int64)
+    first_month = int(table[0])
+    return (table - first_month)[days - first_day], first_month
+
+
+def _month_label(month: int) -> str:
+    return str(np.datetime64(int(month), 'M'))
+
+
+def _cents_to_float(cents) -> float:
+    return float(cents) / 100
+
+
+def analyze_transactions(cols: TransactionColumns) -> Dict:
+    """
+    Spending insights for the chat assistant: totals, category share of
+    spend, top 5 merchants by spend and month-by-month spend.
+    """
+    if not len(cols):
+        return {}
+
+    spending = cols.amounts < 0
+    spent = -cols.amounts[spending]
+    total_spent = int(spent.sum())
+    total_income = int(cols.amounts[cols.amounts > 0].sum())
+
+    # Category breakdown (keys sorted by name, like a pandas groupby)
+    spent_cats = cols.category_codes[spending]
+    cat_spend = np.bincount(spent_cats, weights=spent, minlength=len(cols.categories))
+    cat_present = np.flatnonzero(np.bincount(spent_cats, minlength=len(cols.categories)))
+    category_percentage = {}
+    for code in sorted(cat_present, key=lambda c: cols.categories[c]):
+        category_percentage[cols.categories[code]] = round(float(cat_spend[code]) / total_spent * 100, 2) if total_spent else 0.0
+
+    # Top merchants by spend
+    spent_merchants = cols.merchant_codes[spending]
+    merch_spend = np.bincount(spent_merchants, weights=spent, minlength=len(cols.merchants))
+    merch_present = np.flatnonzero(np.bincount(spent_merchants, minlength=len(cols.merchants)))
+    by_name = sorted(merch_present, key=lambda c: cols.merchants[c])
+    top = sorted(by_name, key=lambda c: -merch_spend[c])[:5]
+    top_merchants = {cols.merchants[c]: round(float(merch_spend[c]) / 100, 2) for c in top}
+
+    # Monthly spending trend
+    monthly_trend = {}
+    if spending.any():
+        months, first_month = _month_offsets(cols.days[spending])
+        month_spend = np.bincount(months, weights=spent)
+        for offset in np.flatnonzero(np.bincount(months)):
+            monthly_trend[_month_label(first_month + offset)] = round(float(month_spend[offset]) / 100, 2)
+
+    return {
+        'total_spent': round(_cents_to_float(total_spent), 2),
+        'total_income': round(_cents_to_float(total_income), 2),
+        'category_percentage': category_percentage,
+        'top_merchants': top_merchants,
+        'monthly_trend': monthly_trend
+    }
+
+
+def compute_metrics(cols: TransactionColumns) -> Dict:
+    """
+    Summary metrics for the memories dashboard: categories, topMerchants,
+    spendingBreakdown and weekdaySpending.
+    """
+    total_count = len(cols)
+    spend = np.abs(cols.amounts)
+    total_spend = int(spend.sum())
+
+    # 1) categories: count, % of txns, average amount
+    cat_counts = np.bincount(cols.category_codes, minlength=len(cols.categories))
+    cat_sums = np.bincount(cols.category_codes, weights=spend, minlength=len(cols.categories))
+    categories = {}
+    for code, cat in enumerate(cols.categories):
+        count = int(cat_counts[code])
+        categories[cat] = {
+            'percentage':    round(count / total_count * 100),
+            'count':         count,
+            'averageInArea': round(float(cat_sums[code]) / 100 / count)
+        }
+
+    # 2) topMerchants: top 3 by visit count (ties keep first-seen order), with
+    # the category of each merchant's most recent row
+    visits = np.bincount(cols.merchant_codes, minlength=len(cols.merchants))
+    last_row = np.full(len(cols.merchants), -1, dtype=np.int64)
+    np.maximum.at(last_row, cols.merchant_codes, np.arange(total_count))
+    topMerchants = [
+        {
+            'name':     cols.merchants[code],
+            'category': cols.categories[cols.category_codes[last_row[code]]],
+            'visits':   int(visits[code])
+        }
+        for code in np.argsort(-visits, kind='stable')[:3]
+    ]
+
+    # 3) spendingBreakdown: % split between "experiences" vs "essentials"
+    exp_codes = [code for code, cat in enumerate(cols.categories) if cat in EXPERIENCE_CATEGORIES]
+    exp_spend = int(spend[np.isin(cols.category_codes, exp_codes)].sum())
+    if total_spend:
+        spendingBreakdown = {
+            'experiences': round(exp_spend / total_spend * 100),
+            'essentials':  round((total_spend - exp_spend) / total_spend * 100)
+        }
+    else:
+        spendingBreakdown = {'experiences': 0, 'essentials': 0}
+
+    # 4) weekdaySpending: total spend by weekday name (1970-01-01 was a Thursday)
+    spending = cols.amounts < 0
+    weekday = (cols.days[spending] + 3) % 7
+    by_weekday = np.bincount(weekday, weights=spend[spending], minlength=7)
+    weekdaySpending = {name: _cents_to_float(by_weekday[i]) for i, name in enumerate(WEEKDAY_NAMES)}
+
+    return {
+        'categories':        categories,
+        'topMerchants':      topMerchants,
+        'spendingBreakdown': spendingBreakdown,
+        'weekdaySpending':   weekdaySpending
+    }
+
+
+def detect_peaks(cols: TransactionColumns, top: int = 2) -> List[str]:
+    """The `top` months (YYYY-MM) with the highest net amount, ties in first-seen order."""
+    if not len(cols):
+        return []
+    months, first_month = _month_offsets(cols.days)
+    totals = np.bincount(months, weights=cols.amounts)
+    first_seen = np.full(len(totals), len(cols), dtype=np.int64)
+    np.minimum.at(first_seen, months, np.arange(len(cols)))
+    present = np.flatnonzero(first_seen < len(cols))
+    seen_order = present[np.argsort(first_seen[present], kind='stable')]
+    ranked = seen_order[np.argsort(-totals[seen_order], kind='stable')]
+    return [_month_label(first_month + i) for i in ranked[:top]]
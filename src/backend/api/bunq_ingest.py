@@ -0,0 +1,231 @@
+"""
+Paginated payment ingest from the bunq API.
+
+Every monetary account is walked on a bounded worker pool. Each worker
+follows the `older_id` pagination cursor until it passes the start of the
+history window (or the `newer_id` cursor forward from a known payment, for
+incremental syncs), and every page is preprocessed and handed to the caller
+as soon as it arrives, so the first page can be used before the last one
+is downloaded.
+
+Pages, payments and per-page latency are counted in the telemetry
+registry (see telemetry.py).
+"""
+import os
+import queue
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterator, List, Tuple
+
+from bunq.sdk.model.generated.endpoint import (
+    MonetaryAccountBankApiObject,
+    PaymentApiObject,
+)
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import telemetry
+
+# Configuration defaults
+default_limits = {
+    'transactions_page_size': 200,   # bunq's maximum page size
+    'history_months': 12,
+    'account_fetch_workers': 4,
+}
+
+_ACCOUNT_DONE = object()
+
+pages_fetched = telemetry.counter('bunq_pages_total', 'List pages fetched from the bunq API, per endpoint')
+payments_fetched = telemetry.counter('bunq_payments_total', 'Payments in the history window handed to preprocess')
+page_seconds = telemetry.histogram('bunq_page_seconds', 'Time to fetch and decode one bunq list page, per endpoint')
+
+
+def _list_page(endpoint: str, list_fn: Callable, **kwargs):
+    start = time.perf_counter()
+    response = list_fn(**kwargs)
+    page_seconds.observe(time.perf_counter() - start, endpoint=endpoint)
+    pages_fetched.inc(endpoint=endpoint)
+    return response
+
+
+def history_start(months: int) -> str:
+    """First day (YYYY-MM-DD) of a `months`-month history window ending today."""
+    return (datetime.utcnow() - timedelta(days=30 * months)).strftime('%Y-%m-%d')
+
+
+def list_accounts(page_size: int = default_limits['transactions_page_size']) -> list:
+    """All bank accounts, following pagination past bunq's default page of 10."""
+    accounts = []
+    params = {'count': str(page_size)}
+    while True:
+        response = _list_page('monetary-account-bank', MonetaryAccountBankApiObject.list, params=params)
+        accounts.extend(response.value)
+        pagination = response.pagination
+        if pagination is None or not pagination.has_previous_page() or not response.value:
+            return accounts
+        params = {**pagination.url_params_previous_page, 'count': str(page_size)}
+
+
+def iter_payment_pages(account_id: int, since: str,
+                       page_size: int = default_limits['transactions_page_size']) -> Iterator[list]:
+    """
+    Yield pages of PaymentApiObject for one account, newest first, until a
+    payment created before `since` (YYYY-MM-DD) is reached. Payments older
+    than `since` are dropped from the last page.
+    """
+    params = {'count': str(page_size)}
+    while True:
+        response = _list_page('payment', PaymentApiObject.list, monetary_account_id=account_id, params=params)
+        payments = response.value
+        in_window = [p for p in payments if p.created[:10] >= since]
+        if in_window:
+            yield in_window
+
+        # Listing is newest-first, so one out-of-window payment means we're done
+        pagination = response.pagination
+        if (len(in_window) < len(payments) or not payments
+                or pagination is None or not pagination.has_previous_page()):
+            return
+        params = {**pagination.url_params_previous_page, 'count': str(page_size)}
+
+
+def iter_new_payment_pages(account_id: int, newer_than_id: int,
+                           page_size: int = default_limits['transactions_page_size']) -> Iterator[list]:
+    """
+    Yield pages of PaymentApiObject created after payment `newer_than_id`,
+    walking forward with the `newer_id` cursor until the newest payment.
+    """
+    params = {'count': str(page_size), 'newer_id': str(newer_than_id)}
+    while True:
+        response = _list_page('payment', PaymentApiObject.list, monetary_account_id=account_id, params=params)
+        if response.value:
+            yield response.value
+
+        # only newer_id means "more pages now"; future_id means "poll later"
+        pagination = response.pagination
+        if not response.value or pagination is None or not pagination.has_next_page_assured():
+            return
+        params = {'count': str(page_size), 'newer_id': str(pagination.newer_id)}
+
+
+def preprocess(payments: list, account_name: str) -> list:
+    """
+    Turn raw PaymentApiObject instances into clean dicts and
+    tack on the account_name.
+    """
+    clean = []
+    for p in payments:
+        desc_raw = p.description or ''
+        desc = re.sub(r"[^\w\s]", "", desc_raw).strip().lower()
+
+        # counterparty alias pointer (adjust if your SDK is different)
+        cpty = p.counterparty_alias.pointer.name
+
+        # parse amount
+        try:
+            amt = float(p.amount.value)
+        except (ValueError, AttributeError):
+            continue
+
+        # normalize date
+        date = p.created.split("T")[0]
+
+        clean.append({
+            "payment_id":   p.id_,
+            "date":         date,
+            "merchant":     cpty,
+            "amount":       amt,
+            "description":  desc,
+            "account_name": account_name
+        })
+
+    return clean
+
+
+def _stream_accounts(accounts: list, pages_for: Callable[[object], Iterator[list]],
+                     max_workers: int) -> Iterator[Tuple[object, List[Dict]]]:
+    """
+    Run `pages_for(account)` for every account on up to `max_workers`
+    threads and yield (account, preprocessed page) as pages arrive. Page
+    order across accounts is therefore arbitrary. Errors from any account
+    are re-raised once the other accounts have finished.
+    """
+    if not accounts:
+        return
+
+    pages = queue.Queue()
+
+    def fetch_account(acct):
+        try:
+            # — you may need to adjust this to however your SDK surface exposes the account name:
+            account_name = acct._description
+            for page in pages_for(acct):
+                payments_fetched.inc(len(page))
+                pages.put((acct, preprocess(page, account_name)))
+        finally:
+            pages.put(_ACCOUNT_DONE)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(accounts)))) as pool:
+        futures = [pool.submit(fetch_account, acct) for acct in accounts]
+        remaining = len(accounts)
+        while remaining:
+            item = pages.get()
+            if item is _ACCOUNT_DONE:
+                remaining -= 1
+            else:
+                yield item
+        for future in futures:
+            future.result()
+
+
+def stream_transactions_from_api(months: int = default_limits['history_months'],
+                                 page_size: int = default_limits['transactions_page_size'],
+                                 max_workers: int = default_limits['account_fetch_workers']) -> Iterator[List[Dict]]:
+    """
+    Yield preprocessed pages of transactions from every bank account as
+    soon as each page is downloaded, with accounts fetched concurrently.
+    """
+    since = history_start(months)
+    for _, page in _stream_accounts(
+            list_accounts(),
+            lambda acct: iter_payment_pages(acct.id_, since, page_size),
+            max_workers):
+        yield page
+
+
+def stream_new_transactions(high_water_marks: Dict[int, int],
+                            months: int = default_limits['history_months'],
+                            page_size: int = default_limits['transactions_page_size'],
+                            max_workers: int = default_limits['account_fetch_workers']) -> Iterator[Tuple[int, List[Dict]]]:
+    """
+    Incremental variant of stream_transactions_from_api. For accounts with
+    a known newest payment id in `high_water_marks` only newer payments are
+    fetched; accounts seen for the first time get the full history window.
+    Yields (account_id, preprocessed page).
+    """
+    since = history_start(months)
+
+    def pages_for(acct):
+        newest = high_water_marks.get(acct.id_)
+        if newest is None:
+            return iter_payment_pages(acct.id_, since, page_size)
+        return iter_new_payment_pages(acct.id_, newest, page_size)
+
+    for acct, page in _stream_accounts(list_accounts(), pages_for, max_workers):
+        yield acct.id_, page
+
+
+def fetch_transactions_from_api(months: int = default_limits['history_months'],
+                                page_size: int = default_limits['transactions_page_size'],
+                                max_workers: int = default_limits['account_fetch_workers']) -> list:
+    """
+    Fetch every payment from the past `months` months for every bank
+    account, following pagination, and preprocess them—including the
+    account name.
+    """
+    all_payments = []
+    for page in stream_transactions_from_api(months, page_size, max_workers):
+        all_payments.extend(page)
+    return all_payments
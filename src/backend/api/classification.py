@@ -0,0 +1,296 @@
+"""
+Merchant -> category classification against an OpenAI-compatible endpoint.
+
+MerchantClassifier de-duplicates merchants, answers what it can from the
+MerchantCategoryCache, and sends the rest to the model in batches that are
+fanned out concurrently (bounded in-flight requests, a shared per-endpoint
+rate limiter and jittered retries on 429/5xx).
+"""
+import json
+import os
+import sys
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from llm_concurrency import bounded_map, call_with_retry, get_rate_limiter
+from merchant_cache import MerchantCategoryCache, normalize_merchant
+
+# Configuration defaults
+default_limits = {
+    'classify_batch_size': 50,
+    'classify_max_attempts': 3,
+    'classify_max_in_flight': 8,
+    'llm_requests_per_second': 10.0,
+}
+
+CLASSIFICATION_MODEL = "nvidia/llama-3.1-nemotron-70b-instruct"
+
+# Categories the classifier may assign, with the hints shown to the model
+CATEGORY_DESCRIPTIONS = {
+    'groceries':         "supermarkets, food markets, grocery-delivery services",
+    'food':              "dineout, fast food, restaurants",
+    'entertainment':     "streaming services, cinemas, concerts, subscriptions",
+    'utilities':         "electricity, water, internet, phone, rent",
+    'transport':         "fuel, tolls, public transit, ride-hailing",
+    'travel':            "hotels, flights, car rentals, travel agencies",
+    'health':            "pharmacies, hospitals, clinics, health insurance",
+    'rent and mortgage': "rent, mortgage payments, property taxes",
+    'education':         "tuition, courses, books, educational services",
+    'finance':           "banks, loans, investments, insurance",
+    'personal':          "clothing, beauty, hair, personal care",
+    'shopping':          "online stores, retail, e-commerce",
+    'savings':           "savings accounts, investments, retirement",
+    'business':          "business expenses, office supplies, services",
+    'gifts':             "gifts, donations, charity",
+    'subscriptions':     "monthly or yearly subscriptions",
+    'cash':              "ATM withdrawals, cash deposits",
+    'pets':              "pet care, veterinary services, pet supplies",
+    'other':             "anything not covered above",
+}
+
+_CATEGORY_LIST = "".join(
+    f"  • {name}: {desc}\n" for name, desc in CATEGORY_DESCRIPTIONS.items()
+)
+
+# System prompt for single-merchant classification
+CLASSIFICATION_SYSTEM_PROMPT = (
+    "You are a specialized transaction-classification assistant. "
+    "Your job is to map a merchant name into one of these categories:\n\n"
+    f"{_CATEGORY_LIST}\n"
+    "For each merchant, respond *only* with a JSON object with exactly two keys:\n"
+    "  {\n"
+    "    \"category\": <one of the above catgeories>,\n"
+    "    \"reasoning\": <a single sentence explaining why>\n"
+    "  }\n\n"
+    "Do NOT include any additional text, markdown, or formatting. "
+    "Make sure to use the exact category names as listed above. "
+    "Make sure you definitely only include one of the above categories and be decisive. "
+    "If the merchant isn't clearly in one of the first four, choose \"other.\""
+    "\n\nExample:\n"
+    "Input: “Shell”\n"
+    "Output: {\"category\": \"transport\", \"reasoning\": \"Shell is a fuel station chain.\"}"
+)
+
+# System prompt for classifying many merchants in one request
+BATCH_CLASSIFICATION_SYSTEM_PROMPT = (
+    "You are a specialized transaction-classification assistant. "
+    "Your job is to map merchant names into one of these categories:\n\n"
+    f"{_CATEGORY_LIST}\n"
+    "You will receive a JSON array of merchant names. Respond *only* with a JSON array "
+    "containing one object per merchant, in the same order, each with exactly three keys:\n"
+    "  {\n"
+    "    \"merchant\": <the merchant name exactly as given>,\n"
+    "    \"category\": <one of the above categories>,\n"
+    "    \"reasoning\": <a single short sentence explaining why>\n"
+    "  }\n\n"
+    "Do NOT include any additional text, markdown, or formatting. "
+    "Use the exact category names as listed above and be decisive. "
+    "If a merchant isn't clearly in one of the categories, choose \"other\"."
+    "\n\nExample:\n"
+    "Input: [\"Shell\", \"Albert Heijn\"]\n"
+    "Output: [{\"merchant\": \"Shell\", \"category\": \"transport\", \"reasoning\": \"Shell is a fuel station chain.\"}, "
+    "{\"merchant\": \"Albert Heijn\", \"category\": \"groceries\", \"reasoning\": \"Albert Heijn is a supermarket chain.\"}]"
+)
+
+
+def validated_result(item) -> Optional[Dict]:
+    """{"category", "reasoning"} from a model reply item, or None if its category isn't one we know."""
+    if not isinstance(item, dict):
+        return None
+    category = str(item.get('category', '')).strip().lower()
+    if category not in CATEGORY_DESCRIPTIONS:
+        return None
+    return {'category': category, 'reasoning': str(item.get('reasoning', ''))}
+
+
+class MerchantClassifier:
+    """
+    Classifies merchants with the given OpenAI client.
+
+    Args:
+        client: OpenAI client (its own retries should be disabled; this
+            class retries with backoff itself).
+        cache: optional MerchantCategoryCache consulted before any call.
+        batch_size: merchants per request; <= 1 uses the single-merchant prompt.
+        max_in_flight: maximum concurrent requests.
+        requests_per_second: token-bucket rate for this client's endpoint.
+    """
+
+    def __init__(self, client, cache: Optional[MerchantCategoryCache] = None,
+                 model: str = CLASSIFICATION_MODEL,
+                 batch_size: int = default_limits['classify_batch_size'],
+                 max_attempts: int = default_limits['classify_max_attempts'],
+                 max_in_flight: int = default_limits['classify_max_in_flight'],
+                 requests_per_second: float = default_limits['llm_requests_per_second']):
+        self.client = client
+        self.cache = cache
+        self.model = model
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.max_in_flight = max_in_flight
+        self.rate_limiter = get_rate_limiter(str(client.base_url), rate=requests_per_second,
+                                             capacity=max(max_in_flight, 1))
+
+    def _create(self, **kwargs):
+        return call_with_retry(self.client.chat.completions.create,
+                               rate_limiter=self.rate_limiter, **kwargs)
+
+    def classify_merchant(self, merchant_name: str) -> Optional[Dict]:
+        """
+        Ask the model for the category of a single merchant.
+        Returns {"category", "reasoning"}, or None if the reply isn't valid
+        JSON or has no known category (so it is retried, never cached).
+        """
+        resp = self._create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": CLASSIFICATION_SYSTEM_PROMPT},
+                {"role": "user",   "content": f"Merchant: {merchant_name}"}
+            ],
+            temperature=0.0,
+            top_p=1,
+            max_tokens=8192,
+        )
+
+        raw = resp.choices[0].message.content.strip()
+        try:
+            result = validated_result(json.loads(raw))
+        except json.JSONDecodeError:
+            print(f"Failed to decode JSON for merchant: {merchant_name}, response: {raw}")
+            return None
+        if result is None:
+            print(f"No valid category for merchant: {merchant_name}, response: {raw}")
+        return result
+
+    def classify_merchant_batch(self, merchant_names: List[str]) -> Dict[str, Dict]:
+        """
+        Classify several merchants with a single model call.
+
+        Returns a dict mapping each merchant name that came back with a
+        valid category to its {"category", "reasoning"} result. Merchants
+        missing from the reply, or with an unknown category, are left out
+        so the caller can re-request just those.
+        """
+        resp = self._create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": BATCH_CLASSIFICATION_SYSTEM_PROMPT},
+                {"role": "user",   "content": json.dumps(merchant_names, ensure_ascii=False)}
+            ],
+            temperature=0.0,
+            top_p=1,
+            # ~60 output tokens per merchant plus slack for the array syntax
+            max_tokens=min(8192, 256 + 80 * len(merchant_names)),
+        )
+
+        raw = resp.choices[0].message.content.strip()
+
+        # Strip any accidental ``` fences
+        if raw.startswith("```"):
+            raw = "\n".join(l for l in raw.splitlines() if not l.strip().startswith("```")).strip()
+
+        try:
+            items = json.loads(raw)
+        except json.JSONDecodeError:
+            print(f"Failed to decode JSON for batch of {len(merchant_names)} merchants, response: {raw[:200]}")
+            return {}
+        if isinstance(items, dict):
+            # tolerate {"results": [...]} style wrappers
+            items = next((v for v in items.values() if isinstance(v, list)), [])
+        if not isinstance(items, list):
+            return {}
+
+        # Match replies back to the requested names by normalized merchant key
+        wanted = {normalize_merchant(name): name for name in merchant_names}
+        results = {}
+        for item in items:
+            result = validated_result(item)
+            if result is None:
+                continue
+            name = wanted.get(normalize_merchant(str(item.get('merchant', ''))))
+            if name is not None:
+                results[name] = result
+        return results
+
+    def _classify_chunk(self, chunk: List[str]) -> Dict[str, Dict]:
+        if self.batch_size <= 1:
+            result = self.classify_merchant(chunk[0])
+            return {chunk[0]: result} if result is not None else {}
+        return self.classify_merchant_batch(chunk)
+
+    def classify_merchants(self, merchant_names: List[str]) -> Dict[str, Dict]:
+        """
+        Classify unique merchant names in chunks of `batch_size`, with up to
+        `max_in_flight` chunks running concurrently. Merchants whose reply
+        failed validation are re-requested on their own, up to
+        `max_attempts` rounds in total. A chunk whose request still fails
+        after retries is treated as failed validation, not as a fatal error.
+        """
+        size = max(self.batch_size, 1)
+        results = {}
+        pending = list(merchant_names)
+        for attempt in range(self.max_attempts):
+            if not pending:
+                break
+            chunks = [pending[i:i + size] for i in range(0, len(pending), size)]
+            for chunk_result in bounded_map(self._classify_chunk, chunks,
+                                            max_workers=self.max_in_flight,
+                                            return_exceptions=True):
+                if isinstance(chunk_result, Exception):
+                    print(f"Classification request failed: {chunk_result}")
+                    continue
+                results.update(chunk_result)
+            pending = [name for name in pending if name not in results]
+            if pending:
+                print(f"Attempt {attempt + 1}: {len(pending)} merchants failed validation, re-requesting")
+
+        if pending:
+            print(f"Giving up on {len(pending)} merchants: {pending[:10]}")
+        return results
+
+    def classify_transactions(self, txns: list) -> list:
+        """
+        Attach 'category' and 'reasoning' to every transaction.
+        Merchants are looked up in the cache first; merchants that have
+        never been seen are de-duplicated and sent to the model.
+        """
+        # 1) Group rows by normalized merchant so each merchant is looked up once
+        by_merchant = defaultdict(list)
+        for t in txns:
+            by_merchant[normalize_merchant(t['merchant'])].append(t)
+
+        # 2) Cache first; collect the misses
+        resolved = {}
+        misses = []
+        for key, rows in by_merchant.items():
+            result = self.cache.get(rows[0]['merchant']) if self.cache is not None else None
+            # entries cached before single-merchant replies were validated may lack a category
+            if result is not None:
+                result = validated_result(result)
+            if result is None:
+                misses.append(rows[0]['merchant'])
+            else:
+                resolved[key] = result
+
+        # 3) Concurrent, batched model calls for the unseen merchants only
+        if misses:
+            for name, result in self.classify_merchants(misses).items():
+                if self.cache is not None:
+                    self.cache.set(name, result)
+                resolved[normalize_merchant(name)] = result
+            if self.cache is not None:
+                self.cache.save()
+
+        for key, rows in by_merchant.items():
+            result = resolved.get(key)
+            if result is None:
+                continue
+            for t in rows:
+                t['category'] = result['category']
+                t['reasoning'] = result['reasoning']
+
+        cache_stats = self.cache.stats() if self.cache is not None else {}
+        print(f"Classified {len(by_merchant)} merchants ({len(misses)} sent to model), cache: {cache_stats}")
+
+        return txns
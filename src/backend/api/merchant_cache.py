@@ -0,0 +1,100 @@
+"""
+Persistent merchant -> category store used by classify_transactions.
+
+Merchant names are normalized before lookup so that "ALBERT HEIJN 1234",
+"Albert Heijn" and "albert heijn b.v." share one entry. The store lives in
+memory as an LRU with a TTL and is flushed to a JSON file so classifications
+survive restarts.
+"""
+import json
+import os
+import re
+import sys
+import threading
+import unicodedata
+from typing import Dict, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from caching import LRUCache
+
+# Trailing tokens that carry no information about what the merchant sells
+_NOISE_SUFFIXES = {'bv', 'nv', 'vof', 'inc', 'ltd', 'llc', 'gmbh', 'sa', 'co'}
+
+
+def normalize_merchant(name: str) -> str:
+    """
+    Reduce a merchant name to a stable lookup key: accents stripped,
+    lower-cased, punctuation removed, and trailing store numbers /
+    legal-form suffixes dropped.
+    """
+    s = unicodedata.normalize('NFKD', name or '')
+    s = ''.join(c for c in s if not unicodedata.combining(c)).casefold()
+    s = s.replace('&', ' and ')
+    s = re.sub(r"[.']", "", s)
+    s = re.sub(r"[^\w\s]", " ", s)
+    tokens = s.split()
+    while len(tokens) > 1 and (tokens[-1].isdigit() or tokens[-1] in _NOISE_SUFFIXES):
+        tokens.pop()
+    return ' '.join(tokens)
+
+
+class MerchantCategoryCache:
+    """
+    Merchant classification store with normalized keys, LRU/TTL eviction
+    and an optional JSON file backing it.
+
+    Values are the model's {"category", "reasoning"} dicts.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = 10000,
+                 ttl_seconds: Optional[float] = None):
+        self.path = path
+        self._cache = LRUCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self._dirty = False
+        self._lock = threading.Lock()
+        if path:
+            self.load()
+
+    def get(self, merchant: str) -> Optional[Dict[str, str]]:
+        return self._cache.get(normalize_merchant(merchant))
+
+    def set(self, merchant: str, result: Dict[str, str]) -> None:
+        self._cache.set(normalize_merchant(merchant), {
+            'category':  result['category'],
+            'reasoning': result.get('reasoning', ''),
+        })
+        self._dirty = True
+
+    def load(self) -> None:
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable merchant cache {self.path}: {e}")
+            return
+        self._cache.load_entries(
+            (e['key'], e['value'], e['stored_at']) for e in entries
+        )
+
+    def save(self) -> None:
+        """Write the cache to disk if anything changed since the last save."""
+        if not self.path or not self._dirty:
+            return
+        with self._lock:
+            entries = [
+                {'key': k, 'value': v, 'stored_at': ts}
+                for k, v, ts in self._cache.entries()
+            ]
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entries, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+
+    def stats(self) -> Dict:
+        return self._cache.stats()
+
+    def __len__(self) -> int:
+        return len(self._cache)
@@ -1,50 +1,80 @@
 # Flask-based bunq Memories API with OpenAI Client NVIDIA Integration
 import os
-from flask import Flask, jsonify
+from flask import Flask, jsonify, request
 from datetime import datetime, timedelta
 from collections import Counter
 import re
 
-# bunq SDK imports
-from bunq.sdk.context.api_context import ApiContext
-from bunq.sdk.context.bunq_context import BunqContext
-from bunq.sdk.model.generated.endpoint import PaymentApiObject
-from bunq import Pagination
-from bunq import ApiEnvironmentType
+# The bunq SDK and the OpenAI client are loaded on first use (see services.py)
 import json
 from collections import Counter, defaultdict
 from datetime import datetime
-import statistics
 
 import csv
-from typing import List, Dict
+from typing import Iterator, List, Dict, Sequence
 from flask_cors import CORS
 
-# OpenAI NVIDIA integration
-from openai import OpenAI
-
 import html
 import re
 import ast
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import analytics
+from analytics import TransactionColumns, as_columns
+from caching import LRUCache, TieredCache, fingerprint
+import llm_gateway
+import persona_scoring
+import telemetry
+from transaction_loader import TransactionFileCache
+
+from classification import MerchantClassifier
+from merchant_cache import MerchantCategoryCache
+from services import BunqSession, ServiceContainer
+from streaming_metrics import MetricsAccumulator
+from summary_pipeline import SummaryPipeline
 
 # Configuration defaults
 default_limits = {
     'transactions_page_size': 200,
-    'history_months': 12
+    'history_months': 12,
+    'merchant_cache_size': 10000,
+    'merchant_cache_ttl_days': 90,
+    'classify_batch_size': 50,
+    'classify_max_in_flight': 8,
+    'llm_requests_per_second': 10,
+    'account_fetch_workers': 4,
+    'summary_cache_size': 256,
+    'summary_cache_disk_entries': 4096
 }
 
 # Initialize Flask app
 app = Flask(__name__)
 CORS(app)
+# Request and per-stage timings, LLM tokens and cache hit ratios at /metrics
+telemetry.instrument_flask(app)
 # Load environment variables
 BUNQ_ENV = os.getenv('BUNQ_ENV', 'SANDBOX')
 BUNQ_API_KEY = os.getenv('BUNQ_API_KEY') 
 OPENAI_API_KEY = os.getenv('NVIDIA_RIVA_TOKEN') 
 OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL', 'https://integrate.api.nvidia.com/v1')
 CONTEXT_FILE = os.getenv('BUNQ_CONTEXT_FILE', 'bunq_api_context.conf')
+BUNQ_API_URL = os.getenv('BUNQ_API_URL')  # unset = the SDK's URL for BUNQ_ENV
 
 USE_API_FOR_DATA = os.getenv('USE_API_FOR_DATA', 'false').lower() == 'true'
 CSV_BASE_FILE_PATH = os.getenv('CSV_BASE_FILE_PATH', '../data/')
+MERCHANT_CACHE_FILE = os.getenv('MERCHANT_CACHE_FILE', 'merchant_category_cache.json')
+TRANSACTION_STORE_DIR = os.getenv('TRANSACTION_STORE_DIR', 'transaction_store')
+SUMMARY_CACHE_DIR = os.getenv('SUMMARY_CACHE_DIR')  # unset = memory only
+SUMMARY_CACHE_SIZE = int(os.getenv('SUMMARY_CACHE_SIZE', default_limits['summary_cache_size']))
+SUMMARY_CACHE_DISK_SIZE = int(os.getenv('SUMMARY_CACHE_DISK_SIZE', default_limits['summary_cache_disk_entries']))
+# 'rules' = persona_scoring.py picks the persona, the LLM only writes the
+# conversation points; 'llm' = the LLM reads every transaction and does both
+PERSONA_SCORING = os.getenv('PERSONA_SCORING', 'rules').lower()
+ACCOUNT_FETCH_WORKERS = int(os.getenv('ACCOUNT_FETCH_WORKERS', default_limits['account_fetch_workers']))
+CLASSIFY_BATCH_SIZE = int(os.getenv('CLASSIFY_BATCH_SIZE', default_limits['classify_batch_size']))
+CLASSIFY_MAX_IN_FLIGHT = int(os.getenv('CLASSIFY_MAX_IN_FLIGHT', default_limits['classify_max_in_flight']))
+LLM_REQUESTS_PER_SECOND = float(os.getenv('LLM_REQUESTS_PER_SECOND', default_limits['llm_requests_per_second']))
 
 # Debug prints
 def debug_env():
@@ -56,39 +86,17 @@ def debug_env():
 
 debug_env()
 
-if not BUNQ_API_KEY or not OPENAI_API_KEY:
-    raise RuntimeError("Please set BUNQ_API_KEY and NVIDIA_RIVA_TOKEN environment variables")
-
-# Initialize OpenAI client pointing to NVIDIA endpoint
-openai_client = OpenAI(
-    base_url=OPENAI_BASE_URL,
-    api_key=OPENAI_API_KEY
-)
+def create_openai_client():
+    if not OPENAI_API_KEY:
+        raise RuntimeError("Please set the NVIDIA_RIVA_TOKEN environment variable")
+    # OpenAI client pointing to NVIDIA endpoint, on the shared connection pool
+    return llm_gateway.get_client(base_url=OPENAI_BASE_URL, api_key=OPENAI_API_KEY)
 
-# Initialize bunq context
-if not os.path.exists(CONTEXT_FILE):
-    api_context = ApiContext.create(
-        ApiEnvironmentType[BUNQ_ENV],
-        BUNQ_API_KEY,
-        'bunq-test1'
-    )
-    api_context.save(CONTEXT_FILE)
-else:
-    api_context = ApiContext.restore(CONTEXT_FILE)
-BunqContext.load_api_context(api_context)
-
-import os
-from datetime import datetime, timedelta
-
-from bunq.sdk.model.generated.endpoint import (
-    MonetaryAccountBankApiObject,
-    PaymentApiObject,
-)
-
-# Configuration defaults
-default_limits = {
-    'history_months': 12
-}
+# Clients are built on first use, so importing this module needs neither
+# network nor credentials, and workers don't boot behind a bunq handshake
+services = ServiceContainer()
+services.register('openai', create_openai_client)
+services.register('bunq', lambda: BunqSession(BUNQ_ENV, BUNQ_API_KEY, CONTEXT_FILE, base_url=BUNQ_API_URL).open())
 
 personas = {
     1: {"name": "The Budgeting Maestro",     "character": "Maestro_Moolah",
@@ -109,170 +117,76 @@ personas = {
         "description": "Explores new financial tools, apps, and unconventional methods to manage money."}
 }
 
+CSV_HEADER_MAPPING = {
+    'date': 'Timestamp',
+    'merchant': 'Merchant',
+    'amount': 'Amount',
+    'description': 'Description',
+    'category': 'Category',
+    'account_name': 'Account'
+}
+
+# Parsed persona CSVs, shared across requests
+transaction_files = TransactionFileCache()
+
 def fetch_transactions(user_id: str = None) :
     """
         Fetch & classify transactions for a given user_id.
-        If USE_API_FOR_DATA=True, pull from the bunq API (you could also
-        pass user_id down to filter). Otherwise, read from CSV at:
+        If USE_API_FOR_DATA=True, sync new payments from the bunq API into
+        the user's local transaction store and read from the store.
+        Otherwise, read from CSV at:
         ../data/{user_id}.csv
     """
     if USE_API_FOR_DATA:
-        cleaned = fetch_transactions_from_api()
-        categorized = classify_transactions(cleaned)
+        from transaction_store import TransactionStore, sync_transactions  # pulls in the bunq SDK
+
+        with telemetry.span('memories.bunq_session'):
+            services.get('bunq')
+        # Only payments newer than the user's local store are fetched and classified
+        store = TransactionStore(os.path.join(TRANSACTION_STORE_DIR, f"{user_id}.sqlite"))
+        categorized = sync_transactions(
+            store,
+            classify=classify_transactions,
+            months=default_limits['history_months'],
+            page_size=default_limits['transactions_page_size'],
+            max_workers=ACCOUNT_FETCH_WORKERS
+        )
         return categorized
     else:
         file_name = personas[int(user_id)]['character'] + ".csv"
         categorized = fetch_transactions_from_csv(
             file_path=CSV_BASE_FILE_PATH + file_name,
-            header_mapping={
-                'date': 'Timestamp',
-                'merchant': 'Merchant',
-                'amount': 'Amount',
-                'description': 'Description',
-                'category': 'Category',
-                'account_name': 'Account'
-            }
+            header_mapping=CSV_HEADER_MAPPING
         )
         return categorized
 
-def fetch_transactions_from_api(months: int = default_limits['history_months']) -> list:
-    """
-    Fetch the most recent page of payments for every bank account
-    over the past `months` months (no pagination), then preprocess
-    them—including the account name.
-    """
-    since = (datetime.utcnow() - timedelta(days=30 * months)).isoformat()
-    all_payments = []
-
-    # 1) List all bank accounts
-    accounts = MonetaryAccountBankApiObject.list().value
-
-    for acct in accounts:
-        acct_id = acct.id_
-        # — you may need to adjust this to however your SDK surface exposes the account name:
-        account_name = acct._description
-
-        # 2) Single‐page fetch for this account
-        payments = PaymentApiObject.list(
-            monetary_account_id=acct_id,
-            params={'older_than': since}
-        ).value
-
-        # 3) Preprocess, injecting account_name
-        cleaned = preprocess(payments, account_name)
-        all_payments.extend(cleaned)
-
-    return all_payments
+# Merchant classifications are shared across users and requests
+merchant_cache = MerchantCategoryCache(
+    path=MERCHANT_CACHE_FILE,
+    max_entries=default_limits['merchant_cache_size'],
+    ttl_seconds=default_limits['merchant_cache_ttl_days'] * 24 * 3600
+)
 
+services.register('classifier', lambda: MerchantClassifier(
+    services.get('openai').with_options(max_retries=0),
+    cache=merchant_cache,
+    batch_size=CLASSIFY_BATCH_SIZE,
+    max_in_flight=CLASSIFY_MAX_IN_FLIGHT,
+    requests_per_second=LLM_REQUESTS_PER_SECOND
+))
 
-def preprocess(payments: list, account_name: str) -> list:
+def classify_transactions(txns: list) -> list:
     """
-    Turn raw PaymentApiObject instances into clean dicts and
-    tack on the account_name.
+    Attach 'category' and 'reasoning' to every transaction.
+    See MerchantClassifier.classify_transactions.
     """
-    clean = []
-    for p in payments:
-        desc_raw = p.description or ''
-        desc = re.sub(r"[^\w\s]", "", desc_raw).strip().lower()
-
-        # counterparty alias pointer (adjust if your SDK is different)
-        cpty = p.counterparty_alias.pointer.name  
-
-        # parse amount
-        try:
-            amt = float(p.amount.value)
-        except (ValueError, AttributeError):
-            continue
-
-        # normalize date
-        date = p.created.split("T")[0]
-
-        clean.append({
-            "date":         date,
-            "merchant":     cpty,
-            "amount":       amt,
-            "description":  desc,
-            "account_name": account_name
-        })
-
-    return clean
-
-def classify_transactions(txns: list) -> list:
-    for t in txns:
-        merchant_name = t['merchant']
-        resp = openai_client.chat.completions.create(
-            model="nvidia/llama-3.1-nemotron-70b-instruct",
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "You are a specialized transaction-classification assistant. "
-                        "Your job is to map a merchant name into one of these categories:\n\n"
-                        "  • groceries: supermarkets, food markets, grocery-delivery services\n"
-                        "  • food: dineout, fast food, restaurants\n"
-                        "  • entertainment: streaming services, cinemas, concerts, subscriptions\n"
-                        "  • utilities: electricity, water, internet, phone, rent\n"
-                        "  • transport: fuel, tolls, public transit, ride-hailing\n"
-                        "  • travel: hotels, flights, car rentals, travel agencies\n"
-                        "  • health: pharmacies, hospitals, clinics, health insurance\n"
-                        " • rent and mortgage: rent, mortgage payments, property taxes\n"
-                        " • education: tuition, courses, books, educational services\n"
-                        " • finance: banks, loans, investments, insurance\n"
-                        " • personal: clothing, beauty, hair, personal care\n"
-                        " • shopping: online stores, retail, e-commerce\n"
-                        " • savings: savings accounts, investments, retirement\n"
-                        " • business: business expenses, office supplies, services\n"
-                        " • gifts: gifts, donations, charity\n"
-                        " • subscriptions: monthly or yearly subscriptions\n"
-                        " • cash: ATM withdrawals, cash deposits\n"
-                        " • pets: pet care, veterinary services, pet supplies\n"
-                        "  • other: anything not covered above\n\n"
-                        "For each merchant, respond *only* with a JSON object with exactly two keys:\n"
-                        "  {\n"
-                        "    \"category\": <one of the above catgeories>,\n"
-                        "    \"reasoning\": <a single sentence explaining why>\n"
-                        "  }\n\n"
-                        "Do NOT include any additional text, markdown, or formatting. "
-                        "Make sure to use the exact category names as listed above. "
-                        "Make sure you definitely only include one of the above categories and be decisive. "
-                        "If the merchant isn't clearly in one of the first four, choose \"other.\""
-                        "\n\nExample:\n"
-                        "Input: “Shell”\n"
-                        "Output: {\"category\": \"transport\", \"reasoning\": \"Shell is a fuel station chain.\"}"
-                    )
-                },
-                {
-                    "role": "user",
-                    "content": f"Merchant: {merchant_name}"
-                }
-            ],
-            temperature=0.0,
-            top_p=1,
-            max_tokens=8192,
-        )
-
-        raw = resp.choices[0].message.content.strip()
-        print(f"Merchant: {merchant_name}, Response: {raw}")
-        try:
-            result = json.loads(raw)
-        except json.JSONDecodeError:
-            print(f"Failed to decode JSON for merchant: {merchant_name}, response: {raw}")
-            continue
-        t['category'] = result['category']
-        t['reasoning'] = result['reasoning']
-
-    return txns
+    with telemetry.span('memories.classify'):
+        return services.get('classifier').classify_transactions(txns)
 
 
 # Utility: detect spending peaks
-def detect_peaks(txns: list) -> list:
-    monthly = {}
-    for t in txns:
-        m = t['date'][:7]
-        monthly.setdefault(m, 0)
-        monthly[m] += t['amount']
-    sorted_months = sorted(monthly.items(), key=lambda x: x[1], reverse=True)
-    return [m for m, _ in sorted_months[:2]]
+def detect_peaks(txns) -> list:
+    return analytics.detect_peaks(as_columns(txns))
 
 def unescape_html(s: str) -> str:
     # return html.unescape(s)
@@ -305,7 +219,7 @@ def generate_year_in_review(txns: list) -> str:
     )
 
     # 3) Call the NVIDIA Llama endpoint
-    resp = openai_client.chat.completions.create(
+    resp = services.get('openai').chat.completions.create(
         model="nvidia/llama-3.1-nemotron-70b-instruct",
         temperature=0.0,
         top_p=1,
@@ -316,11 +230,24 @@ def generate_year_in_review(txns: list) -> str:
         ]
     )
 
+    llm_gateway.record_usage(resp.usage, 'year_in_review')
+
     # 4) Extract and return the generated narrative
     result = resp.choices[0].message.content.strip()
     # Unescape HTML entities
     return unescape_html(result)
 
+# Bump SUMMARY_PROMPT_VERSION whenever the conversation-points or the
+# year-in-review prompt changes, so cached summaries produced by the old
+# prompt are no longer served.
+CONVERSATION_MODEL = "nvidia/llama-3.1-nemotron-70b-instruct"
+SUMMARY_PROMPT_VERSION = 2
+SUMMARY_CACHE_VERSION = (f"{SUMMARY_PROMPT_VERSION}:{CONVERSATION_MODEL}:{fingerprint(personas)}:{PERSONA_SCORING}:"
+                         f"{fingerprint([persona_scoring.PERSONA_PROFILES, persona_scoring.default_limits])}")
+
+summary_cache = TieredCache(max_entries=SUMMARY_CACHE_SIZE, directory=SUMMARY_CACHE_DIR,
+                            max_disk_entries=SUMMARY_CACHE_DISK_SIZE)
+
 def generate_conversation_points(txns: list) -> dict:
     """
     Returns:
@@ -353,8 +280,8 @@ def generate_conversation_points(txns: list) -> dict:
         "Generate the JSON as specified."
     )
 
-    resp = openai_client.chat.completions.create(
-        model="nvidia/llama-3.1-nemotron-70b-instruct",
+    resp = services.get('openai').chat.completions.create(
+        model=CONVERSATION_MODEL,
         temperature=0.0,
         top_p=1,
         max_tokens=1024,
@@ -364,8 +291,50 @@ def generate_conversation_points(txns: list) -> dict:
         ]
     )
 
-    raw = resp.choices[0].message.content.strip()
+    llm_gateway.record_usage(resp.usage, 'conversation')
+    return parse_json_reply(resp.choices[0].message.content)
+
+
+def generate_persona_conversation_points(metrics: dict, scored: dict) -> dict:
+    """
+    Returns {"conversationPoints": [...]} for the persona persona_scoring
+    already picked. The LLM sees the spending metrics rather than every
+    transaction, so the prompt stays the same size however long the
+    history is.
+    """
+    persona = personas[scored['persona_id']]
+    system_prompt = (
+        "You are a financial coach. The user has been identified as "
+        f"{persona['name']} (\"{persona['character']}\"): {persona['description']}\n\n"
+        "You'll be given a JSON summary of their past year: spending per category, top merchants, "
+        "monthly income and expenses, and spending per weekday.\n\n"
+        "Return only a JSON object with one key:\n"
+        "  \"conversationPoints\": an array of 4-6 short, actionable strings that fit this persona and these numbers.\n\n"
+        "Do not output any extra text, bullets, markdown, or code fences—just the raw JSON."
+    )
+    user_prompt = (
+        f"Here is my spending summary for the past year:\n\n"
+        f"{json.dumps(metrics, ensure_ascii=False, separators=(',', ':'))}\n\n"
+        "Generate the JSON as specified."
+    )
 
+    resp = services.get('openai').chat.completions.create(
+        model=CONVERSATION_MODEL,
+        temperature=0.0,
+        top_p=1,
+        max_tokens=512,
+        messages=[
+            {"role": "system", "content": system_prompt},
+            {"role": "user",   "content": user_prompt}
+        ]
+    )
+
+    llm_gateway.record_usage(resp.usage, 'conversation')
+    return parse_json_reply(resp.choices[0].message.content)
+
+
+def parse_json_reply(raw: str):
+    raw = raw.strip()
     # Strip any accidental ``` fences
     if raw.startswith("```"):
         raw = "\n".join(l for l in raw.splitlines() if not l.strip().startswith("```")).strip()
@@ -380,107 +349,88 @@ def generate_conversation_points(txns: list) -> dict:
 
 
 def compute_metrics(txns):
-    # Total number of transactions
-    total_count = len(txns)
-    # Total absolute spend (for % splits)
-    total_spend = sum(abs(t['amount']) for t in txns)
-
-    # 1) categories: count, % of txns, average amount
-    cat_amounts = defaultdict(list)
-    for t in txns:
-        cat_amounts[t['category']].append(abs(t['amount']))
-
-    categories = {}
-    for cat, amounts in cat_amounts.items():
-        count = len(amounts)
-        pct   = round(count / total_count * 100)
-        avg   = round(statistics.mean(amounts))
-        categories[cat] = {
-            'percentage': pct,
-            'count':      count,
-            'averageInArea': avg
-        }
-
-    # 2) topMerchants: top 3 by visit count, include category
-    merchant_counts = Counter(t['merchant'] for t in txns)
-    # assume each merchant always maps to a single category:
-    merchant_cat = {t['merchant']: t['category'] for t in txns}
-
-    topMerchants = []
-    for name, visits in merchant_counts.most_common(3):
-        topMerchants.append({
-            'name':     name,
-            'category': merchant_cat[name],
-            'visits':   visits
-        })
-
-    # 3) spendingBreakdown: % split between “experiences” vs “essentials”
-    # adjust these sets however you like
-    experiences = {'food', 'entertainment', 'travel', 'personal', 'shopping', 'gifts', 'subscriptions', 'pets'}
-    exp_spend = sum(abs(t['amount']) for t in txns if t['category'] in experiences)
-    ess_spend = total_spend - exp_spend
-
-    spendingBreakdown = {
-        'experiences': round(exp_spend / total_spend * 100),
-        'essentials':  round(ess_spend / total_spend * 100)
-    }
-
-    # 4) weekdaySpending: total spend by weekday name
-    weekday_map = {
-        0: 'monday', 1: 'tuesday', 2: 'wednesday',
-        3: 'thursday',4: 'friday',    5: 'saturday',
-        6: 'sunday'
-    }
-    weekdaySpending = {name: 0 for name in weekday_map.values()}
-    for t in txns:
-        dt = datetime.fromisoformat(t['date'])
-        wd = weekday_map[dt.weekday()]
-        weekdaySpending[wd] += abs(t['amount']) if t['amount'] < 0 else 0 # only count spending
-
-    return {
-        'categories':        categories,
-        'topMerchants':      topMerchants,
-        'spendingBreakdown': spendingBreakdown,
-        'weekdaySpending':   weekdaySpending
-    }
-
-# Pipeline orchestration
-def run_memories_pipeline(user_id: str = None):
-    categorized = fetch_transactions(user_id)
-    counts = Counter(t['category'] for t in categorized)
-    top_cats = counts.most_common(5)
-    peaks = detect_peaks(categorized)
-    metrics = compute_metrics(categorized)
-    # narrative = generate_year_in_review(categorized)
-    result = generate_conversation_points(categorized)
-
-    persona_id = result['persona_id']
-    conversationPoints = result['conversationPoints']
-    persona_scores = result['persona_scores']
-    persona = personas[persona_id]['name']
-
-    merged = {**metrics, "financialPersonality" : persona, "conversationPoints": conversationPoints, "persona_id": persona_id, "persona_scores": persona_scores}
-
-    return merged
-
-def fetch_transactions_from_csv(
+    """
+    categories, topMerchants, spendingBreakdown and weekdaySpending.
+    Lists, tuples and TransactionColumns go through the vectorized analytics
+    module; any other iterable (e.g. a generator over CSV rows or API
+    pages) is consumed in a single streaming pass.
+    """
+    if isinstance(txns, (list, tuple, TransactionColumns)):
+        return analytics.compute_metrics(as_columns(txns))
+    return MetricsAccumulator().update(txns).result()
+
+def top_categories(txns, top: int = 5) -> list:
+    return [{"category": c, "count": n} for c, n in Counter(t['category'] for t in txns).most_common(top)]
+
+# Pipeline orchestration: every summary field is a node that only runs when
+# a requested field needs it (see summary_pipeline.py). The LLM nodes depend
+# only on the categorized transactions and the prompt/model, so they are
+# cached under the transactions' fingerprint; new or re-categorized
+# transactions change the key and miss.
+summary_pipeline = SummaryPipeline('memories')
+summary_pipeline.node('columns', as_columns, deps=('transactions',))
+summary_pipeline.node('metrics', compute_metrics, deps=('columns',))
+summary_pipeline.node('peaks', detect_peaks, deps=('columns',))
+summary_pipeline.node('top_categories', top_categories, deps=('transactions',))
+summary_pipeline.node('narrative', generate_year_in_review, deps=('transactions',), cached=True)
+if PERSONA_SCORING == 'llm':
+    summary_pipeline.node('conversation', generate_conversation_points, deps=('transactions',), cached=True)
+    summary_pipeline.node('persona_scores', lambda conversation: conversation, deps=('conversation',))
+else:
+    summary_pipeline.node('persona_scores', persona_scoring.score, deps=('columns',))
+    summary_pipeline.node('conversation', generate_persona_conversation_points,
+                          deps=('metrics', 'persona_scores'), cached=True)
+summary_pipeline.node('persona', lambda scored: personas[scored['persona_id']]['name'], deps=('persona_scores',))
+
+for name in ('categories', 'topMerchants', 'spendingBreakdown', 'weekdaySpending'):
+    summary_pipeline.field(name, 'metrics', key=name)
+summary_pipeline.field('financialPersonality', 'persona')
+summary_pipeline.field('conversationPoints', 'conversation', key='conversationPoints')
+for name in ('persona_id', 'persona_scores'):
+    summary_pipeline.field(name, 'persona_scores', key=name)
+# Only returned when asked for with ?fields=
+summary_pipeline.field('peaks', 'peaks', default=False)
+summary_pipeline.field('topCategories', 'top_categories', default=False)
+summary_pipeline.field('narrative', 'narrative', default=False)
+
+# Summary cache keys of the shared, read-only CSV tuples, so a warm request
+# doesn't re-hash every row; the tuple is kept alongside its key so its id
+# can't be reused by a different object while cached
+_summary_keys = LRUCache(max_entries=64)
+
+def summary_cache_key(txns) -> str:
+    if not isinstance(txns, tuple):
+        return fingerprint(txns, SUMMARY_CACHE_VERSION)
+    entry = _summary_keys.get(id(txns))
+    if entry is None or entry[0] is not txns:
+        entry = (txns, fingerprint(txns, SUMMARY_CACHE_VERSION))
+        _summary_keys.set(id(txns), entry)
+    return entry[1]
+
+def run_memories_pipeline(user_id: str = None, fields: Sequence[str] = None):
+    """Summary `fields` for the user (None = every default field); only the stages those fields need run."""
+    with telemetry.span('memories.fetch'):
+        categorized = fetch_transactions(user_id)
+
+    def cache_key():
+        with telemetry.span('memories.fingerprint'):
+            return summary_cache_key(categorized)
+
+    evaluation = summary_pipeline.evaluate(fields, {'transactions': categorized},
+                                           cache=summary_cache, cache_key=cache_key)
+    if evaluation.computed:
+        print(f"Summary stages run: {evaluation.computed}, cached: {evaluation.cache_hits}, "
+              f"summary cache: {summary_cache.stats()}")
+    return evaluation.result
+
+def iter_transactions_from_csv(
     file_path: str,
     header_mapping: Dict[str, str]
-) -> List[Dict]:
+) -> Iterator[Dict]:
     """
-    Read transactions from a CSV file and map its columns
-    into your standard keys. All mapped fields are required.
-
-    Args:
-        file_path: path to the CSV file.
-        header_mapping: dict mapping your internal key names
-            to CSV column headers. Must include:
-            'date', 'merchant', 'amount', 'description',
-            'category', 'account_name'.
-
-    Returns:
-        List of dicts with keys: date, merchant, amount,
-        description, category, account_name.
+    Lazily read transactions from a CSV file and map its columns
+    into your standard keys, one row at a time. All mapped fields
+    are required. See fetch_transactions_from_csv for the arguments.
     """
     required_keys = [
         'date', 'merchant', 'amount',
@@ -491,7 +441,6 @@ def fetch_transactions_from_csv(
     if missing:
         raise KeyError(f"Header mapping missing required keys: {missing}")
 
-    txns = []
     with open(file_path, newline='', encoding='utf-8') as f:
         reader = csv.DictReader(f)
         for i, row in enumerate(reader, start=1):
@@ -516,27 +465,96 @@ def fetch_transactions_from_csv(
             except ValueError as ve:
                 raise ValueError(f"Invalid data on row {i}: {ve}")
 
-            txns.append({
+            yield {
                 'date':         date_str,
                 'merchant':     merchant,
                 'amount':       amount,
                 'description':  description,
                 'category':     category,
                 'account_name': account_name
-            })
+            }
 
-    return txns
+def fetch_transactions_from_csv(
+    file_path: str,
+    header_mapping: Dict[str, str]
+) -> Sequence[Dict]:
+    """
+    Read transactions from a CSV file and map its columns
+    into your standard keys. All mapped fields are required.
+    Parsed rows are cached until the file's mtime or size changes
+    and are shared between requests, so treat them as read-only.
+
+    Args:
+        file_path: path to the CSV file.
+        header_mapping: dict mapping your internal key names
+            to CSV column headers. Must include:
+            'date', 'merchant', 'amount', 'description',
+            'category', 'account_name'.
+
+    Returns:
+        Tuple of dicts with keys: date, merchant, amount,
+        description, category, account_name.
+    """
+    return transaction_files.load(
+        file_path,
+        lambda path: iter_transactions_from_csv(path, header_mapping),
+        variant=tuple(sorted(header_mapping.items()))
+    )
+
+if not USE_API_FOR_DATA and os.getenv('PRELOAD_TRANSACTIONS', 'true').lower() == 'true':
+    transaction_files.preload(
+        (CSV_BASE_FILE_PATH + p['character'] + ".csv" for p in personas.values()),
+        lambda path: iter_transactions_from_csv(path, CSV_HEADER_MAPPING),
+        variant=tuple(sorted(CSV_HEADER_MAPPING.items()))
+    )
+
+# Build the clients (and open the bunq session) in the background while the
+# worker starts serving; a request only waits if it needs one that isn't ready
+if os.getenv('WARM_UP_SERVICES', 'true').lower() == 'true':
+    services.warm_up('openai', 'classifier', *(['bunq'] if USE_API_FOR_DATA else []))
+
+telemetry.register_stats('summary_cache', summary_cache.stats)
+telemetry.register_stats('merchant_cache', merchant_cache.stats)
+telemetry.register_stats('csv_files', transaction_files.stats)
+telemetry.register_stats('llm', llm_gateway.stats)
 
 # API Endpoints
 @app.route('/memories/summary/<string:user_id>', methods=['GET'])
 def get_memories_summary(user_id):
+    """?fields=categories,peaks,... returns only those fields (and runs only what they need)"""
+    fields = request.args.get('fields')
+    if fields is not None:
+        fields = [f.strip() for f in fields.split(',') if f.strip()]
+        unknown = summary_pipeline.unknown_fields(fields)
+        if unknown or not fields:
+            return jsonify({'error': f"Unknown fields: {', '.join(unknown)}" if unknown else 'No fields requested',
+                            'fields': list(summary_pipeline.fields)}), 400
     try:
-        data = run_memories_pipeline(user_id=user_id)
+        data = run_memories_pipeline(user_id=user_id, fields=fields)
         print(data)
         return jsonify(data)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/memories/cache/stats', methods=['GET'])
+def get_cache_stats():
+    return jsonify({
+        'summary': summary_cache.stats(),
+        'merchant_categories': merchant_cache.stats(),
+        'csv_files': transaction_files.stats()
+    })
+
+@app.route('/memories/llm/stats', methods=['GET'])
+def get_llm_stats():
+    return jsonify(llm_gateway.stats())
+
+@app.route('/memories/services/stats', methods=['GET'])
+def get_services_stats():
+    stats = services.stats()
+    if services.built('bunq'):
+        stats['bunq']['session'] = services.get('bunq').stats()
+    return jsonify(stats)
+
 @app.route('/memories/transactions/<string:user_id>', methods=['GET'])
 def get_memories_transactions_for_user(user_id):
     try:
@@ -0,0 +1,203 @@
+"""
+Lazily built, shared clients for the bunq Memories API.
+
+Importing run_full_server used to restore (or create) the bunq API context,
+load it into BunqContext and build the OpenAI client before Flask could
+serve anything, so every worker booted behind a bunq handshake and the
+module could not be imported without network and credentials. Services
+are now registered with a factory and built on first use:
+
+  • ServiceContainer – name -> factory registry; get() builds each service
+                       once, thread-safely, and shares it afterwards.
+                       warm_up() builds services on a background thread so
+                       the first request doesn't wait for them either
+  • BunqSession      – the bunq API context: restored from (or created and
+                       saved to) the context file when first opened, then
+                       kept alive by a daemon thread that renews the
+                       session shortly before it expires and saves it back
+
+Nothing here imports the bunq SDK or the openai package until a service
+is actually built.
+"""
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+
+# Configuration defaults
+default_limits = {
+    'session_refresh_margin_seconds': 300,   # renew when the session has less left than this
+    'session_check_interval_seconds': 60,
+}
+
+
+class ServiceContainer:
+    """
+    Usage:
+        services = ServiceContainer()
+        services.register('openai', lambda: llm_gateway.get_client(...))
+        services.get('openai')                  # built here, shared afterwards
+        services.warm_up('openai', 'bunq')      # or build them in the background
+
+    A factory that raises leaves the service unbuilt; the next get() tries
+    again. Factories may get() other services.
+    """
+
+    def __init__(self):
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._services: Dict[str, Any] = {}
+        self.build_seconds: Dict[str, float] = {}
+        self.errors: Dict[str, str] = {}
+
+    def register(self, name: str, factory: Callable[[], Any]) -> None:
+        self._factories[name] = factory
+        self._locks[name] = threading.Lock()
+
+    def get(self, name: str) -> Any:
+        service = self._services.get(name)
+        if service is not None:
+            return service
+        if name not in self._factories:
+            raise KeyError(f"No service registered as {name!r}")
+        with self._locks[name]:   # one build per service; others aren't blocked
+            service = self._services.get(name)
+            if service is None:
+                start = time.perf_counter()
+                try:
+                    service = self._factories[name]()
+                except Exception as e:
+                    self.errors[name] = str(e)
+                    raise
+                self.build_seconds[name] = time.perf_counter() - start
+                self.errors.pop(name, None)
+                self._services[name] = service
+            return service
+
+    def built(self, name: str) -> bool:
+        return name in self._services
+
+    def warm_up(self, *names: str) -> threading.Thread:
+        """Build `names` in order on a daemon thread; failures are logged and retried on first use."""
+        def build():
+            for name in names:
+                try:
+                    self.get(name)
+                except Exception as e:
+                    print(f"Could not warm up {name}: {e}")
+
+        thread = threading.Thread(target=build, name='service-warm-up', daemon=True)
+        thread.start()
+        return thread
+
+    def stats(self) -> Dict:
+        return {
+            name: {'built': name in self._services,
+                   'build_ms': round(self.build_seconds[name] * 1000, 1) if name in self.build_seconds else None,
+                   'error': self.errors.get(name)}
+            for name in self._factories
+        }
+
+
+class BunqSession:
+    """
+    Usage:
+        session = BunqSession('SANDBOX', api_key, 'bunq_api_context.conf')
+        session.open()      # restore or create, load into BunqContext, start refreshing
+        PaymentApiObject.list(...)
+
+    base_url replaces the environment's API URL, e.g. with a local stand-in
+    (bench/replay_server.py). A renewal opens the new session on a copy of
+    the API context and swaps it into BunqContext afterwards, so requests
+    in flight keep a valid token throughout.
+    """
+
+    def __init__(self, environment: str, api_key: Optional[str], context_file: str,
+                 description: str = 'bunq-test1', base_url: Optional[str] = None,
+                 refresh_margin_seconds: float = default_limits['session_refresh_margin_seconds'],
+                 check_interval_seconds: float = default_limits['session_check_interval_seconds']):
+        self.environment = environment
+        self.api_key = api_key
+        self.context_file = context_file
+        self.description = description
+        self.base_url = base_url
+        self.refresh_margin = timedelta(seconds=refresh_margin_seconds)
+        self.check_interval_seconds = check_interval_seconds
+        self.api_context = None
+        self.refreshes = 0
+        self.last_error: Optional[str] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._refresher: Optional[threading.Thread] = None
+
+    def open(self) -> 'BunqSession':
+        """Load the API context into BunqContext (once) and start the refresher."""
+        with self._lock:
+            if self.api_context is not None:
+                return self
+            if not self.api_key:
+                raise RuntimeError("Please set the BUNQ_API_KEY environment variable")
+            from bunq import ApiEnvironmentType
+            from bunq.sdk.context.api_context import ApiContext
+            from bunq.sdk.context.bunq_context import BunqContext
+
+            if self.base_url:
+                # the SDK takes its base URL from the environment type, not the context
+                ApiEnvironmentType[self.environment]._uri_base = self.base_url.rstrip('/') + '/'
+            if not os.path.exists(self.context_file):
+                api_context = ApiContext.create(ApiEnvironmentType[self.environment], self.api_key, self.description)
+                api_context.save(self.context_file)
+            else:
+                api_context = ApiContext.restore(self.context_file)
+                if api_context.ensure_session_active():   # saved session had expired
+                    api_context.save(self.context_file)
+            BunqContext.load_api_context(api_context)
+            self.api_context = api_context
+
+            self._refresher = threading.Thread(target=self._refresh_loop, name='bunq-session', daemon=True)
+            self._refresher.start()
+            return self
+
+    def expires_in(self) -> Optional[timedelta]:
+        session = self.api_context.session_context if self.api_context else None
+        return session.expiry_time - datetime.now() if session else None
+
+    def refresh(self, force: bool = False) -> bool:
+        """Renew the session if it expires within the refresh margin; True if it was renewed."""
+        remaining = self.expires_in()
+        if not force and remaining is not None and remaining > self.refresh_margin:
+            return False
+        from bunq.sdk.context.api_context import ApiContext
+        from bunq.sdk.context.bunq_context import BunqContext
+
+        with self._lock:
+            renewed = ApiContext.from_json(self.api_context.to_json())
+            renewed.reset_session()
+            renewed.save(self.context_file)
+            BunqContext.update_api_context(renewed)
+            self.api_context = renewed
+            self.refreshes += 1
+        print(f"bunq session renewed, valid until {renewed.session_context.expiry_time:%Y-%m-%d %H:%M:%S}")
+        return True
+
+    def _refresh_loop(self) -> None:
+        while not self._stop.wait(self.check_interval_seconds):
+            try:
+                self.refresh()
+                self.last_error = None
+            except Exception as e:   # keep the old session; try again next round
+                self.last_error = str(e)
+                print(f"bunq session refresh failed: {e}")
+
+    def close(self) -> None:
+        self._stop.set()
+
+    def stats(self) -> Dict:
+        remaining = self.expires_in()
+        return {
+            'open': self.api_context is not None,
+            'expires_in_seconds': int(remaining.total_seconds()) if remaining is not None else None,
+            'refreshes': self.refreshes,
+            'last_error': self.last_error,
+        }
@@ -20,8 +20,11 @@ from bunq.sdk.model.generated.endpoint import CardDebitApiObject
 from bunq.sdk.model.generated.object_ import CardPinAssignmentObject
 from bunq.sdk.context.bunq_context import BunqContext
 
-# OpenAI NVIDIA integration
-from openai import OpenAI
+# OpenAI NVIDIA integration, through the shared LLM gateway
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from llm_gateway import get_client
+from services import BunqSession
 import json
 
 # Configuration defaults
@@ -40,6 +43,8 @@ OPENAI_API_KEY = os.getenv('NVIDIA_RIVA_TOKEN')  # reused for NVIDIA integration
 OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL')
 CONTEXT_FILE = os.getenv('BUNQ_CONTEXT_FILE', 'bunq_api_context.conf')
 
+openai_client = None  # set by connect()
+
 # Debug prints
 def debug_env():
     print(f"BUNQ_ENV: {BUNQ_ENV}")
@@ -48,42 +53,8 @@ def debug_env():
     print(f"OPENAI_BASE_URL: {OPENAI_BASE_URL}")
     print(f"CONTEXT_FILE: {CONTEXT_FILE}")
 
-debug_env()
 counterparty_alias=PointerObject("EMAIL", "sugardaddy@bunq.com")
 
-if not BUNQ_API_KEY or not OPENAI_API_KEY:
-    raise RuntimeError("Please set BUNQ_API_KEY and NVIDIA_RIVA_TOKEN environment variables")
-
-# Initialize OpenAI client pointing to NVIDIA endpoint
-openai_client = OpenAI(
-    base_url=OPENAI_BASE_URL,
-    api_key=OPENAI_API_KEY
-)
-
-# Initialize bunq context
-if not os.path.exists(CONTEXT_FILE):
-    api_context = ApiContext.create(
-        ApiEnvironmentType[BUNQ_ENV],
-        BUNQ_API_KEY,
-        'bunq-test1'
-    )
-    print(f"Created new API context: {api_context}")
-    api_context.save(CONTEXT_FILE)
-else:
-    print(f"Loading existing API context from {CONTEXT_FILE}")
-    api_context = ApiContext.restore(CONTEXT_FILE)
-BunqContext.load_api_context(api_context)
-
-
-# Access the user context
-user_context = BunqContext.user_context()
-
-# Get the user ID
-user_id = user_context.user_id
-
-# Get the primary monetary account
-primary_account = user_context.primary_monetary_account
-
 geolocation_data  = {
     "latitude": 52.379189,
     "longitude": 4.899431,
@@ -93,6 +64,22 @@ geolocation_data  = {
 json_str = json.dumps(geolocation_data)
 geolocation = GeolocationObject.from_json(json_str)
 
+def connect() -> BunqSession:
+    """
+    Build the OpenAI client and load the bunq API context (created and saved
+    to CONTEXT_FILE on the first run). Network work happens here, not at import.
+    """
+    global openai_client
+    if not BUNQ_API_KEY or not OPENAI_API_KEY:
+        raise RuntimeError("Please set BUNQ_API_KEY and NVIDIA_RIVA_TOKEN environment variables")
+
+    # OpenAI client pointing to NVIDIA endpoint, on the shared connection pool
+    openai_client = get_client(base_url=OPENAI_BASE_URL, api_key=OPENAI_API_KEY)
+
+    # Initialize bunq context
+    print(f"{'Loading existing' if os.path.exists(CONTEXT_FILE) else 'Creating new'} API context: {CONTEXT_FILE}")
+    return BunqSession(BUNQ_ENV, BUNQ_API_KEY, CONTEXT_FILE).open()
+
 # # Create a payment request
 # request_id = RequestInquiryApiObject.create(
 #     AmountObject("8.00", "EUR"),
@@ -104,8 +91,6 @@ geolocation = GeolocationObject.from_json(json_str)
 
 # print(f"Payment request created with ID: {request_id}")
 
-accounts = MonetaryAccountBankApiObject.list()
-
 
 # Configuration defaults
 default_limits = {
@@ -135,12 +120,22 @@ def fetch_transactions(months: int = default_limits['history_months']) -> list:
 
     return all_payments
 
-payments = fetch_transactions(months=default_limits['history_months'])
+def main():
+    debug_env()
+    connect()
+
+    # Access the user context
+    user_context = BunqContext.user_context()
+    print(f"User ID: {user_context.user_id}, primary account: {user_context.primary_monetary_account.id_}")
+
+    payments = fetch_transactions(months=default_limits['history_months'])
 
-# Display payments
-for payment in payments:
-    print(f"ID: {payment.id_}")
-    print(f"Amount: {payment.amount.value} {payment.amount.currency}")
-    print(f"Description: {payment.description}")
-    print("---")
+    # Display payments
+    for payment in payments:
+        print(f"ID: {payment.id_}")
+        print(f"Amount: {payment.amount.value} {payment.amount.currency}")
+        print(f"Description: {payment.description}")
+        print("---")
 
+if __name__ == '__main__':
+    main()
@@ -16,8 +16,10 @@ from bunq.sdk.model.generated.endpoint import RequestInquiryApiObject
 from bunq.sdk.model.generated.endpoint import RequestResponseApiObject
 from bunq.sdk.model.generated.object_ import AmountObject
 
-# OpenAI NVIDIA integration
-from openai import OpenAI
+# OpenAI NVIDIA integration, through the shared LLM gateway
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from llm_gateway import get_client
 
 # Configuration defaults
 default_limits = {
@@ -32,18 +34,22 @@ OPENAI_API_KEY = os.getenv('NVIDIA_RIVA_TOKEN')  # reused for NVIDIA integration
 OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL')
 CONTEXT_FILE = os.getenv('BUNQ_CONTEXT_FILE', 'bunq_api_context.conf')
 
-# Initialize OpenAI client pointing to NVIDIA endpoint
-openai_client = OpenAI(
-    base_url=OPENAI_BASE_URL,
-    api_key=OPENAI_API_KEY
-)
+# OpenAI client pointing to NVIDIA endpoint, on the shared connection pool
+openai_client = get_client(base_url=OPENAI_BASE_URL, api_key=OPENAI_API_KEY)
 
 import json
 
+from llm_concurrency import bounded_map, call_with_retry, get_rate_limiter
+
+MAX_IN_FLIGHT = int(os.getenv('CLASSIFY_MAX_IN_FLIGHT', 8))
+rate_limiter = get_rate_limiter(str(openai_client.base_url))
+
 def classify_transactions(txns: list) -> list:
-    for t in txns:
+    def classify_one(t):
         merchant_name = t['merchant']
-        resp = openai_client.chat.completions.create(
+        resp = call_with_retry(
+            openai_client.with_options(max_retries=0).chat.completions.create,
+            rate_limiter=rate_limiter,
             model="nvidia/llama-3.1-nemotron-70b-instruct",
             messages=[
                 {
@@ -83,6 +89,8 @@ def classify_transactions(txns: list) -> list:
         t['category'] = result['category']
         t['reasoning'] = result['reasoning']
 
+    # Requests run concurrently; bounded_map keeps txns in input order
+    bounded_map(classify_one, txns, max_workers=MAX_IN_FLIGHT)
     return txns
 
 
@@ -0,0 +1,115 @@
+"""
+Single-pass accumulator behind compute_metrics.
+
+MetricsAccumulator consumes transactions one at a time from any iterable
+(a list, a generator over a CSV reader, a stream of API pages) and keeps
+only per-category and per-merchant running totals, so memory grows with
+the number of distinct categories and merchants rather than with the
+number of transactions.
+"""
+import heapq
+import os
+import sys
+from datetime import date
+from functools import lru_cache
+from typing import Dict, Iterable
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Shared with the vectorized path so both produce the same metrics
+from analytics import EXPERIENCE_CATEGORIES, WEEKDAY_NAMES
+
+
+@lru_cache(maxsize=4096)
+def _weekday(day: str) -> int:
+    # day is the YYYY-MM-DD prefix of a date or timestamp string
+    return date(int(day[0:4]), int(day[5:7]), int(day[8:10])).weekday()
+
+
+class MetricsAccumulator:
+    """
+    Streaming equivalent of the old multi-pass compute_metrics.
+
+    Usage:
+        acc = MetricsAccumulator()
+        for page in pages:
+            acc.update(page)
+        metrics = acc.result()
+    """
+
+    def __init__(self):
+        self.total_count = 0
+        self.total_spend = 0.0
+        self.experience_spend = 0.0
+        # category -> [count, sum of absolute amounts]
+        self.category_totals: Dict[str, list] = {}
+        # merchant -> [visits, last seen category]; dict order = first seen
+        self.merchant_visits: Dict[str, list] = {}
+        self.weekday_spend = [0] * 7
+
+    def add(self, t: Dict) -> None:
+        amount = t['amount']
+        spend = abs(amount)
+        category = t['category']
+
+        self.total_count += 1
+        self.total_spend += spend
+        if category in EXPERIENCE_CATEGORIES:
+            self.experience_spend += spend
+
+        totals = self.category_totals.get(category)
+        if totals is None:
+            self.category_totals[category] = [1, spend]
+        else:
+            totals[0] += 1
+            totals[1] += spend
+
+        merchant = self.merchant_visits.get(t['merchant'])
+        if merchant is None:
+            self.merchant_visits[t['merchant']] = [1, category]
+        else:
+            merchant[0] += 1
+            merchant[1] = category
+
+        if amount < 0:  # only count spending
+            self.weekday_spend[_weekday(t['date'][:10])] += spend
+
+    def update(self, txns: Iterable[Dict]) -> 'MetricsAccumulator':
+        add = self.add
+        for t in txns:
+            add(t)
+        return self
+
+    def result(self) -> Dict:
+        # 1) categories: count, % of txns, average amount
+        categories = {}
+        for cat, (count, amount_sum) in self.category_totals.items():
+            categories[cat] = {
+                'percentage':    round(count / self.total_count * 100),
+                'count':         count,
+                'averageInArea': round(amount_sum / count)
+            }
+
+        # 2) topMerchants: top 3 by visit count (ties keep first-seen order), include category
+        top = heapq.nlargest(3, self.merchant_visits.items(), key=lambda kv: kv[1][0])
+        topMerchants = [
+            {'name': name, 'category': category, 'visits': visits}
+            for name, (visits, category) in top
+        ]
+
+        # 3) spendingBreakdown: % split between "experiences" vs "essentials"
+        if self.total_spend:
+            experiences = round(self.experience_spend / self.total_spend * 100)
+            essentials = round((self.total_spend - self.experience_spend) / self.total_spend * 100)
+        else:
+            experiences = essentials = 0
+        spendingBreakdown = {'experiences': experiences, 'essentials': essentials}
+
+        # 4) weekdaySpending: total spend by weekday name
+        weekdaySpending = dict(zip(WEEKDAY_NAMES, self.weekday_spend))
+
+        return {
+            'categories':        categories,
+            'topMerchants':      topMerchants,
+            'spendingBreakdown': spendingBreakdown,
+            'weekdaySpending':   weekdaySpending
+        }
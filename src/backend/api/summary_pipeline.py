@@ -0,0 +1,125 @@
+"""
+Lazily evaluated summary fields for the bunq Memories API.
+
+run_memories_pipeline used to compute every stage for every request, two of
+them only to throw the result away, and a client that wanted the spending
+metrics still paid for the LLM call that picks a persona. The summary is
+now declared as a graph:
+
+  • nodes  – named stages with explicit dependencies (other nodes or
+             inputs such as the transactions); a node runs only when a
+             requested field needs it, at most once per request, and
+             cacheable nodes are looked up in (and stored to) a cache
+             keyed by the input fingerprint first
+  • fields – the keys of the response, each read from one node
+
+Usage:
+    pipeline = SummaryPipeline('memories')
+    pipeline.node('metrics', compute_metrics, deps=('transactions',), cached=True)
+    pipeline.field('categories', 'metrics', key='categories')
+    summary = pipeline.evaluate(['categories'], {'transactions': txns},
+                                cache=summary_cache, cache_key=lambda: fingerprint(txns)).result
+
+Every node evaluation is timed as the `<pipeline>.<node>` telemetry span.
+"""
+import os
+import sys
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import telemetry
+
+
+class Node:
+    def __init__(self, name: str, fn: Callable, deps: Sequence[str], cached: bool):
+        self.name = name
+        self.fn = fn
+        self.deps = tuple(deps)
+        self.cached = cached
+
+
+class SummaryPipeline:
+    """
+    Nodes are called with their dependencies' values as positional
+    arguments, in `deps` order. Cached node values go through the cache
+    as they are, so they must be JSON-serializable for a TieredCache with
+    a disk tier.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.nodes: Dict[str, Node] = {}
+        self.fields: Dict[str, tuple] = {}   # field -> (node, key or None)
+        self.default_fields: List[str] = []
+
+    def node(self, name: str, fn: Callable, deps: Sequence[str] = (), cached: bool = False) -> None:
+        self.nodes[name] = Node(name, fn, deps, cached)
+
+    def field(self, name: str, node: str, key: Optional[str] = None, default: bool = True) -> None:
+        """Expose node's value (or value[key]) as `name`; non-default fields are returned only on request."""
+        if node not in self.nodes:
+            raise KeyError(f"No node named {node!r}")
+        self.fields[name] = (node, key)
+        if default:
+            self.default_fields.append(name)
+
+    def unknown_fields(self, fields: Iterable[str]) -> List[str]:
+        return [f for f in fields if f not in self.fields]
+
+    def evaluate(self, fields: Optional[Sequence[str]], inputs: Dict[str, Any], cache=None,
+                 cache_key: Optional[Callable[[], str]] = None) -> 'Evaluation':
+        """
+        Compute `fields` (None = the default fields) from `inputs`; the
+        response is the returned evaluation's .result. cache_key is called
+        at most once, and only if a cached node is needed, so the inputs
+        aren't fingerprinted for requests that only need cheap nodes.
+        """
+        evaluation = Evaluation(self, inputs, cache, cache_key)
+        for name in (self.default_fields if fields is None else fields):
+            node, key = self.fields[name]
+            value = evaluation.get(node)
+            evaluation.result[name] = value if key is None else value[key]
+        return evaluation
+
+
+class Evaluation:
+    """One request's memoized node values; see SummaryPipeline.evaluate."""
+
+    def __init__(self, pipeline: SummaryPipeline, inputs: Dict[str, Any], cache=None,
+                 cache_key: Optional[Callable[[], str]] = None):
+        self.pipeline = pipeline
+        self.values = dict(inputs)
+        self.cache = cache if cache_key is not None else None
+        self._cache_key_fn = cache_key
+        self._cache_key: Optional[str] = None
+        self.result: Dict[str, Any] = {}
+        self.computed: List[str] = []
+        self.cache_hits: List[str] = []
+
+    def cache_key(self, node: str) -> str:
+        if self._cache_key is None:
+            self._cache_key = self._cache_key_fn()
+        return f"{self._cache_key}-{node}"
+
+    def get(self, name: str) -> Any:
+        if name in self.values:
+            return self.values[name]
+        node = self.pipeline.nodes.get(name)
+        if node is None:
+            raise KeyError(f"{name!r} is neither a node nor an input of the {self.pipeline.name} pipeline")
+
+        if node.cached and self.cache is not None:
+            value = self.cache.get(self.cache_key(name))
+            if value is not None:
+                self.cache_hits.append(name)
+                self.values[name] = value
+                return value
+
+        args = [self.get(dep) for dep in node.deps]
+        with telemetry.span(f"{self.pipeline.name}.{name}"):
+            value = node.fn(*args)
+        self.computed.append(name)
+        if node.cached and self.cache is not None:
+            self.cache.set(self.cache_key(name), value)
+        self.values[name] = value
+        return value
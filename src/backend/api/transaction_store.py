@@ -0,0 +1,166 @@
+"""
+Local per-user transaction store with incremental bunq sync.
+
+Each user gets one SQLite file holding their categorized transactions and,
+per monetary account, the id of the newest payment already stored (the
+high-water mark). A sync asks bunq only for payments newer than that mark,
+classifies just those, and appends them together with the new mark in a
+single SQLite transaction, so an interrupted sync never leaves a gap.
+Rows stored without a category (merchants the classifier gave up on) are
+sent to the classifier again on every later sync until they get one; until
+then load() reports them as UNCATEGORIZED.
+"""
+import os
+import sqlite3
+import threading
+from collections import defaultdict
+from contextlib import closing
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from bunq_ingest import default_limits as ingest_limits
+from bunq_ingest import history_start, stream_new_transactions
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS transactions (
+    payment_id   INTEGER PRIMARY KEY,
+    account_id   INTEGER NOT NULL,
+    date         TEXT    NOT NULL,
+    merchant     TEXT,
+    amount       REAL    NOT NULL,
+    description  TEXT,
+    account_name TEXT,
+    category     TEXT,
+    reasoning    TEXT
+);
+CREATE INDEX IF NOT EXISTS transactions_date ON transactions (date);
+CREATE TABLE IF NOT EXISTS sync_state (
+    account_id        INTEGER PRIMARY KEY,
+    newest_payment_id INTEGER NOT NULL,
+    synced_at         TEXT    NOT NULL
+);
+"""
+
+_COLUMNS = ('payment_id', 'date', 'merchant', 'amount', 'description',
+            'account_name', 'category', 'reasoning')
+
+# What load() returns as the category of rows stored without one
+UNCATEGORIZED = 'other'
+
+# One lock per store file so concurrent requests for a user don't sync twice
+_sync_locks: Dict[str, threading.Lock] = defaultdict(threading.Lock)
+
+
+class TransactionStore:
+    """SQLite-backed transaction table plus per-account high-water marks."""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def high_water_marks(self) -> Dict[int, int]:
+        with closing(self._connect()) as conn:
+            return dict(conn.execute("SELECT account_id, newest_payment_id FROM sync_state"))
+
+    def append(self, rows_by_account: Dict[int, List[Dict]]) -> int:
+        """
+        Insert rows (dicts as produced by bunq_ingest.preprocess, plus
+        category/reasoning) and advance each account's high-water mark,
+        atomically. Returns the number of rows inserted.
+        """
+        now = datetime.utcnow().isoformat()
+        inserted = 0
+        with closing(self._connect()) as conn, conn:
+            for account_id, rows in rows_by_account.items():
+                if not rows:
+                    continue
+                cur = conn.executemany(
+                    "INSERT OR REPLACE INTO transactions "
+                    "(payment_id, account_id, date, merchant, amount, description, account_name, category, reasoning) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(t['payment_id'], account_id, t['date'], t['merchant'], t['amount'],
+                      t['description'], t['account_name'], t.get('category'), t.get('reasoning'))
+                     for t in rows]
+                )
+                inserted += cur.rowcount
+                conn.execute(
+                    "INSERT INTO sync_state (account_id, newest_payment_id, synced_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT(account_id) DO UPDATE SET "
+                    "newest_payment_id = MAX(newest_payment_id, excluded.newest_payment_id), "
+                    "synced_at = excluded.synced_at",
+                    (account_id, max(t['payment_id'] for t in rows), now)
+                )
+        return inserted
+
+    def uncategorized(self) -> List[Dict]:
+        """Stored transactions that have no category yet."""
+        query = f"SELECT {', '.join(_COLUMNS)} FROM transactions WHERE category IS NULL"
+        with closing(self._connect()) as conn:
+            return [dict(zip(_COLUMNS, row)) for row in conn.execute(query)]
+
+    def set_categories(self, rows: List[Dict]) -> int:
+        """Store the category/reasoning of already stored rows that now have one. Returns the number updated."""
+        with closing(self._connect()) as conn, conn:
+            cur = conn.executemany(
+                "UPDATE transactions SET category = ?, reasoning = ? WHERE payment_id = ?",
+                [(t['category'], t.get('reasoning'), t['payment_id']) for t in rows if t.get('category')]
+            )
+            return cur.rowcount
+
+    def load(self, since: Optional[str] = None) -> List[Dict]:
+        """
+        All stored transactions (optionally only those dated >= since), newest
+        first. Rows without a category yet come back as UNCATEGORIZED, so the
+        analytics and the JSON responses never see a None category.
+        """
+        columns = ', '.join('COALESCE(category, ?)' if c == 'category' else c for c in _COLUMNS)
+        query = f"SELECT {columns} FROM transactions"
+        params = (UNCATEGORIZED,)
+        if since:
+            query += " WHERE date >= ?"
+            params += (since,)
+        query += " ORDER BY date DESC, payment_id DESC"
+        with closing(self._connect()) as conn:
+            return [dict(zip(_COLUMNS, row)) for row in conn.execute(query, params)]
+
+    def __len__(self) -> int:
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
+
+
+def sync_transactions(store: TransactionStore, classify: Callable[[list], list],
+                      months: int = ingest_limits['history_months'],
+                      page_size: int = ingest_limits['transactions_page_size'],
+                      max_workers: int = ingest_limits['account_fetch_workers']) -> List[Dict]:
+    """
+    Pull payments newer than the store's high-water marks from bunq,
+    classify only those (plus stored rows still missing a category),
+    append them, and return the user's transactions for the
+    `months`-month window from the store.
+    """
+    with _sync_locks[os.path.abspath(store.path)]:
+        new_rows = defaultdict(list)
+        for account_id, page in stream_new_transactions(
+                store.high_water_marks(), months, page_size, max_workers):
+            new_rows[account_id].extend(page)
+
+        fetched = sum(len(rows) for rows in new_rows.values())
+        retry = store.uncategorized()
+        recategorized = 0
+        if fetched or retry:
+            classify([t for rows in new_rows.values() for t in rows] + retry)
+            store.append(new_rows)
+            recategorized = store.set_categories(retry)
+        print(f"Synced {fetched} new transactions into {store.path}, "
+              f"categorized {recategorized} of {len(retry)} stored without a category")
+
+    return store.load(since=history_start(months))
@@ -3,15 +3,24 @@ from flask_cors import CORS
 import os
 import json
 import csv
-import pandas as pd
 from datetime import datetime
-from openai import OpenAI
+
+import analytics
+from analytics import as_columns
+from caching import LRUCache
+from chat_context import build_chat_context, build_stable_context, default_limits
+import llm_gateway
+from prompt_templates import PromptRegistry
+from sse import CompletionStream, sse_event, sse_response, wants_stream
+import telemetry
+from transaction_loader import TransactionFileCache
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
+telemetry.instrument_flask(app)  # request and per-stage timings at /metrics
 
-# Initialize OpenAI client
-client = OpenAI()
+# Shared, pooled OpenAI client (see llm_gateway.py)
+client = llm_gateway.get_client()
 
 # Character personalities
 PERSONAS = {
@@ -77,71 +86,136 @@ CHARACTER_FILES = {
     "Explorer Ellie": "Explorer_Ellie.csv"
 }
 
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+
+# Parsed CSVs are kept in memory and re-read only when a file changes
+transaction_files = TransactionFileCache()
+
+def parse_transactions_csv(file_path):
+    with open(file_path, 'r', encoding='utf-8') as csvfile:
+        reader = csv.DictReader(csvfile)
+        for row in reader:
+            yield {
+                'timestamp': row.get('Timestamp', ''),
+                'merchant': row.get('Merchant', ''),
+                'amount': float(row.get('Amount', 0)),
+                'description': row.get('Description', ''),
+                'location': row.get('Location', ''),
+                'category': row.get('Category', ''),
+                'account': row.get('Account', '')
+            }
+
 # Function to load transaction data for a character
 def load_transactions(character):
+    """Shared, read-only tuple of the character's transactions."""
     filename = CHARACTER_FILES.get(character)
     if not filename:
         return []
     
     try:
-        file_path = os.path.join(os.path.dirname(__file__), 'data', filename)
-        transactions = []
-        
-        with open(file_path, 'r', encoding='utf-8') as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                transactions.append({
-                    'timestamp': row.get('Timestamp', ''),
-                    'merchant': row.get('Merchant', ''),
-                    'amount': float(row.get('Amount', 0)),
-                    'description': row.get('Description', ''),
-                    'location': row.get('Location', ''),
-                    'category': row.get('Category', ''),
-                    'account': row.get('Account', '')
-                })
-        
-        return transactions
+        return transaction_files.load(os.path.join(DATA_DIR, filename), parse_transactions_csv)
     except Exception as e:
         print(f"Error loading transactions: {e}")
         return []
 
-# Function to analyze transactions for insights
+if os.getenv('PRELOAD_TRANSACTIONS', 'true').lower() == 'true':
+    transaction_files.preload(
+        (os.path.join(DATA_DIR, f) for f in CHARACTER_FILES.values()),
+        parse_transactions_csv
+    )
+
+# Function to analyze transactions for insights (row dicts, or TransactionColumns
+# such as a memory-mapped transaction_bundle.TransactionBundle)
 def analyze_transactions(transactions):
     if not transactions:
         return {}
     
-    # Convert to DataFrame for easier analysis
-    df = pd.DataFrame(transactions)
-    
-    # Basic stats
     try:
-        total_spent = float(df[df['amount'] < 0]['amount'].sum()) * -1
-        total_income = float(df[df['amount'] > 0]['amount'].sum())
-        
-        # Category breakdown
-        category_spend = df[df['amount'] < 0].groupby('category')['amount'].sum() * -1
-        category_percentage = (category_spend / total_spent * 100).to_dict()
-        
-        # Top merchants
-        merchant_spend = df[df['amount'] < 0].groupby('merchant')['amount'].sum() * -1
-        top_merchants = merchant_spend.sort_values(ascending=False).head(5).to_dict()
-        
-        # Monthly spending trend
-        df['month'] = pd.to_datetime(df['timestamp']).dt.strftime('%Y-%m')
-        monthly_spend = df[df['amount'] < 0].groupby('month')['amount'].sum() * -1
-        monthly_trend = monthly_spend.to_dict()
-        
-        return {
-            'total_spent': round(total_spent, 2),
-            'total_income': round(total_income, 2),
-            'category_percentage': {k: round(v, 2) for k, v in category_percentage.items()},
-            'top_merchants': {k: round(v, 2) for k, v in top_merchants.items()},
-            'monthly_trend': {k: round(v, 2) for k, v in monthly_trend.items()}
-        }
+        cols = as_columns(transactions, date_key='timestamp')
+        return analytics.analyze_transactions(cols)
     except Exception as e:
         print(f"Error analyzing transactions: {e}")
         return {}
 
+CHAT_CONTEXT_TOKENS = int(os.getenv('CHAT_CONTEXT_TOKENS', default_limits['chat_context_tokens']))
+CHAT_CONTEXT_STABLE_TOKENS = int(os.getenv('CHAT_CONTEXT_STABLE_TOKENS', default_limits['chat_context_stable_tokens']))
+CHAT_CONTEXT_RECENT_ROWS = int(os.getenv('CHAT_CONTEXT_RECENT_ROWS', default_limits['chat_context_recent_rows']))
+
+# Insights and the stable prompt context per loaded transaction tuple; the
+# tuple is kept alongside the result so its id can't be reused by a
+# different object while cached
+_insights_cache = LRUCache(max_entries=64)
+
+def transaction_context(transactions):
+    """(insights, chat_context.StableContext) for a loaded transaction tuple, computed once per tuple"""
+    entry = _insights_cache.get(id(transactions))
+    if entry is None or entry[0] is not transactions:
+        insights = analyze_transactions(transactions)
+        stable = build_stable_context(transactions, insights, min(CHAT_CONTEXT_STABLE_TOKENS, CHAT_CONTEXT_TOKENS),
+                                      CHAT_CONTEXT_RECENT_ROWS)
+        entry = (transactions, insights, stable)
+        _insights_cache.set(id(transactions), entry)
+    return entry[1], entry[2]
+
+CHAT_MODEL = "o3-mini"
+
+def render_chat_prompt(character, persona_type):
+    """Persona part of the /api/chat system prompt; nothing request-specific goes in here"""
+    persona = PERSONAS.get(persona_type, PERSONAS["Financial Adventurer"])
+    return f"""
+    You are {character}, a {persona_type} character who gives financial advice.
+    
+    Character traits: {persona['traits']}
+    Communication style: {persona['style']}
+    
+    Your responses should embody this character's personality and communication style.
+    Keep responses concise (under 150 words) and engaging.
+    
+    Add occasional character actions in *asterisks* for personality.
+    
+    When answering questions about transactions, refer to the user's actual data with specific amounts,
+    dates, merchants, and categories. Calculate figures if needed to answer queries accurately.
+    
+    You have access to the user's transaction history (summary plus the most recent transactions,
+    and in the next message the transactions most relevant to their question):
+    
+    """
+
+# Rendered once per persona at startup (see prompt_templates.py)
+chat_prompts = PromptRegistry(render_chat_prompt, [(p["character"], name) for name, p in PERSONAS.items()])
+
+def build_chat_messages(user_message, character, persona_type):
+    """
+    Messages for /api/chat, most stable first so the provider can reuse the
+    cached prefix: persona prompt plus the character's stable transaction
+    context, then the rows relevant to this message, then the user turn.
+    """
+    system_prompt = chat_prompts.get(character, persona_type)
+    request_context = ""
+    
+    # Load transactions and fit the most useful ones into the token budget
+    with telemetry.span('chat.load_transactions'):
+        transactions = load_transactions(character)
+    if transactions:
+        with telemetry.span('chat.context'):
+            insights, stable = transaction_context(transactions)
+            stable_context, request_context, context_info = build_chat_context(
+                transactions, user_message, insights,
+                max_tokens=CHAT_CONTEXT_TOKENS, stable=stable
+            )
+        system_prompt += stable_context
+        print(f"Chat context for {character}: {context_info}")
+    
+    messages = [{"role": "system", "content": system_prompt}]
+    if request_context:
+        messages.append({"role": "system", "content": request_context})
+    messages.append({"role": "user", "content": user_message})
+    return messages
+
+telemetry.register_stats('insights_cache', _insights_cache.stats)
+telemetry.register_stats('csv_files', transaction_files.stats)
+telemetry.register_stats('llm', llm_gateway.stats)
+
 @app.route('/api/chat', methods=['POST'])
 def chat():
     try:
@@ -150,57 +224,32 @@ def chat():
         character = data.get('character', 'Explorer Ellie')
         persona_type = data.get('persona', 'Financial Adventurer')
         
-        # Get persona details
-        persona = PERSONAS.get(persona_type, PERSONAS["Financial Adventurer"])
-        
-        # Load all transactions
-        transactions = load_transactions(character)
-        transaction_data = ""
+        messages = build_chat_messages(user_message, character, persona_type)
         
-        # Format ALL transactions for context
-        if transactions:
-            transaction_data = "FULL TRANSACTION HISTORY:\n"
-            for txn in transactions:
-                transaction_data += f"{txn['timestamp']} | {txn['merchant']} | €{txn['amount']:.2f} | {txn['category']} | {txn['description']} | {txn['location']}\n"
+        # Streaming: `delta` events as tokens arrive, then `done` with the full text
+        if wants_stream(request):
+            stream = CompletionStream(client.chat.completions.create, model=CHAT_MODEL, messages=messages,
+                                      on_usage=lambda usage: llm_gateway.record_usage(usage, 'chat'))
             
-            # Add insights at the end
-            insights = analyze_transactions(transactions)
-            if insights:
-                transaction_data += f"\nSUMMARY INSIGHTS:\n"
-                transaction_data += f"Total spent: €{insights['total_spent']:.2f}\n"
-                transaction_data += f"Total income: €{insights['total_income']:.2f}\n"
-                transaction_data += f"Category breakdown: {json.dumps(insights['category_percentage'])}\n"
-                transaction_data += f"Top merchants: {json.dumps(insights['top_merchants'])}\n"
-        
-        # Format context for the API
-        system_prompt = f"""
-        You are {character}, a {persona_type} character who gives financial advice.
-        
-        Character traits: {persona['traits']}
-        Communication style: {persona['style']}
-        
-        You have access to the user's complete transaction history:
-        
-        {transaction_data}
-        
-        When answering questions about transactions, refer to this actual data with specific amounts,
-        dates, merchants, and categories. Calculate figures if needed to answer queries accurately.
-        
-        Your responses should embody this character's personality and communication style.
-        Keep responses concise (under 150 words) and engaging.
-        
-        Add occasional character actions in *asterisks* for personality.
-        """
+            def events():
+                try:
+                    for delta in stream:
+                        yield sse_event("delta", {"character": character, "text": delta})
+                    print(f"Chat response for {character}: ttft {stream.ttft_ms}ms, total {stream.total_ms}ms")
+                    yield sse_event("done", {"character": character, "response": stream.text, **stream.timings()})
+                except Exception as e:
+                    print(f"Error streaming chat response: {e}")
+                    yield sse_event("error", {"character": character, "message": str(e)})
+            return sse_response(events())
         
         # Call OpenAI API
-        response = client.chat.completions.create(
-            model="o3-mini",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_message}
-            ]
-        )
+        with telemetry.span('chat.llm'):
+            response = client.chat.completions.create(
+                model=CHAT_MODEL,
+                messages=messages
+            )
         
+        llm_gateway.record_usage(response.usage, 'chat')
         bot_response = response.choices[0].message.content
         
         return jsonify({
@@ -214,6 +263,11 @@ def chat():
             "error": "Failed to process request",
             "message": str(e)
         }), 500
+
+@app.route('/api/llm/stats', methods=['GET'])
+def llm_stats():
+    return jsonify(llm_gateway.stats())
+
 if __name__ == '__main__':
     # Use PORT environment variable if available (for deployment)
     port = int(os.environ.get('PORT', 5000))
@@ -0,0 +1,299 @@
+"""
+Async (ASGI) serving mode for the LLM-bound endpoints.
+
+Serves the same routes, request bodies and responses as the Flask apps
+  • POST /api/chat             (app.py)
+  • POST /api/persona-response (battle.py)
+  • POST /api/battle-arena     (battle.py)
+but awaits an AsyncOpenAI client instead of blocking a worker thread on
+every completion, so one event loop multiplexes hundreds of in-flight
+chats and battles. Prompt building, personas and the debate structure are
+reused from app.py and battle.py; only the I/O is async. Streaming works
+the same way (?stream=1, {"stream": true} or Accept: text/event-stream).
+
+Run one app for both frontends' ports, e.g.:
+    uvicorn asgi_app:app --host 0.0.0.0 --port 5000 --workers 2
+    uvicorn asgi_app:app --host 0.0.0.0 --port 5002 --workers 2
+"""
+import asyncio
+import os
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+import app as chat_app
+import battle
+import llm_gateway
+from sse import AsyncCompletionStream, CachedStream, sse_event
+
+client = llm_gateway.get_async_client()
+
+SSE_HEADERS = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+
+
+def wants_stream(request, data) -> bool:
+    """sse.wants_stream for a Starlette request whose JSON body is already parsed."""
+    if request.query_params.get('stream', '').lower() in ('1', 'true'):
+        return True
+    if data.get('stream') is True:
+        return True
+    return 'text/event-stream' in request.headers.get('accept', '')
+
+
+def sse_response(events) -> StreamingResponse:
+    return StreamingResponse(events, media_type='text/event-stream', headers=SSE_HEADERS)
+
+
+def error_response(message: str, e: Exception) -> JSONResponse:
+    print(f"{message}: {e}")
+    return JSONResponse({"error": "Failed to process request", "message": str(e)}, status_code=500)
+
+
+# /api/chat
+
+async def chat(request):
+    try:
+        data = await request.json()
+        user_message = data.get('message', '')
+        character = data.get('character', 'Explorer Ellie')
+        persona_type = data.get('persona', 'Financial Adventurer')
+
+        messages = chat_app.build_chat_messages(user_message, character, persona_type)
+
+        if wants_stream(request, data):
+            stream = AsyncCompletionStream(client.chat.completions.create, model=chat_app.CHAT_MODEL, messages=messages,
+                                           on_usage=lambda usage: llm_gateway.record_usage(usage, 'chat'))
+
+            async def events():
+                try:
+                    async for delta in stream:
+                        yield sse_event("delta", {"character": character, "text": delta})
+                    print(f"Chat response for {character}: ttft {stream.ttft_ms}ms, total {stream.total_ms}ms")
+                    yield sse_event("done", {"character": character, "response": stream.text, **stream.timings()})
+                except Exception as e:
+                    print(f"Error streaming chat response: {e}")
+                    yield sse_event("error", {"character": character, "message": str(e)})
+            return sse_response(events())
+
+        response = await client.chat.completions.create(model=chat_app.CHAT_MODEL, messages=messages)
+        llm_gateway.record_usage(response.usage, 'chat')
+        return JSONResponse({
+            "response": response.choices[0].message.content,
+            "character": character
+        })
+    except Exception as e:
+        return error_response("Error processing chat request", e)
+
+
+# /api/persona-response and /api/battle-arena
+
+async def generate_persona_response(persona_type, persona_info, user_question, context="",
+                                    previous_responses=None, message_type="initial"):
+    cached = battle.cached_response(persona_type, user_question, context, message_type)
+    if cached is not None:
+        return cached
+    messages = battle.build_persona_messages(persona_type, persona_info, user_question, context, message_type)
+    response = await client.chat.completions.create(
+        messages=messages,
+        timeout=battle.PERSONA_TIMEOUT_SECONDS,
+        **battle.PERSONA_COMPLETION_PARAMS
+    )
+    battle.record_persona_usage(response.usage)
+    text = response.choices[0].message.content
+    if battle.response_cache is not None:
+        battle.response_cache.add(persona_type, message_type, user_question, context, text)
+    return text
+
+
+def stream_persona_response(persona_type, persona_info, user_question, context="",
+                            previous_responses=None, message_type="initial"):
+    cached = battle.cached_response(persona_type, user_question, context, message_type)
+    if cached is not None:
+        return CachedStream(cached)
+    messages = battle.build_persona_messages(persona_type, persona_info, user_question, context, message_type)
+    return AsyncCompletionStream(
+        client.chat.completions.create,
+        on_complete=battle.cache_response(persona_type, user_question, context, message_type),
+        on_usage=battle.record_persona_usage,
+        messages=messages,
+        timeout=battle.PERSONA_TIMEOUT_SECONDS,
+        **battle.PERSONA_COMPLETION_PARAMS
+    )
+
+
+async def run_round(jobs):
+    """battle.run_round on the event loop: all personas at once, each with its own timeout."""
+    limit = asyncio.Semaphore(battle.BATTLE_MAX_WORKERS)
+
+    async def generate(job):
+        persona_type, kwargs = job
+        async with limit:
+            return await asyncio.wait_for(
+                generate_persona_response(persona_type=persona_type, **kwargs),
+                timeout=battle.PERSONA_TIMEOUT_SECONDS
+            )
+
+    results = await asyncio.gather(*(generate(job) for job in jobs), return_exceptions=True)
+    return battle.collect_round(jobs, results)
+
+
+async def stream_round(jobs, round_number, outcome: list):
+    """
+    battle.stream_round on the event loop. Yields SSE frames as deltas
+    arrive; appends the round's (responses, errors) to `outcome` when done.
+    Like battle.stream_round it needs distinct personas (battle.select_personas).
+    """
+    events = asyncio.Queue()
+
+    async def worker(job):
+        persona_type, kwargs = job
+        tags = {"persona": persona_type, "character": kwargs["persona_info"]["character"], "round": round_number}
+        try:
+            stream = stream_persona_response(persona_type=persona_type, **kwargs)
+            async for delta in stream:
+                events.put_nowait(("delta", {**tags, "text": delta}))
+            print(f"Round {round_number} {persona_type}: ttft {stream.ttft_ms}ms, total {stream.total_ms}ms")
+            events.put_nowait(("done", {**tags, "text": stream.text, **stream.timings()}))
+        except Exception as e:
+            events.put_nowait(("error", {**tags, "message": str(e) or type(e).__name__}))
+
+    tasks = [asyncio.create_task(worker(job)) for job in jobs]
+    finished = {}
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + battle.PERSONA_TIMEOUT_SECONDS
+    try:
+        while len(finished) < len(jobs):
+            try:
+                kind, payload = await asyncio.wait_for(events.get(), max(0.0, deadline - loop.time()))
+            except asyncio.TimeoutError:
+                break
+            if kind != "delta":
+                finished[payload["persona"]] = (kind, payload)
+            yield sse_event(kind, payload)
+    finally:
+        # stop stragglers, including when the client disconnects mid-round
+        for task in tasks:
+            task.cancel()
+
+    responses, errors = [], []
+    for persona_type, kwargs in jobs:
+        kind, payload = finished.get(persona_type, ("error", None))
+        if kind == "done":
+            responses.append({"persona": persona_type, "character": payload["character"], "text": payload["text"]})
+            continue
+        if payload is None:
+            payload = {"persona": persona_type, "character": kwargs["persona_info"]["character"],
+                       "round": round_number,
+                       "message": f"no result within {battle.PERSONA_TIMEOUT_SECONDS:g}s"}
+            yield sse_event("error", payload)
+        errors.append({"persona": persona_type, "message": payload["message"]})
+    outcome.append((responses, errors))
+
+
+async def battle_arena(request):
+    try:
+        data = await request.json()
+        user_question = data.get('question', '')
+        selected_personas = data.get('personas', [])
+
+        if not user_question or not selected_personas or len(selected_personas) < 2:
+            return JSONResponse({
+                "error": "Invalid request. Please provide a question and at least 2 personas."
+            }, status_code=400)
+
+        selected_personas = battle.select_personas(selected_personas)
+
+        if wants_stream(request, data):
+            async def events():
+                rounds = []
+                async for frame in stream_round(battle.first_round_jobs(user_question, selected_personas), 1, rounds):
+                    yield frame
+                second_jobs = battle.second_round_jobs(user_question, selected_personas, rounds[0][0])
+                async for frame in stream_round(second_jobs, 2, rounds):
+                    yield frame
+                yield sse_event("end", battle.battle_result(user_question, selected_personas, rounds))
+            return sse_response(events())
+
+        first_round = await run_round(battle.first_round_jobs(user_question, selected_personas))
+        second_round = await run_round(battle.second_round_jobs(user_question, selected_personas, first_round[0]))
+
+        result = battle.battle_result(user_question, selected_personas, [first_round, second_round])
+        if not result["conversation"]:
+            raise RuntimeError("No persona produced a response")
+        return JSONResponse(result)
+    except Exception as e:
+        return error_response("Error processing battle request", e)
+
+
+async def persona_response(request):
+    try:
+        data = await request.json()
+        user_question = data.get('question', '')
+        personas = data.get('personas', [])
+        context = data.get('context', '')
+        message_type = data.get('messageType', 'initial')
+
+        if not user_question or not personas or len(personas) != 1:
+            return JSONResponse({
+                "error": "Invalid request. Please provide a question and exactly 1 persona."
+            }, status_code=400)
+
+        persona_type = personas[0]
+        persona_info = battle.PERSONAS.get(persona_type)
+        if not persona_info:
+            return JSONResponse({"error": f"Invalid persona type: {persona_type}"}, status_code=400)
+
+        kwargs = dict(persona_type=persona_type, persona_info=persona_info, user_question=user_question,
+                      context=context, message_type=message_type)
+
+        if wants_stream(request, data):
+            stream = stream_persona_response(**kwargs)
+            tags = {"persona": persona_type, "character": persona_info["character"]}
+
+            async def events():
+                try:
+                    async for delta in stream:
+                        yield sse_event("delta", {**tags, "text": delta})
+                    print(f"Persona {persona_type}: ttft {stream.ttft_ms}ms, total {stream.total_ms}ms")
+                    yield sse_event("done", {**tags, "response": stream.text, **stream.timings()})
+                except Exception as e:
+                    print(f"Error streaming persona response: {e}")
+                    yield sse_event("error", {**tags, "message": str(e)})
+            return sse_response(events())
+
+        response = await generate_persona_response(**kwargs)
+        return JSONResponse({
+            "persona": persona_type,
+            "character": persona_info["character"],
+            "response": response
+        })
+    except Exception as e:
+        return error_response("Error processing persona response request", e)
+
+
+async def llm_stats(request):
+    return JSONResponse(llm_gateway.stats())
+
+
+async def response_cache_stats(request):
+    return JSONResponse(battle.response_cache.stats() if battle.response_cache else {"enabled": False})
+
+
+app = Starlette(
+    routes=[
+        Route('/api/chat', chat, methods=['POST']),
+        Route('/api/battle-arena', battle_arena, methods=['POST']),
+        Route('/api/persona-response', persona_response, methods=['POST']),
+        Route('/api/llm/stats', llm_stats, methods=['GET']),
+        Route('/api/response-cache/stats', response_cache_stats, methods=['GET']),
+    ],
+    middleware=[Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*'])],
+)
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run('asgi_app:app', host='0.0.0.0', port=int(os.environ.get('PORT', 5000)),
+                workers=int(os.environ.get('WEB_CONCURRENCY', 1)))
@@ -1,14 +1,26 @@
 from flask import Flask, jsonify, request
 from flask_cors import CORS
 import os
-from openai import OpenAI
 import json
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import llm_gateway
+from llm_concurrency import gather_with_timeout
+from prompt_templates import PromptRegistry
+from response_cache import ResponseCache, load_embedder
+from response_cache import default_limits as response_cache_limits
+from sse import CachedStream, CompletionStream, sse_event, sse_response, wants_stream
+import telemetry
 
 app = Flask(__name__)
 CORS(app)
+telemetry.instrument_flask(app)  # request and per-stage timings at /metrics
 
-# Initialize OpenAI client
-client = OpenAI()
+# Shared, pooled OpenAI client (see llm_gateway.py)
+client = llm_gateway.get_client()
 
 # Character personalities
 PERSONAS = {
@@ -74,9 +86,195 @@ CHARACTER_FILES = {
     "Explorer Ellie": "Explorer_Ellie.csv"
 }
 
+# Configuration defaults
+default_limits = {
+    'battle_max_workers': 4,
+    'persona_timeout_seconds': 30
+}
+
+BATTLE_MAX_WORKERS = int(os.getenv('BATTLE_MAX_WORKERS', default_limits['battle_max_workers']))
+PERSONA_TIMEOUT_SECONDS = float(os.getenv('PERSONA_TIMEOUT_SECONDS', default_limits['persona_timeout_seconds']))
+
+# Opt-in cache of persona answers to repeated questions (see response_cache.py)
+RESPONSE_CACHE = os.getenv('RESPONSE_CACHE', 'false').lower() == 'true'
+RESPONSE_CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', response_cache_limits['response_cache_size']))
+RESPONSE_CACHE_TTL_HOURS = float(os.getenv('RESPONSE_CACHE_TTL_HOURS', response_cache_limits['response_cache_ttl_hours']))
+RESPONSE_CACHE_VARIANTS = int(os.getenv('RESPONSE_CACHE_VARIANTS', response_cache_limits['response_cache_variants']))
+RESPONSE_CACHE_SIMILARITY = float(os.getenv('RESPONSE_CACHE_SIMILARITY', response_cache_limits['response_cache_similarity']))
+RESPONSE_CACHE_EMBEDDING_MODEL = os.getenv('RESPONSE_CACHE_EMBEDDING_MODEL')  # e.g. all-MiniLM-L6-v2; unset = exact matches only
+
+response_cache = ResponseCache(
+    max_entries=RESPONSE_CACHE_SIZE,
+    ttl_seconds=RESPONSE_CACHE_TTL_HOURS * 3600,
+    variants=RESPONSE_CACHE_VARIANTS,
+    embed=load_embedder(RESPONSE_CACHE_EMBEDDING_MODEL) if RESPONSE_CACHE_EMBEDDING_MODEL else None,
+    similarity=RESPONSE_CACHE_SIMILARITY
+) if RESPONSE_CACHE else None
+
+if response_cache is not None:
+    telemetry.register_stats('response_cache', response_cache.stats)
+telemetry.register_stats('llm', llm_gateway.stats)
+
+def run_round(jobs):
+    """
+    Generate one debate round concurrently.
+
+    Args:
+        jobs: list of (persona_type, kwargs for generate_persona_response).
+
+    Returns:
+        (responses, errors) – responses in job order for the personas that
+        answered in time, errors as {"persona", "message"} for the rest.
+    """
+    def generate(job):
+        persona_type, kwargs = job
+        return generate_persona_response(persona_type=persona_type, timeout=PERSONA_TIMEOUT_SECONDS, **kwargs)
+
+    with telemetry.span('battle.round'):
+        results = gather_with_timeout(generate, jobs, timeout=PERSONA_TIMEOUT_SECONDS,
+                                      max_workers=BATTLE_MAX_WORKERS)
+    return collect_round(jobs, results)
+
+def collect_round(jobs, results):
+    """Split per-job results (text or exception) into run_round's (responses, errors)"""
+    responses, errors = [], []
+    for (persona_type, kwargs), result in zip(jobs, results):
+        if isinstance(result, Exception):
+            print(f"Persona {persona_type} failed: {result!r}")
+            errors.append({"persona": persona_type, "message": str(result) or type(result).__name__})
+            continue
+        responses.append({
+            "persona": persona_type,
+            "character": kwargs["persona_info"]["character"],
+            "text": result
+        })
+    return responses, errors
+
+def stream_round(jobs, round_number):
+    """
+    Streaming counterpart of run_round: every persona generates at once and
+    their deltas are yielded as SSE frames tagged with persona and round,
+    interleaved in arrival order. Use with `yield from`; it returns the
+    same (responses, errors) as run_round once the round is over. Results
+    are matched up by persona, so jobs must name distinct personas (see
+    select_personas).
+    """
+    events = queue.Queue()
+    cancel = threading.Event()
+
+    def worker(job):
+        persona_type, kwargs = job
+        tags = {"persona": persona_type, "character": kwargs["persona_info"]["character"], "round": round_number}
+        try:
+            stream = stream_persona_response(persona_type=persona_type, timeout=PERSONA_TIMEOUT_SECONDS,
+                                             cancel=cancel, **kwargs)
+            for delta in stream:
+                events.put(("delta", {**tags, "text": delta}))
+            print(f"Round {round_number} {persona_type}: ttft {stream.ttft_ms}ms, total {stream.total_ms}ms")
+            events.put(("done", {**tags, "text": stream.text, **stream.timings()}))
+        except Exception as e:
+            events.put(("error", {**tags, "message": str(e) or type(e).__name__}))
+
+    pool = ThreadPoolExecutor(max_workers=max(1, min(BATTLE_MAX_WORKERS, len(jobs))))
+    for job in jobs:
+        pool.submit(worker, job)
+    pool.shutdown(wait=False)
+
+    finished = {}
+    deadline = time.monotonic() + PERSONA_TIMEOUT_SECONDS
+    try:
+        while len(finished) < len(jobs):
+            try:
+                kind, payload = events.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if kind != "delta":
+                finished[payload["persona"]] = (kind, payload)
+            yield sse_event(kind, payload)
+    finally:
+        # stop stragglers, including when the client disconnects mid-round
+        cancel.set()
+
+    responses, errors = [], []
+    for persona_type, kwargs in jobs:
+        kind, payload = finished.get(persona_type, ("error", None))
+        if kind == "done":
+            responses.append({"persona": persona_type, "character": payload["character"], "text": payload["text"]})
+            continue
+        if payload is None:
+            payload = {"persona": persona_type, "character": kwargs["persona_info"]["character"],
+                       "round": round_number, "message": f"no result within {PERSONA_TIMEOUT_SECONDS:g}s"}
+            yield sse_event("error", payload)
+        errors.append({"persona": persona_type, "message": payload["message"]})
+    return responses, errors
+
+def select_personas(requested, limit=4):
+    """
+    The known personas in `requested`, each once, in request order, at most
+    `limit` of them. The rounds track results per persona, so a persona
+    listed twice would never count as finished.
+    """
+    return [p for p in dict.fromkeys(requested) if p in PERSONAS][:limit]
+
+def first_round_jobs(user_question, selected_personas):
+    return [
+        (persona_type, {
+            "persona_info": PERSONAS[persona_type],
+            "user_question": user_question,
+            "context": f"Initial response to the user's question: '{user_question}'",
+            "previous_responses": []
+        })
+        for persona_type in selected_personas
+    ]
+
+def second_round_jobs(user_question, selected_personas, first_round_responses):
+    jobs = []
+    for persona_type in selected_personas:
+        # Build context of what other personas said
+        others_said = []
+        for resp in first_round_responses:
+            if resp["persona"] != persona_type:
+                others_said.append(f"{resp['character']} ({resp['persona']}) said: {resp['text']}")
+        
+        others_context = "\n\n".join(others_said)
+        
+        jobs.append((persona_type, {
+            "persona_info": PERSONAS[persona_type],
+            "user_question": user_question,
+            "context": f"Follow-up response after hearing what the others said:\n{others_context}",
+            "previous_responses": first_round_responses
+        }))
+    return jobs
+
+def battle_result(user_question, selected_personas, rounds):
+    """
+    Assemble the response body from [(responses, errors), ...] per round:
+    each persona's turns in round order, plus any per-round errors.
+    """
+    by_persona = [{r["persona"]: r for r in responses} for responses, _ in rounds]
+    conversation = []
+    for persona_type in selected_personas:
+        for turns in by_persona:
+            if persona_type in turns:
+                conversation.append(turns[persona_type])
+    
+    result = {
+        "question": user_question,
+        "conversation": conversation
+    }
+    errors = [dict(e, round=i) for i, (_, round_errors) in enumerate(rounds, start=1) for e in round_errors]
+    if errors:
+        result["errors"] = errors
+    return result
+
 @app.route('/api/battle-arena', methods=['POST'])
 def battle_arena():
-    """Legacy endpoint that gets all responses at once - kept for compatibility"""
+    """
+    Legacy endpoint that gets all responses at once - kept for compatibility.
+    With streaming requested (see sse.wants_stream) it sends delta / done /
+    error events per persona and round as they arrive, then an `end` event
+    carrying the usual response body.
+    """
     try:
         data = request.json
         user_question = data.get('question', '')
@@ -87,70 +285,27 @@ def battle_arena():
                 "error": "Invalid request. Please provide a question and at least 2 personas."
             }), 400
         
-        # Limit to max 4 personas
-        if len(selected_personas) > 4:
-            selected_personas = selected_personas[:4]
+        # Known personas only, each once, max 4
+        selected_personas = select_personas(selected_personas)
         
-        # First round: Initial responses from each persona
-        first_round_responses = []
-        for persona_type in selected_personas:
-            persona_info = PERSONAS.get(persona_type)
-            if not persona_info:
-                continue
-            
-            response = generate_persona_response(
-                persona_type=persona_type,
-                persona_info=persona_info,
-                user_question=user_question,
-                context=f"Initial response to the user's question: '{user_question}'",
-                previous_responses=[]
-            )
-            
-            first_round_responses.append({
-                "persona": persona_type,
-                "character": persona_info["character"],
-                "text": response
-            })
+        if wants_stream(request):
+            def events():
+                first_round = yield from stream_round(first_round_jobs(user_question, selected_personas), 1)
+                second_round = yield from stream_round(
+                    second_round_jobs(user_question, selected_personas, first_round[0]), 2)
+                yield sse_event("end", battle_result(user_question, selected_personas, [first_round, second_round]))
+            return sse_response(events())
         
-        # Second round: Responses after hearing others
-        second_round_responses = []
-        for persona_type in selected_personas:
-            persona_info = PERSONAS.get(persona_type)
-            if not persona_info:
-                continue
-            
-            # Build context of what other personas said
-            others_said = []
-            for resp in first_round_responses:
-                if resp["persona"] != persona_type:
-                    others_said.append(f"{resp['character']} ({resp['persona']}) said: {resp['text']}")
-            
-            others_context = "\n\n".join(others_said)
-            
-            response = generate_persona_response(
-                persona_type=persona_type,
-                persona_info=persona_info,
-                user_question=user_question,
-                context=f"Follow-up response after hearing what the others said:\n{others_context}",
-                previous_responses=first_round_responses
-            )
-            
-            second_round_responses.append({
-                "persona": persona_type,
-                "character": persona_info["character"],
-                "text": response
-            })
+        # First round: Initial responses from each persona, all at once
+        first_round = run_round(first_round_jobs(user_question, selected_personas))
         
-        # Format conversation
-        conversation = []
-        for i in range(len(first_round_responses)):
-            conversation.append(first_round_responses[i])
-            conversation.append(second_round_responses[i])
+        # Second round: Responses after hearing others, all at once
+        second_round = run_round(second_round_jobs(user_question, selected_personas, first_round[0]))
         
-        return jsonify({
-            "question": user_question,
-            "conversation": conversation
-        })
+        result = battle_result(user_question, selected_personas, [first_round, second_round])
+        if not result["conversation"]:
+            raise RuntimeError("No persona produced a response")
+        return jsonify(result)
         
     except Exception as e:
         print(f"Error processing battle request: {e}")
@@ -161,7 +316,10 @@ def battle_arena():
 
 @app.route('/api/persona-response', methods=['POST'])
 def persona_response():
-    """New endpoint that supports the dynamic debate format - get one persona response at a time"""
+    """
+    New endpoint that supports the dynamic debate format - get one persona response at a time.
+    With streaming requested it sends `delta` events and a final `done` event instead.
+    """
     try:
         data = request.json
         user_question = data.get('question', '')
@@ -182,6 +340,27 @@ def persona_response():
                 "error": f"Invalid persona type: {persona_type}"
             }), 400
         
+        if wants_stream(request):
+            stream = stream_persona_response(
+                persona_type=persona_type,
+                persona_info=persona_info,
+                user_question=user_question,
+                context=context,
+                message_type=message_type
+            )
+            tags = {"persona": persona_type, "character": persona_info["character"]}
+            
+            def events():
+                try:
+                    for delta in stream:
+                        yield sse_event("delta", {**tags, "text": delta})
+                    print(f"Persona {persona_type}: ttft {stream.ttft_ms}ms, total {stream.total_ms}ms")
+                    yield sse_event("done", {**tags, "response": stream.text, **stream.timings()})
+                except Exception as e:
+                    print(f"Error streaming persona response: {e}")
+                    yield sse_event("error", {**tags, "message": str(e)})
+            return sse_response(events())
+        
         # Generate response for this persona
         response = generate_persona_response(
             persona_type=persona_type,
@@ -204,8 +383,16 @@ def persona_response():
             "message": str(e)
         }), 500
 
-def generate_persona_response(persona_type, persona_info, user_question, context="", previous_responses=None, message_type="initial"):
-    """Generate a response for a specific financial persona"""
+# Completion settings shared by the blocking and streaming calls
+PERSONA_COMPLETION_PARAMS = {
+    "model": "gpt-4.1-mini",  # Use appropriate model
+    "temperature": 0.7,  # Add some variability
+    "max_tokens": 250
+}
+
+def render_persona_prompt(persona_type, message_type, persona_info=None):
+    """System prompt for one persona and message type; nothing request-specific goes in here"""
+    persona_info = persona_info or PERSONAS[persona_type]
     character = persona_info["character"]
     
     # Adjust system prompt based on message type
@@ -237,21 +424,85 @@ def generate_persona_response(persona_type, persona_info, user_question, context
     else:
         system_prompt = base_prompt
     
+    return system_prompt
+
+# Rendered once per persona and message type at startup (see prompt_templates.py)
+persona_prompts = PromptRegistry(render_persona_prompt,
+                                 [(p, message_type) for p in PERSONAS for message_type in ("initial", "rebuttal")])
+
+def build_persona_messages(persona_type, persona_info, user_question, context="", message_type="initial"):
+    """Chat messages for one persona turn: the precompiled persona prompt, then the per-request question"""
+    if persona_info is PERSONAS.get(persona_type):
+        system_prompt = persona_prompts.get(persona_type, message_type)
+    else:
+        system_prompt = render_persona_prompt(persona_type, message_type, persona_info)
+    
     # Build messages array
-    messages = [
+    return [
         {"role": "system", "content": system_prompt},
         {"role": "user", "content": f"Financial Question: {user_question}\n\nContext: {context}"}
     ]
+
+def record_persona_usage(usage):
+    llm_gateway.record_usage(usage, 'persona')
+
+def cache_response(persona_type, user_question, context, message_type):
+    """Callback that stores a finished answer in the response cache (None when it is off)"""
+    if response_cache is None:
+        return None
+    return lambda text: response_cache.add(persona_type, message_type, user_question, context, text)
+
+def cached_response(persona_type, user_question, context, message_type):
+    if response_cache is None:
+        return None
+    return response_cache.get(persona_type, message_type, user_question, context)
+
+def generate_persona_response(persona_type, persona_info, user_question, context="", previous_responses=None, message_type="initial", timeout=None):
+    """Generate a response for a specific financial persona. `timeout` (seconds) bounds the API call."""
+    cached = cached_response(persona_type, user_question, context, message_type)
+    if cached is not None:
+        return cached
+    
+    messages = build_persona_messages(persona_type, persona_info, user_question, context, message_type)
     
     # Call the API
-    response = client.chat.completions.create(
-        model="gpt-4.1-mini",  # Use appropriate model
+    with telemetry.span('battle.persona_llm'):
+        response = client.chat.completions.create(
+            messages=messages,
+            timeout=timeout,
+            **PERSONA_COMPLETION_PARAMS
+        )
+    
+    record_persona_usage(response.usage)
+    text = response.choices[0].message.content
+    if response_cache is not None:
+        response_cache.add(persona_type, message_type, user_question, context, text)
+    return text
+
+def stream_persona_response(persona_type, persona_info, user_question, context="", previous_responses=None, message_type="initial", timeout=None, cancel=None):
+    """Like generate_persona_response, but returns a CompletionStream of text deltas"""
+    cached = cached_response(persona_type, user_question, context, message_type)
+    if cached is not None:
+        return CachedStream(cached)
+    
+    messages = build_persona_messages(persona_type, persona_info, user_question, context, message_type)
+    return CompletionStream(
+        client.chat.completions.create,
+        cancel=cancel,
+        on_complete=cache_response(persona_type, user_question, context, message_type),
+        on_usage=record_persona_usage,
         messages=messages,
-        temperature=0.7,  # Add some variability
-        max_tokens=250
+        timeout=timeout,
+        **PERSONA_COMPLETION_PARAMS
     )
-    
-    return response.choices[0].message.content
+
+@app.route('/api/llm/stats', methods=['GET'])
+def llm_stats():
+    return jsonify(llm_gateway.stats())
+
+@app.route('/api/response-cache/stats', methods=['GET'])
+def response_cache_stats():
+    return jsonify(response_cache.stats() if response_cache else {"enabled": False})
 
 if __name__ == '__main__':
     # Use PORT environment variable if available (for deployment)
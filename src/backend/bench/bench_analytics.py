@@ -0,0 +1,120 @@
+"""
+Benchmark: vectorized analytics vs the row-at-a-time code paths.
+
+For each size it times
+  • pandas    – the DataFrame-per-request analyze_transactions app.py used before
+  • python    – pure-Python compute_metrics (MetricsAccumulator) + detect_peaks
+  • columnar  – analytics.analyze_transactions + compute_metrics + detect_peaks
+                on TransactionColumns (conversion from dicts timed separately)
+
+Row dicts for 10M transactions don't fit comfortably in memory, so above
+--max-dict-rows only the columnar path runs, on columns generated directly.
+
+Usage:
+    python bench_analytics.py --sizes 1000 100000 10000000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(HERE, '..'))
+sys.path.append(os.path.join(HERE, '..', 'api'))
+
+import analytics
+from analytics import TransactionColumns
+from streaming_metrics import MetricsAccumulator
+
+CATEGORIES = ['groceries', 'food', 'entertainment', 'transport', 'personal',
+              'subscriptions', 'health', 'finance', 'salary', 'others']
+MERCHANTS = [f"Merchant {i}" for i in range(500)]
+START_DAY = int(np.datetime64('2024-01-01', 'D').astype(np.int64))
+
+
+def synthetic_columns(n: int, seed: int = 1) -> TransactionColumns:
+    rng = np.random.default_rng(seed)
+    merchant_codes = rng.integers(0, len(MERCHANTS), n, dtype=np.int32)
+    return TransactionColumns(
+        days=START_DAY + rng.integers(0, 365, n),
+        amounts=rng.integers(-15000, 4000, n),
+        category_codes=(merchant_codes % len(CATEGORIES)).astype(np.int32),
+        categories=CATEGORIES,
+        merchant_codes=merchant_codes,
+        merchants=MERCHANTS,
+    )
+
+
+def to_records(cols: TransactionColumns) -> list:
+    dates = np.datetime_as_string(cols.days.astype('datetime64[D]'))
+    return [
+        {'date': f"{d} 12:00:00", 'timestamp': f"{d} 12:00:00", 'amount': a / 100,
+         'category': cols.categories[c], 'merchant': cols.merchants[m]}
+        for d, a, c, m in zip(dates.tolist(), cols.amounts.tolist(),
+                              cols.category_codes.tolist(), cols.merchant_codes.tolist())
+    ]
+
+
+def pandas_analyze(transactions: list) -> dict:
+    df = pd.DataFrame(transactions)
+    total_spent = float(df[df['amount'] < 0]['amount'].sum()) * -1
+    total_income = float(df[df['amount'] > 0]['amount'].sum())
+    category_spend = df[df['amount'] < 0].groupby('category')['amount'].sum() * -1
+    category_percentage = (category_spend / total_spent * 100).to_dict()
+    merchant_spend = df[df['amount'] < 0].groupby('merchant')['amount'].sum() * -1
+    top_merchants = merchant_spend.sort_values(ascending=False).head(5).to_dict()
+    df['month'] = pd.to_datetime(df['timestamp']).dt.strftime('%Y-%m')
+    monthly_trend = (df[df['amount'] < 0].groupby('month')['amount'].sum() * -1).to_dict()
+    return {'total_spent': total_spent, 'total_income': total_income,
+            'category_percentage': category_percentage, 'top_merchants': top_merchants,
+            'monthly_trend': monthly_trend}
+
+
+def python_metrics(txns: list):
+    monthly = {}
+    for t in txns:
+        m = t['date'][:7]
+        monthly[m] = monthly.get(m, 0) + t['amount']
+    peaks = [m for m, _ in sorted(monthly.items(), key=lambda x: x[1], reverse=True)[:2]]
+    return MetricsAccumulator().update(txns).result(), peaks
+
+
+def columnar_all(cols: TransactionColumns):
+    return (analytics.analyze_transactions(cols), analytics.compute_metrics(cols),
+            analytics.detect_peaks(cols))
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 100_000, 10_000_000])
+    parser.add_argument('--max-dict-rows', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    print(f"{'rows':>11}  {'pandas':>9}  {'python':>9}  {'dict->cols':>10}  {'columnar':>9}")
+    for n in args.sizes:
+        cols = synthetic_columns(n)
+        row = {'pandas': None, 'python': None, 'convert': None}
+        if n <= args.max_dict_rows:
+            records = to_records(cols)
+            row['pandas'] = timed(pandas_analyze, records)
+            row['python'] = timed(python_metrics, records)
+            row['convert'] = timed(TransactionColumns.from_records, records)
+            del records
+        columnar = timed(columnar_all, cols)
+
+        def fmt(v):
+            return f"{v * 1000:8.1f}ms" if v is not None else f"{'-':>10}"
+        print(f"{n:>11,}  {fmt(row['pandas'])} {fmt(row['python'])} {fmt(row['convert']):>11} {fmt(columnar)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark: /api/battle-arena end to end against the local stub LLM.
+
+Runs a 4-persona debate (two rounds) through the Flask test client with
+the stub answering every completion after a fixed latency:
+
+  • serial    – BATTLE_MAX_WORKERS=1, the old one-call-at-a-time behaviour
+  • parallel  – each round fans out to all personas at once
+  • straggler – one persona answers slower than the per-persona timeout;
+                the debate still returns the other personas' turns
+
+Usage:
+    python bench_battle.py --latency 0.5
+"""
+import argparse
+import os
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(HERE, '..'))
+
+os.environ.setdefault('OPENAI_API_KEY', 'stub')
+
+from openai import OpenAI
+
+import battle
+from stub_llm_server import start_stub_server
+
+PERSONAS = ["The Budgeting Maestro", "The Spontaneous Spender", "The Cautious Saver", "The Investment Enthusiast"]
+
+
+def debate(client) -> tuple:
+    start = time.perf_counter()
+    resp = client.post('/api/battle-arena', json={'question': 'Should I buy a new car?', 'personas': PERSONAS})
+    elapsed = time.perf_counter() - start
+    assert resp.status_code == 200, resp.get_json()
+    return elapsed, resp.get_json()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--latency', type=float, default=0.5)
+    args = parser.parse_args()
+
+    straggler = battle.PERSONAS[PERSONAS[-1]]['character']
+    server, base_url = start_stub_server(latency=args.latency, slow_match=straggler,
+                                         slow_latency=args.latency * 4)
+    battle.client = OpenAI(base_url=base_url, api_key='stub', max_retries=0)
+    client = battle.app.test_client()
+
+    # serial and parallel runs keep every persona at the base latency
+    server.RequestHandlerClass.slow_match = None
+    battle.BATTLE_MAX_WORKERS = 1
+    serial, _ = debate(client)
+    battle.BATTLE_MAX_WORKERS = len(PERSONAS)
+    parallel, data = debate(client)
+    assert [m['persona'] for m in data['conversation']] == [p for p in PERSONAS for _ in range(2)]
+
+    server.RequestHandlerClass.slow_match = straggler
+    battle.PERSONA_TIMEOUT_SECONDS = args.latency * 2
+    partial, data = debate(client)
+    server.shutdown()
+
+    print(f"single completion latency {args.latency:.2f}s, {len(PERSONAS)} personas x 2 rounds")
+    print(f"  serial     {serial:6.2f}s  ({serial / args.latency:4.1f}x one completion)")
+    print(f"  parallel   {parallel:6.2f}s  ({parallel / args.latency:4.1f}x one completion)")
+    print(f"  straggler  {partial:6.2f}s  ({len(data['conversation'])} turns, "
+          f"errors: {[(e['persona'], e['round']) for e in data.get('errors', [])]})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmark: bulk_synthetic, the seeded LLM-free generator.
+
+  • throughput  – --rows rows split evenly over the 8 personas, written to
+                  a temp directory (CSV, and Parquet when pyarrow is
+                  installed); rows/s and bytes written
+  • determinism – the same seed twice gives byte-identical files
+  • fidelity    – per persona, generated vs source category shares (total
+                  variation distance), median amount per category, and
+                  salary / rent payments per user-month
+
+Usage:
+    python bench_bulk_synthetic.py --rows 10000000
+"""
+import argparse
+import filecmp
+import importlib.util
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(HERE, '..'))
+
+import bulk_synthetic
+
+
+def throughput(models, rows: int, fmt: str, out_dir: str) -> None:
+    start = time.perf_counter()
+    for name, model in models.items():
+        bulk_synthetic.generate(model, rows // len(models), os.path.join(out_dir, f"{name}.{fmt}"), fmt)
+    elapsed = time.perf_counter() - start
+    size = sum(os.path.getsize(os.path.join(out_dir, f)) for f in os.listdir(out_dir) if f.endswith(fmt))
+    print(f"throughput: {fmt:<7} {rows:>11,} rows in {elapsed:6.2f}s ({rows / elapsed:>10,.0f} rows/s, "
+          f"{size / 1e6:7.0f} MB)")
+
+
+def fidelity(model, path: str) -> None:
+    source, generated = model.rows, pd.read_csv(path)
+    shares = pd.concat([source['Category'].value_counts(normalize=True),
+                        generated['Category'].value_counts(normalize=True)], axis=1).fillna(0)
+    tvd = 0.5 * np.abs(shares.iloc[:, 0] - shares.iloc[:, 1]).sum()
+    medians = pd.concat([source.groupby('Category')['Amount'].median(),
+                         generated.groupby('Category')['Amount'].median()], axis=1).dropna()
+    ratio = (medians.iloc[:, 1] / medians.iloc[:, 0]).abs()
+    users = len(generated) / model.rows_per_user
+    months = len(model.month_starts)
+    recurring = ', '.join(f"{c} {(generated['Category'] == c).sum() / (users * months):.1f}/{(source['Category'] == c).sum() / months:.1f}"
+                          for c in bulk_synthetic.RECURRING_CATEGORIES)
+    print(f"  {model.name:<18} category TVD {tvd:.3f}  median amount ratio {ratio.min():.2f}-{ratio.max():.2f}  "
+          f"per user-month (generated/source): {recurring}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=10_000_000, help='total, split over the personas')
+    parser.add_argument('--fidelity-rows', type=int, default=200_000, help='per persona')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    models = bulk_synthetic.fit_personas()
+    print(f"fitted {len(models)} personas in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    formats = ['csv'] + (['parquet'] if importlib.util.find_spec('pyarrow') else [])
+    for fmt in formats:
+        with tempfile.TemporaryDirectory() as out_dir:
+            throughput(models, args.rows, fmt, out_dir)
+    if 'parquet' not in formats:
+        print("throughput: parquet skipped (pyarrow not installed)")
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        model = next(iter(models.values()))
+        first, second = (os.path.join(out_dir, f"{i}.csv") for i in (1, 2))
+        bulk_synthetic.generate(model, 100_000, first, seed=42)
+        bulk_synthetic.generate(model, 100_000, second, seed=42)
+        assert filecmp.cmp(first, second, shallow=False), "same seed produced different files"
+        print("determinism: same seed, byte-identical output")
+
+        print(f"fidelity ({args.fidelity_rows:,} rows per persona):")
+        for name, model in models.items():
+            path = os.path.join(out_dir, f"{name}.csv")
+            bulk_synthetic.generate(model, args.fidelity_rows, path)
+            fidelity(model, path)
+
+
+if __name__ == '__main__':
+    main()
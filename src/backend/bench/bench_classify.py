@@ -0,0 +1,69 @@
+"""
+Benchmark: merchant classification against the local stub LLM.
+
+Classifies N unique merchants one-per-request (batch size 1, so the
+number of round-trips equals N) serially and then with bounded
+concurrency, and checks that the concurrent run finishes in roughly
+(N / concurrency) x latency and returns results in input order.
+
+Usage:
+    python bench_classify.py --merchants 500 --latency 0.2 --concurrency 16
+"""
+import argparse
+import math
+import os
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(HERE, '..'))
+sys.path.append(os.path.join(HERE, '..', 'api'))
+
+from openai import OpenAI
+
+from classification import MerchantClassifier
+from stub_llm_server import start_stub_server
+
+
+def run(classifier: MerchantClassifier, merchants: list) -> float:
+    start = time.perf_counter()
+    results = classifier.classify_merchants(merchants)
+    elapsed = time.perf_counter() - start
+    assert list(results) == merchants, "results are not in input order"
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--merchants', type=int, default=500)
+    parser.add_argument('--latency', type=float, default=0.2)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--skip-serial', action='store_true', help='skip the (slow) serial baseline')
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server(latency=args.latency, error_rate=args.error_rate)
+    client = OpenAI(base_url=base_url, api_key='stub', max_retries=0)
+    merchants = [f"Merchant {i:05d}" for i in range(args.merchants)]
+
+    def classifier(max_in_flight):
+        # rate limit high enough that only max_in_flight bounds throughput
+        return MerchantClassifier(client, batch_size=1, max_in_flight=max_in_flight,
+                                  requests_per_second=10_000)
+
+    print(f"{args.merchants} merchants, {args.latency * 1000:.0f} ms latency, "
+          f"{args.error_rate:.0%} injected errors")
+    if not args.skip_serial:
+        serial = run(classifier(1), merchants)
+        print(f"serial:        {serial:7.2f}s")
+
+    concurrent = run(classifier(args.concurrency), merchants)
+    expected = math.ceil(args.merchants / args.concurrency) * args.latency
+    print(f"concurrency={args.concurrency:<3} {concurrent:7.2f}s  (ideal ≈ {expected:.2f}s, "
+          f"overhead {concurrent / expected:.2f}x)")
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+"""
+Benchmark: loading transactions from CSV vs a memory-mapped bundle
+(transaction_bundle.py), with a persona file from bulk_synthetic at each
+size.
+
+Each load runs in a fresh process and reports the time to columns ready
+for the analytics, the time including one compute_metrics pass, and the
+process's peak RSS growth:
+
+  • csv-dicts  – a dict per row (app.parse_transactions_csv, the same
+                 per-row work as run_full_server.iter_transactions_from_csv),
+                 then TransactionColumns.from_records; skipped above
+                 --max-dict-rows (10M rows of dicts don't fit in this box)
+  • csv-pandas – pandas' C parser, then dictionary-encoding with factorize
+  • bundle     – load_bundle (np.load with mmap_mode='r')
+
+Then --workers forked processes load the largest bundle and compute
+metrics at the same time; their summed PSS (which splits shared pages
+between processes) is compared with the summed RSS.
+
+Usage:
+    python bench_columnar.py --sizes 100000 10000000 --workers 4
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(HERE, '..'))
+
+os.environ.setdefault('OPENAI_API_KEY', 'stub')
+os.environ.setdefault('PRELOAD_TRANSACTIONS', 'false')
+
+import numpy as np
+import pandas as pd
+
+import analytics
+import bulk_synthetic
+from analytics import TransactionColumns
+from transaction_bundle import convert_csv, load_bundle
+
+
+def memory_kb(field: str, path: str = '/proc/self/status') -> int:
+    with open(path) as fh:
+        for line in fh:
+            if line.startswith(field + ':'):
+                return int(line.split()[1])
+    return 0
+
+
+def load_csv_dicts(path: str) -> TransactionColumns:
+    import app
+    return TransactionColumns.from_records(list(app.parse_transactions_csv(path)), date_key='timestamp')
+
+
+def load_csv_pandas(path: str) -> TransactionColumns:
+    df = pd.read_csv(path, usecols=['Timestamp', 'Merchant', 'Amount', 'Category'],
+                     dtype={'Timestamp': str, 'Merchant': str, 'Category': str})
+    days = pd.to_datetime(df['Timestamp'], format='ISO8601').to_numpy(dtype='datetime64[D]').astype(np.int64)
+    category_codes, categories = pd.factorize(df['Category'], sort=False)
+    merchant_codes, merchants = pd.factorize(df['Merchant'], sort=False)
+    return TransactionColumns(days, np.rint(df['Amount'].to_numpy() * 100).astype(np.int64),
+                              category_codes.astype(np.int32), list(categories),
+                              merchant_codes.astype(np.int32), list(merchants))
+
+
+LOADERS = {'csv-dicts': load_csv_dicts, 'csv-pandas': load_csv_pandas, 'bundle': load_bundle}
+
+
+def child(method: str, path: str) -> None:
+    if method == 'csv-dicts':
+        import app  # noqa: F401  (import cost isn't load cost)
+    rss_before = memory_kb('VmHWM')
+    start = time.perf_counter()
+    cols = LOADERS[method](path)
+    loaded = time.perf_counter() - start
+    analytics.compute_metrics(cols)
+    total = time.perf_counter() - start
+    print(json.dumps({'load': loaded, 'total': total, 'rss_mb': (memory_kb('VmHWM') - rss_before) / 1024}))
+
+
+def measure(method: str, path: str) -> dict:
+    out = subprocess.run([sys.executable, __file__, '--child', method, path],
+                         check=True, capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def shared_worker(path, barrier, results):
+    analytics.compute_metrics(load_bundle(path))
+    barrier.wait()   # everyone holds their mapping at the same time
+    results.put((memory_kb('Rss', '/proc/self/smaps_rollup'), memory_kb('Pss', '/proc/self/smaps_rollup')))
+    barrier.wait()
+
+
+def sharing(path: str, workers: int) -> None:
+    ctx = multiprocessing.get_context('fork')
+    barrier, results = ctx.Barrier(workers), ctx.Queue()
+    procs = [ctx.Process(target=shared_worker, args=(path, barrier, results)) for _ in range(workers)]
+    for p in procs:
+        p.start()
+    stats = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+    rss = sum(r for r, _ in stats) / 1024
+    pss = sum(p for _, p in stats) / 1024
+    print(f"sharing: {workers} workers on the {load_bundle(path).meta['rows']:,}-row bundle: "
+          f"summed RSS {rss:.0f} MB, summed PSS {pss:.0f} MB (whole processes, interpreter included)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000, 10_000_000])
+    parser.add_argument('--max-dict-rows', type=int, default=1_000_000)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--child', nargs=2, metavar=('METHOD', 'PATH'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(*args.child)
+        return
+
+    model = bulk_synthetic.fit_personas(names=['Zen_Zeke'])['Zen_Zeke']
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'rows':>11}  {'method':<10} {'load':>9} {'+metrics':>9} {'peak RSS':>9}   files")
+        for n in args.sizes:
+            csv_path = os.path.join(tmp, f'{n}.csv')
+            bulk_synthetic.generate(model, n, csv_path)
+            start = time.perf_counter()
+            bundle = convert_csv(csv_path)
+            converted = time.perf_counter() - start
+            bundle_mb = sum(os.path.getsize(os.path.join(bundle, f)) for f in os.listdir(bundle)) / 1e6
+            for method in LOADERS:
+                if method == 'csv-dicts' and n > args.max_dict_rows:
+                    print(f"{n:>11,}  {method:<10} {'skipped':>9}")
+                    continue
+                r = measure(method, bundle if method == 'bundle' else csv_path)
+                files = (f"bundle {bundle_mb:.0f} MB, converted in {converted:.1f}s" if method == 'bundle'
+                         else f"csv {os.path.getsize(csv_path) / 1e6:.0f} MB")
+                print(f"{n:>11,}  {method:<10} {r['load'] * 1000:7.1f}ms {r['total'] * 1000:7.0f}ms "
+                      f"{r['rss_mb']:6.0f} MB   {files}")
+        sharing(bundle, args.workers)
+
+
+if __name__ == '__main__':
+    main()
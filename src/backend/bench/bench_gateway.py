@@ -0,0 +1,71 @@
+"""
+Benchmark: connection reuse through llm_gateway vs a default OpenAI() client.
+
+Sends --bursts bursts of --requests completions (--concurrency in flight)
+to the local stub LLM, idling --gap seconds between bursts, once through
+a client with the SDK's default pool (5 s keep-alive) and once through
+the shared gateway pool. Reports connections opened vs reused. The stub
+is plain HTTP on localhost, so every opened connection costs far less
+here than a TCP + TLS handshake to a remote endpoint.
+
+Usage:
+    python bench_gateway.py --bursts 3 --requests 32 --concurrency 16 --gap 6
+"""
+import argparse
+import os
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(HERE, '..'))
+
+from openai import DefaultHttpxClient, OpenAI
+
+import llm_gateway
+from llm_concurrency import bounded_map
+from stub_llm_server import start_stub_server
+
+
+def run(client, metrics, args) -> None:
+    def call(i):
+        client.chat.completions.create(model='stub', messages=[{'role': 'user', 'content': f'hi {i}'}])
+
+    start = time.perf_counter()
+    for burst in range(args.bursts):
+        if burst:
+            time.sleep(args.gap)
+        bounded_map(call, range(args.requests), max_workers=args.concurrency)
+    elapsed = time.perf_counter() - start - args.gap * (args.bursts - 1)
+    s = metrics.stats()
+    print(f"  requests {s['responses']:4d}  opened {s['connections_opened']:3d}  "
+          f"reused {s['connections_reused']:4d}  ({s['reuse_ratio']:.0%})  "
+          f"p50 {s['latency_ms']['p50']} ms  busy time {elapsed:.2f}s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--bursts', type=int, default=3)
+    parser.add_argument('--requests', type=int, default=32)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--gap', type=float, default=6.0, help='idle seconds between bursts')
+    parser.add_argument('--latency', type=float, default=0.05)
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server(latency=args.latency)
+    print(f"{args.bursts} bursts x {args.requests} requests, {args.concurrency} in flight, "
+          f"{args.gap:g}s idle between bursts")
+
+    print("SDK default pool:")
+    default_metrics = llm_gateway.GatewayMetrics()
+    default_client = OpenAI(base_url=base_url, api_key='stub', max_retries=0, http_client=DefaultHttpxClient(
+        event_hooks={'request': [default_metrics.on_request], 'response': [default_metrics.on_response]}))
+    run(default_client, default_metrics, args)
+
+    print(f"llm_gateway (keep-alive {llm_gateway.KEEPALIVE_EXPIRY_SECONDS:g}s):")
+    run(llm_gateway.get_client(base_url=base_url, api_key='stub'), llm_gateway.metrics, args)
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark: paginated bunq ingest against the in-process fake.
+
+Compares a serial walk (one worker) with the concurrent per-account
+fetch, checks that every in-window payment is returned exactly once,
+and reports time-to-first-page for the streaming path. Then measures
+an incremental sync into a fresh TransactionStore: the cold sync, a
+repeat sync with nothing new, and a delta sync after new payments. A
+delta sync whose classifier gives up on every merchant is followed by a
+sync with a working classifier, which must categorize those rows. After
+every sync the summary metrics of the loaded rows must go through Flask's
+jsonify (sorted keys, so a None category would fail it).
+
+Usage:
+    python bench_ingest.py --accounts 40 --payments 2000 --latency 0.03 --workers 8
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(HERE, '..', 'api'))
+sys.path.append(os.path.join(HERE, '..'))
+
+from flask import Flask, jsonify
+
+import analytics
+import bunq_ingest
+from fake_bunq import FakeBunq
+from transaction_store import TransactionStore, sync_transactions
+
+
+def run(fake: FakeBunq, months: int, page_size: int, workers: int):
+    fake.calls = 0
+    start = time.perf_counter()
+    first_page = None
+    rows = 0
+    for page in bunq_ingest.stream_transactions_from_api(months, page_size, workers):
+        if first_page is None:
+            first_page = time.perf_counter() - start
+        rows += len(page)
+    return rows, first_page, time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--accounts', type=int, default=40)
+    parser.add_argument('--payments', type=int, default=2000, help='payments per account')
+    parser.add_argument('--days', type=int, default=540, help='history length generated per account')
+    parser.add_argument('--months', type=int, default=12)
+    parser.add_argument('--page-size', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.03, help='seconds per fake API call')
+    parser.add_argument('--workers', type=int, default=8)
+    args = parser.parse_args()
+
+    fake = FakeBunq(args.accounts, args.payments, args.days, args.latency)
+    fake.install(bunq_ingest)
+    expected = fake.expected_count(bunq_ingest.history_start(args.months))
+    print(f"{args.accounts} accounts x {args.payments} payments, {expected} inside the "
+          f"{args.months}-month window, {args.latency * 1000:.0f} ms per call")
+
+    for workers in (1, args.workers):
+        rows, first, total = run(fake, args.months, args.page_size, workers)
+        assert rows == expected, f"expected {expected} rows, got {rows}"
+        print(f"workers={workers:<3} rows={rows:<7} calls={fake.calls:<5} "
+              f"first page {first * 1000:7.1f} ms  total {total:6.2f}s")
+
+    def classify(txns):
+        for t in txns:
+            t['category'], t['reasoning'] = 'other', ''
+        return txns
+
+    def classify_failing(txns):   # like MerchantClassifier giving up: rows keep no category
+        return txns
+
+    flask_app = Flask(__name__)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = TransactionStore(os.path.join(tmp, 'bench.sqlite'))
+        for label, new_per_account, classifier in (('cold sync', 0, classify), ('no-op sync', 0, classify),
+                                                   ('delta sync', 5, classify),
+                                                   ('failed sync', 5, classify_failing),
+                                                   ('retry sync', 0, classify)):
+            fake.add_payments(new_per_account)
+            fake.calls = 0
+            start = time.perf_counter()
+            rows = sync_transactions(store, classifier, args.months, args.page_size, args.workers)
+            missing = len(store.uncategorized())
+            print(f"{label:<11} rows={len(rows):<7} calls={fake.calls:<5} "
+                  f"total {time.perf_counter() - start:6.2f}s  uncategorized={missing}")
+            expected_missing = 5 * args.accounts if classifier is classify_failing else 0
+            assert missing == expected_missing, f"{label}: {missing} rows without a category"
+            with flask_app.app_context():
+                jsonify(analytics.compute_metrics(analytics.as_columns(rows)))
+
+
+if __name__ == '__main__':
+    main()
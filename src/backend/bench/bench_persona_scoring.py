@@ -0,0 +1,181 @@
+"""
+Benchmark: the rules-based persona scorer (persona_scoring.py) against the
+labeled personas.
+
+Every data/<character>.csv belongs to one persona (run_full_server.personas).
+The scorer is checked on:
+
+  • files      – the 8 labeled files themselves. The profiles were read off
+                 these files, so this is in-sample
+  • resampled  – --users simulated users per persona from bulk_synthetic
+                 (each a full history re-drawn from the persona's file),
+                 and the same users cut to their first 3 months: accuracy,
+                 log loss, Brier score and expected calibration error,
+                 plus the confusion of the full-history run
+  • latency    – score() for one user at 100 and --rows transactions,
+                 score_many() for --users users per persona at once, and
+                 the prompt the LLM used to be sent instead
+
+--calibrate grid-searches the softmax temperature on a separate draw
+(lowest log loss) before evaluating with it.
+
+Usage:
+    python bench_persona_scoring.py --users 200 --rows 20000
+    python bench_persona_scoring.py --calibrate
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(HERE, '..'))
+
+import bulk_synthetic
+import persona_scoring
+from analytics import TransactionColumns
+
+DAY = 86400
+
+# persona id -> labeled file, as in run_full_server.personas
+PERSONA_FILES = {1: 'Maestro_Moolah', 2: 'Flashy_Fin', 3: 'Penny_the_Penguin', 4: 'Bullish_Benny',
+                 5: 'Bargain_Buzzy', 6: 'Zen_Zeke', 7: 'Charity_Charlie', 8: 'Explorer_Ellie'}
+
+
+def file_columns(name: str) -> TransactionColumns:
+    import csv
+    with open(os.path.join(bulk_synthetic.DATA_DIR, f'{name}.csv'), encoding='utf-8') as fh:
+        rows = [{'date': r['Timestamp'], 'amount': float(r['Amount']), 'category': r['Category'],
+                 'merchant': r['Merchant']} for r in csv.DictReader(fh)]
+    return TransactionColumns.from_records(rows)
+
+
+def simulated_users(model, rng, users: int, months: int = None, per_user: int = 1) -> list:
+    """
+    One TransactionColumns per simulated user (bulk_synthetic.PersonaModel.sample);
+    per_user > 1 pools that many simulated histories into one long one.
+    """
+    categories = model.rows['Category'].str.lower().to_numpy()
+    merchants = model.rows['Merchant'].to_numpy()
+    columns = []
+    for _ in range(users):
+        chunk = model.sample(rng, per_user)
+        keep = slice(None)
+        if months is not None:
+            keep = chunk['timestamps'] < model.month_starts[min(months, len(model.month_starts) - 1)]
+        templates = chunk['templates'][keep]
+        category_names, category_codes = np.unique(categories[templates], return_inverse=True)
+        merchant_names, merchant_codes = np.unique(merchants[templates], return_inverse=True)
+        columns.append(TransactionColumns(chunk['timestamps'][keep] // DAY,
+                                          np.rint(chunk['amounts'][keep] * 100).astype(np.int64),
+                                          category_codes.astype(np.int32), list(category_names),
+                                          merchant_codes.astype(np.int32), list(merchant_names)))
+    return columns
+
+
+def labeled_draw(models: dict, seed: int, users: int, months: int = None):
+    rng = np.random.default_rng(seed)
+    features, labels = [], []
+    for pid, name in PERSONA_FILES.items():
+        for cols in simulated_users(models[name], rng, users, months):
+            features.append(persona_scoring.features(cols))
+            labels.append(persona_scoring.PERSONA_IDS.index(pid))
+    return np.array(features), np.array(labels)
+
+
+def evaluate(probabilities: np.ndarray, labels: np.ndarray, bins: int = 10) -> dict:
+    predicted = probabilities.argmax(axis=1)
+    truth = np.eye(probabilities.shape[1])[labels]
+    confidence = probabilities.max(axis=1)
+    correct = predicted == labels
+    which = np.minimum((confidence * bins).astype(int), bins - 1)
+    ece = sum(abs(correct[which == b].mean() - confidence[which == b].mean()) * (which == b).mean()
+              for b in range(bins) if (which == b).any())
+    return {
+        'accuracy': correct.mean(),
+        'log_loss': -np.log(np.clip(probabilities[np.arange(len(labels)), labels], 1e-12, None)).mean(),
+        'brier': np.square(probabilities - truth).sum(axis=1).mean(),
+        'ece': ece,
+        'predicted': predicted,
+    }
+
+
+def report(label: str, result: dict) -> None:
+    print(f"{label:<24} accuracy {result['accuracy']:6.1%}   log loss {result['log_loss']:.3f}   "
+          f"Brier {result['brier']:.3f}   ECE {result['ece']:.3f}")
+
+
+def calibrate(models: dict, users: int) -> float:
+    features, labels = labeled_draw(models, seed=1, users=users)
+    grid = np.round(np.arange(0.2, 5.01, 0.1), 2)
+    losses = [evaluate(persona_scoring.score_matrix(features, t), labels)['log_loss'] for t in grid]
+    best = float(grid[int(np.argmin(losses))])
+    print(f"calibration (seed 1, {users} users per persona): temperature {best:g}, log loss {min(losses):.3f}")
+    return best
+
+
+def per_call_ms(fn, repeats: int = 20) -> float:
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=200, help='simulated users per persona')
+    parser.add_argument('--rows', type=int, default=20_000, help='transactions of the large latency case')
+    parser.add_argument('--calibrate', action='store_true', help='fit the temperature on a separate draw first')
+    args = parser.parse_args()
+
+    models = bulk_synthetic.fit_personas(names=PERSONA_FILES.values())
+    temperature = calibrate(models, args.users) if args.calibrate else persona_scoring.default_limits['temperature']
+    print(f"temperature {temperature:g}")
+
+    files = {pid: file_columns(name) for pid, name in PERSONA_FILES.items()}
+    scores = persona_scoring.score_matrix(np.array([persona_scoring.features(c) for c in files.values()]),
+                                          temperature)
+    labels = np.array([persona_scoring.PERSONA_IDS.index(pid) for pid in files])
+    report('files (in-sample)', evaluate(scores, labels))
+    for (pid, name), row in zip(PERSONA_FILES.items(), scores):
+        chosen = persona_scoring.PERSONA_IDS[int(row.argmax())]
+        print(f"  {name:<18} persona {pid}: scored {chosen} ({row.max():.2f}), own persona {row[pid - 1]:.2f}")
+
+    features, labels = labeled_draw(models, seed=2, users=args.users)
+    full = evaluate(persona_scoring.score_matrix(features, temperature), labels)
+    report('resampled, full history', full)
+    short_features, short_labels = labeled_draw(models, seed=3, users=args.users, months=3)
+    report('resampled, 3 months', evaluate(persona_scoring.score_matrix(short_features, temperature), short_labels))
+
+    print("confusion (full history; rows = labeled persona, columns = scored persona):")
+    print("      " + ''.join(f"{pid:>5}" for pid in persona_scoring.PERSONA_IDS))
+    for i, pid in enumerate(persona_scoring.PERSONA_IDS):
+        counts = np.bincount(full['predicted'][labels == i], minlength=len(persona_scoring.PERSONA_IDS))
+        print(f"  {pid:>3} " + ''.join(f"{c:>5}" for c in counts))
+
+    small = files[6]
+    rng = np.random.default_rng(4)
+    model = models[PERSONA_FILES[6]]
+    per_user = len(simulated_users(model, rng, 1)[0])
+    big = simulated_users(model, rng, 1, per_user=-(-args.rows // per_user))[0]
+    batch = simulated_users(model, rng, args.users * len(PERSONA_FILES))
+    print(f"latency: score() {per_call_ms(lambda: persona_scoring.score(small)):.2f} ms at {len(small)} rows, "
+          f"{per_call_ms(lambda: persona_scoring.score(big)):.2f} ms at {len(big):,} rows; "
+          f"score_many() {per_call_ms(lambda: persona_scoring.score_many(batch), 3):.0f} ms "
+          f"for {len(batch)} users")
+
+    # what generate_conversation_points used to send: every row as JSON (~4 characters per token)
+    rows = [{'date': str(np.datetime64(int(d), 'D')), 'merchant': small.merchants[m], 'amount': a / 100,
+             'description': '', 'category': small.categories[c], 'account_name': 'Main'}
+            for d, m, a, c in zip(small.days, small.merchant_codes, small.amounts, small.category_codes)]
+    per_row = len(json.dumps(rows)) / len(rows) / 4
+    print(f"LLM persona prompt it replaces: ~{per_row * len(small):,.0f} tokens at {len(small)} rows, "
+          f"~{per_row * len(big):,.0f} tokens at {len(big):,} rows (one 70B call per summary)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+"""
+Benchmark: the bunq memories pipeline end to end against replay_server.py,
+with per-stage timings.
+
+run_full_server runs with USE_API_FOR_DATA=true against the stand-in for
+both bunq and the LLM, with the real bunq SDK in between:
+
+  • bunq session   – installation, device and session handshake, then
+                     BunqContext.load_api_context
+  • ingest         – bunq_ingest.fetch_transactions_from_api: page fetches
+                     (SDK + HTTP) and preprocess, timed separately
+  • classify       – classify_transactions with an empty merchant cache,
+                     then again with it warm
+  • metrics        – compute_metrics and detect_peaks
+  • conversation   – generate_conversation_points (one LLM call)
+  • end to end     – GET /memories/summary/<user> through Flask: cold
+                     (empty transaction store and caches), then warm (a
+                     no-op incremental sync and a summary cache hit)
+
+Every stage also reports how many bunq / LLM calls the stand-in served.
+
+Usage:
+    python bench_pipeline.py --accounts 8 --payments 2000 --latency 0.05 --llm-latency 0.2
+    python bench_pipeline.py --replay sandbox.jsonl     # a recording from replay_server.py --record
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(HERE, '..', 'api'))
+sys.path.append(os.path.join(HERE, '..'))
+
+from replay_server import start_replay_server
+
+BUNQ_ROUTES = ('installation', 'device-server', 'session-server', 'monetary-account-bank', 'payment')
+
+
+class Stages:
+    def __init__(self, stats: Counter):
+        self.stats = stats
+        self.seen = Counter(stats)
+        print(f"{'stage':<28} {'time':>10} {'bunq calls':>11} {'LLM calls':>10}   notes")
+
+    def report(self, name: str, seconds: float, note: str = '') -> None:
+        calls = self.stats - self.seen
+        self.seen = Counter(self.stats)
+        bunq = sum(calls[r] for r in BUNQ_ROUTES)
+        unit = f"{seconds:8.2f} s" if seconds >= 1 else f"{seconds * 1000:7.1f} ms"
+        print(f"{name:<28} {unit:>10} {bunq:>11} {calls['chat/completions']:>10}   {note}")
+
+
+def run(server_module, bunq_ingest, stages: Stages) -> None:
+    start = time.perf_counter()
+    server_module.services.get('bunq')
+    stages.report('bunq session', time.perf_counter() - start, 'create context, load BunqContext')
+
+    preprocess_seconds = 0.0
+    preprocess = bunq_ingest.preprocess
+
+    def timed_preprocess(payments, account_name):
+        nonlocal preprocess_seconds
+        t = time.perf_counter()
+        try:
+            return preprocess(payments, account_name)
+        finally:
+            preprocess_seconds += time.perf_counter() - t
+
+    bunq_ingest.preprocess = timed_preprocess
+    start = time.perf_counter()
+    rows = bunq_ingest.fetch_transactions_from_api(server_module.default_limits['history_months'],
+                                                   server_module.default_limits['transactions_page_size'],
+                                                   server_module.ACCOUNT_FETCH_WORKERS)
+    elapsed = time.perf_counter() - start
+    bunq_ingest.preprocess = preprocess
+    stages.report('ingest: fetch pages', elapsed - preprocess_seconds,
+                  f"{len(rows):,} payments in the window, {server_module.ACCOUNT_FETCH_WORKERS} workers")
+    stages.report('ingest: preprocess', preprocess_seconds)
+
+    for label in ('classify (cold cache)', 'classify (warm cache)'):
+        start = time.perf_counter()
+        categorized = server_module.classify_transactions([dict(r) for r in rows])
+        stages.report(label, time.perf_counter() - start,
+                      f"{len({r['merchant'] for r in rows})} merchants")
+
+    start = time.perf_counter()
+    server_module.compute_metrics(categorized)
+    server_module.detect_peaks(categorized)
+    stages.report('metrics + peaks', time.perf_counter() - start)
+
+    start = time.perf_counter()
+    server_module.generate_conversation_points(categorized)
+    stages.report('conversation points', time.perf_counter() - start)
+
+    # a fresh merchant cache, so the cold run classifies from scratch too
+    server_module.merchant_cache._cache.clear()
+    client = server_module.app.test_client()
+    for label in ('end to end (cold)', 'end to end (warm)'):
+        start = time.perf_counter()
+        response = client.get('/memories/summary/bench')
+        assert response.status_code == 200, response.get_json()
+        stages.report(label, time.perf_counter() - start, f"persona {response.get_json()['persona_id']}")
+
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--accounts', type=int, default=8)
+    parser.add_argument('--payments', type=int, default=2000, help='per account')
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds per bunq call')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='bunq calls answered with 429')
+    parser.add_argument('--llm-latency', type=float, default=0.2)
+    parser.add_argument('--llm-error-rate', type=float, default=0.0)
+    parser.add_argument('--replay', help='serve a recording instead of generated data')
+    args = parser.parse_args()
+
+    server, url = start_replay_server(accounts=args.accounts, payments=args.payments,
+                                      latency=args.latency, error_rate=args.error_rate,
+                                      llm_latency=args.llm_latency, llm_error_rate=args.llm_error_rate,
+                                      replay=args.replay)
+    source = f"replaying {args.replay}" if args.replay else f"{args.accounts} accounts x {args.payments} payments"
+    print(f"stand-in on {url}: {source}, bunq {args.latency * 1000:.0f} ms, LLM {args.llm_latency * 1000:.0f} ms "
+          f"per call, error rates {args.error_rate:g} / {args.llm_error_rate:g}")
+
+    tmp = tempfile.mkdtemp(prefix='bench_pipeline_')
+    os.environ.update({
+        'USE_API_FOR_DATA': 'true', 'WARM_UP_SERVICES': 'false',
+        'BUNQ_API_KEY': 'stub', 'NVIDIA_RIVA_TOKEN': 'stub',
+        'BUNQ_API_URL': url, 'OPENAI_BASE_URL': url,
+        'BUNQ_CONTEXT_FILE': os.path.join(tmp, 'bunq_api_context.conf'),
+        'TRANSACTION_STORE_DIR': tmp,
+        'MERCHANT_CACHE_FILE': os.path.join(tmp, 'merchant_category_cache.json'),
+    })
+    import bunq_ingest
+    import run_full_server as server_module
+
+    stages = Stages(server.RequestHandlerClass.stats)
+    try:
+        run(server_module, bunq_ingest, stages)
+    except Exception as e:   # e.g. an injected 429 the ingest doesn't retry
+        print(f"pipeline failed: {type(e).__name__}: {str(e).splitlines()[-1]}")
+        sys.exit(1)
+    finally:
+        stats = server.RequestHandlerClass.stats
+        if stats['errors_injected'] or args.replay:
+            print(f"stand-in: {stats['errors_injected']} errors injected, replay hits {stats['replay_hits']}, "
+                  f"misses {stats['replay_misses']}")
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""
+Benchmark: prompt layout for provider-side prefix caching.
+
+  • stability – for every persona, the leading system message must be
+                byte-identical across different questions; reports how
+                much of each prompt is a prefix shared by all of them
+  • build     – cost of assembling the messages (warm caches)
+  • caching   – /api/chat and /api/persona-response through the Flask
+                test client against the stub LLM, whose usage reports
+                cached_tokens like a provider prefix cache; prints the
+                share of prompt tokens served from cache (llm_gateway)
+
+Usage:
+    python bench_prompts.py --requests 200
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(HERE, '..'))
+
+os.environ.setdefault('OPENAI_API_KEY', 'stub')
+
+import app as chat_app
+import battle
+import llm_gateway
+from chat_context import estimate_tokens
+from stub_llm_server import start_stub_server
+
+QUESTIONS = [
+    "How much did I spend on groceries in May?",
+    "What was my biggest purchase?",
+    "Am I spending too much on subscriptions?",
+    "Where did my money go in April 2025?",
+    "How much did I spend at Albert Heijn?",
+    "Should I save more?",
+    "What's my monthly average on food?",
+    "Give me a summary of June.",
+]
+
+
+def common_prefix(texts) -> int:
+    first = min(texts)
+    last = max(texts)
+    n = 0
+    while n < len(first) and first[n] == last[n]:
+        n += 1
+    return n
+
+
+def serialize(messages) -> str:
+    return "".join(f"{m['role']}\n{m['content']}\n" for m in messages)
+
+
+def stability() -> None:
+    print("stability (shared prefix across questions, estimated tokens):")
+    for name, persona in chat_app.PERSONAS.items():
+        prompts = [chat_app.build_chat_messages(q, persona['character'], name) for q in QUESTIONS]
+        assert len({p[0]['content'] for p in prompts}) == 1, f"chat system prompt for {name} varies by question"
+        shared = common_prefix([serialize(p) for p in prompts])
+        total = sum(len(serialize(p)) for p in prompts) / len(prompts)
+        print(f"  chat    {persona['character']:<18} {estimate_tokens('x' * shared):5d} of "
+              f"{estimate_tokens('x' * int(total)):5d} ({shared / total:.0%})")
+    for name, persona in battle.PERSONAS.items():
+        for message_type in ("initial", "rebuttal"):
+            prompts = [battle.build_persona_messages(name, persona, q, f'Context for "{q}"', message_type)
+                       for q in QUESTIONS]
+            assert len({p[0]['content'] for p in prompts}) == 1, f"{name} {message_type} prompt varies"
+    print(f"  persona system prompts identical across questions for all "
+          f"{len(battle.PERSONAS)} personas x initial/rebuttal")
+
+
+def build_cost(iterations: int = 2000) -> None:
+    characters = [(p['character'], name) for name, p in chat_app.PERSONAS.items()]
+    start = time.perf_counter()
+    for i in range(iterations):
+        character, name = characters[i % len(characters)]
+        chat_app.build_chat_messages(QUESTIONS[i % len(QUESTIONS)], character, name)
+    chat_us = (time.perf_counter() - start) / iterations * 1e6
+
+    personas = list(battle.PERSONAS.items())
+    start = time.perf_counter()
+    for i in range(iterations):
+        name, persona = personas[i % len(personas)]
+        battle.build_persona_messages(name, persona, QUESTIONS[i % len(QUESTIONS)], "context", "initial")
+    persona_us = (time.perf_counter() - start) / iterations * 1e6
+    print(f"build: chat messages {chat_us:7.1f} µs/call, persona messages {persona_us:5.1f} µs/call")
+
+
+def caching(requests: int) -> None:
+    server, base_url = start_stub_server()
+    client = llm_gateway.get_client(base_url=base_url, api_key='stub')
+    chat_app.client = battle.client = client
+    chat = chat_app.app.test_client()
+    arena = battle.app.test_client()
+    random.seed(3)
+    for _ in range(requests):
+        name, persona = random.choice(list(chat_app.PERSONAS.items()))
+        body = {'message': random.choice(QUESTIONS), 'character': persona['character'], 'persona': name}
+        assert chat.post('/api/chat', json=body).status_code == 200
+        name = random.choice(list(battle.PERSONAS))
+        body = {'question': random.choice(QUESTIONS), 'personas': [name], 'messageType': 'initial',
+                'context': 'Initial response'}
+        assert arena.post('/api/persona-response', json=body).status_code == 200
+    for label, totals in llm_gateway.metrics.prompt_cache_stats().items():
+        print(f"caching: {label:<8} {totals['completions']:4d} completions, "
+              f"{totals['prompt_tokens'] / totals['completions']:6.0f} prompt tokens avg, "
+              f"{totals['cached_ratio']:.0%} served from the prefix cache")
+    server.shutdown()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    stability()
+    build_cost()
+    caching(args.requests)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+Benchmark: /api/persona-response with the response cache on, against the
+local stub LLM.
+
+--requests users each ask one of a few popular questions, phrased with
+random case, punctuation and spacing, to one of the personas. Requests
+come from --concurrency threads through the Flask test client. Reports
+how many completions reached the LLM and the latency of cache hits vs
+misses.
+
+Usage:
+    python bench_response_cache.py --requests 500 --latency 0.5 --variants 3
+    python bench_response_cache.py --embedding-model all-MiniLM-L6-v2   # needs sentence-transformers
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(HERE, '..'))
+
+os.environ.setdefault('OPENAI_API_KEY', 'stub')
+
+import battle
+import llm_gateway
+from llm_concurrency import bounded_map
+from response_cache import ResponseCache, load_embedder
+from stub_llm_server import start_stub_server
+
+QUESTIONS = [
+    "Should I buy or rent?",
+    "How much should I save each month?",
+    "Is it worth paying off my student loan early?",
+    "Should I invest in index funds?",
+    "How big should my emergency fund be?",
+]
+PERSONAS = ["The Budgeting Maestro", "The Spontaneous Spender", "The Cautious Saver", "The Minimalist"]
+
+
+def rephrase(question: str) -> str:
+    words = question.rstrip('?').split()
+    if random.random() < 0.5:
+        words = [w.lower() for w in words]
+    return "  ".join(words) + random.choice(["?", "??", "", " ?"])
+
+
+def pct(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p * len(values)))] * 1000 if values else float('nan')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--latency', type=float, default=0.5)
+    parser.add_argument('--variants', type=int, default=3)
+    parser.add_argument('--embedding-model')
+    args = parser.parse_args()
+    random.seed(7)
+
+    server, base_url = start_stub_server(latency=args.latency)
+    battle.client = llm_gateway.get_client(base_url=base_url, api_key='stub')
+    battle.response_cache = ResponseCache(
+        variants=args.variants,
+        embed=load_embedder(args.embedding_model) if args.embedding_model else None
+    )
+    client = battle.app.test_client()
+
+    def ask(_):
+        question = rephrase(random.choice(QUESTIONS))
+        body = {
+            'question': question,
+            'personas': [random.choice(PERSONAS)],
+            'context': f'Initial response to the financial question: "{question}"',
+            'messageType': 'initial',
+        }
+        calls_before = llm_gateway.metrics.responses
+        start = time.perf_counter()
+        resp = client.post('/api/persona-response', json=body)
+        elapsed = time.perf_counter() - start
+        assert resp.status_code == 200, resp.get_json()
+        # approximate under concurrency, so hits are judged by latency instead
+        return elapsed, llm_gateway.metrics.responses > calls_before
+
+    start = time.perf_counter()
+    results = bounded_map(ask, range(args.requests), max_workers=args.concurrency)
+    wall = time.perf_counter() - start
+
+    hits = [t for t, _ in results if t < args.latency / 2]
+    misses = [t for t, _ in results if t >= args.latency / 2]
+    calls = llm_gateway.metrics.responses
+    keys = len(QUESTIONS) * len(PERSONAS)
+    print(f"{args.requests} requests, {len(QUESTIONS)} questions x {len(PERSONAS)} personas, "
+          f"{args.variants} variants, {args.latency * 1000:.0f} ms LLM latency")
+    print(f"LLM calls:   {calls} (uncached: {args.requests}; minimum to fill: {keys * args.variants})")
+    print(f"cache hits:  {len(hits):4d}  p50 {pct(hits, 0.5):6.1f} ms  p95 {pct(hits, 0.95):6.1f} ms")
+    print(f"misses:      {len(misses):4d}  p50 {pct(misses, 0.5):6.1f} ms  p95 {pct(misses, 0.95):6.1f} ms")
+    print(f"wall time:   {wall:.2f}s  stats: {battle.response_cache.stats()}")
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,201 @@
+"""
+Load test: Flask dev server vs the ASGI serving mode (asgi_app.py).
+
+Starts the async stub LLM (stub_llm_asgi.py) and the server under test
+as subprocesses, then runs a closed-loop load at each concurrency level:
+every simulated user sends a request, waits for the answer and
+immediately sends the next, for --duration seconds. Reports requests/sec,
+p50/p99 latency, errors, and the server's peak thread count and RSS.
+
+  • flask – app.py / battle.py on the Werkzeug server they run with today
+            (threaded, one blocked thread per in-flight LLM call)
+  • asgi  – asgi_app.py on uvicorn with one worker and AsyncOpenAI
+
+Usage:
+    python bench_serving.py --users 10 100 500 --latency 0.5 --endpoint chat
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BACKEND = os.path.join(HERE, '..')
+
+ENDPOINTS = {
+    'chat': ('app', '/api/chat',
+             {'message': 'How much did I spend on groceries?', 'character': 'Zen Zeke', 'persona': 'Minimalist'}),
+    'persona': ('battle', '/api/persona-response',
+                {'question': 'Should I buy a new car?', 'personas': ['The Cautious Saver'], 'messageType': 'initial'}),
+}
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_for_port(port: int, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"nothing listening on port {port}")
+
+
+def start(cmd, port: int, env: dict) -> subprocess.Popen:
+    proc = subprocess.Popen(cmd, cwd=BACKEND, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    wait_for_port(port)
+    return proc
+
+
+def server_command(mode: str, module: str, port: int) -> list:
+    if mode == 'flask':
+        return [sys.executable, '-c',
+                f"import {module}; {module}.app.run(host='127.0.0.1', port={port}, threaded=True)"]
+    return [sys.executable, '-m', 'uvicorn', 'asgi_app:app', '--host', '127.0.0.1', '--port', str(port),
+            '--workers', '1', '--log-level', 'warning', '--no-access-log']
+
+
+class Connection:
+    """
+    Minimal HTTP/1.1 keep-alive client for the load generator. httpx's
+    async pool costs far more CPU per request than the servers under test
+    at a few hundred concurrent requests, which would skew the comparison.
+    """
+
+    def __init__(self, host: str, port: int):
+        self.host, self.port = host, port
+        self.reader = self.writer = None
+
+    async def post_json(self, path: str, body: bytes) -> int:
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        self.writer.write(
+            f"POST {path} HTTP/1.1\r\nHost: {self.host}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n".encode('latin-1') + body)
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("server closed the connection")
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip().lower()
+        if 'content-length' in headers:
+            await self.reader.readexactly(int(headers['content-length']))
+        else:
+            await self.reader.read()
+        if 'content-length' not in headers or headers.get('connection') == 'close' \
+                or status_line.startswith(b'HTTP/1.0'):
+            self.close()
+        return int(status_line.split()[1])
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+def process_status(pid: int):
+    """(threads, RSS in MB) of a process, or None where /proc isn't available."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            status = dict(line.split(':', 1) for line in f)
+    except OSError:
+        return None
+    return int(status['Threads']), int(status['VmRSS'].split()[0]) / 1024
+
+
+async def sample_peak(pid: int, peak: list, interval: float = 0.25) -> None:
+    while True:
+        status = process_status(pid)
+        if status:
+            peak[:] = [max(a, b) for a, b in zip(peak, status)]
+        await asyncio.sleep(interval)
+
+
+async def load(port: int, path: str, body: dict, users: int, duration: float, server_pid: int):
+    payload = json.dumps(body).encode('utf-8')
+    latencies, errors = [], 0
+    stop = time.perf_counter() + duration
+
+    async def user():
+        nonlocal errors
+        conn = Connection('127.0.0.1', port)
+        while time.perf_counter() < stop:
+            start = time.perf_counter()
+            try:
+                ok = await asyncio.wait_for(conn.post_json(path, payload), 120) == 200
+            except (OSError, ConnectionError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+                conn.close()
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+        conn.close()
+
+    peak = [0, 0.0]
+    sampler = asyncio.create_task(sample_peak(server_pid, peak))
+    start = time.perf_counter()
+    await asyncio.gather(*(user() for _ in range(users)))
+    elapsed = time.perf_counter() - start
+    sampler.cancel()
+    return latencies, errors, elapsed, peak
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] if values else float('nan')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, nargs='+', default=[10, 100, 500])
+    parser.add_argument('--modes', nargs='+', default=['flask', 'asgi'], choices=['flask', 'asgi'])
+    parser.add_argument('--endpoint', default='chat', choices=sorted(ENDPOINTS))
+    parser.add_argument('--latency', type=float, default=0.5, help='stub LLM latency per completion')
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds of load per level')
+    args = parser.parse_args()
+
+    module, path, body = ENDPOINTS[args.endpoint]
+    stub_port = free_port()
+    # the async stub, so the LLM side never limits either mode
+    stub = start([sys.executable, os.path.join(HERE, 'stub_llm_asgi.py'),
+                  '--port', str(stub_port), '--latency', str(args.latency)], stub_port, os.environ.copy())
+    env = dict(os.environ, OPENAI_API_KEY='stub', OPENAI_BASE_URL=f"http://127.0.0.1:{stub_port}/v1")
+
+    print(f"{args.endpoint} ({path}), stub latency {args.latency:.2f}s, {args.duration:.0f}s per level")
+    print(f"{'mode':<6} {'users':>6} {'req/s':>8} {'p50':>8} {'p99':>8} {'errors':>7} {'threads':>7} {'peak rss':>8}")
+    try:
+        for mode in args.modes:
+            port = free_port()
+            server = start(server_command(mode, module, port), port, env)
+            try:
+                for users in args.users:
+                    latencies, errors, elapsed, (threads, rss) = asyncio.run(
+                        load(port, path, body, users, args.duration, server.pid))
+                    print(f"{mode:<6} {users:>6} {len(latencies) / elapsed:8.1f} "
+                          f"{percentile(latencies, 0.5):7.2f}s {percentile(latencies, 0.99):7.2f}s {errors:>7} "
+                          f"{threads:>7} {rss:6.0f}MB")
+            finally:
+                server.terminate()
+                server.wait()
+    finally:
+        stub.terminate()
+        stub.wait()
+
+
+if __name__ == '__main__':
+    main()
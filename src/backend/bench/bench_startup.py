@@ -0,0 +1,103 @@
+"""
+Benchmark: cold start of api/run_full_server.py.
+
+Each measurement is a fresh interpreter in api/ (as the server runs),
+with dummy credentials, no network and WARM_UP_SERVICES=false; the median
+of --runs is reported.
+
+  • import budget – `python -X importtime -c "import run_full_server"`:
+                    total import time against --budget-ms, the biggest
+                    direct imports, and a check that neither the bunq SDK
+                    nor the openai package is imported
+  • first request – process start to the first served response
+                    (/memories/cache/stats through Flask's test client)
+  • deferred      – what the lazy services cost on first use instead
+  • eager         – the same import plus the bunq SDK, openai and the
+                    client built up front, which is what startup used to
+                    pay before its bunq handshake
+
+Exits non-zero when the import is over budget or pulls in bunq / openai.
+
+Usage:
+    python bench_startup.py --runs 5 --budget-ms 600
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+API_DIR = os.path.join(HERE, '..', 'api')
+
+ENV = {**os.environ, 'BUNQ_API_KEY': 'stub', 'NVIDIA_RIVA_TOKEN': 'stub', 'WARM_UP_SERVICES': 'false'}
+LAZY_ROOTS = ('bunq', 'openai')
+IMPORTTIME = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+def run(code: str, *flags: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *flags, '-c', code], cwd=API_DIR, env=ENV,
+                          check=True, capture_output=True, text=True)
+
+
+def import_profile() -> dict:
+    """Cumulative µs of run_full_server and of each of its direct imports."""
+    entries = [(int(cum), len(indent), name)
+               for _, cum, indent, name in IMPORTTIME.findall(run('import run_full_server', '-X', 'importtime').stderr)]
+    total = next(cum for cum, _, name in entries if name == 'run_full_server')
+    top = min(depth for _, depth, _ in entries)
+    direct = {name: cum for cum, depth, name in entries if depth == top + 2}
+    lazy_loaded = sorted({name.split('.')[0] for _, _, name in entries if name.split('.')[0] in LAZY_ROOTS})
+    return {'total': total, 'direct': direct, 'lazy_loaded': lazy_loaded}
+
+
+def wall_time(code: str) -> float:
+    start = time.perf_counter()
+    run(code)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=600)
+    args = parser.parse_args()
+
+    profiles = [import_profile() for _ in range(args.runs)]
+    total_ms = statistics.median(p['total'] for p in profiles) / 1000
+    direct = {name: statistics.median(p['direct'].get(name, 0) for p in profiles) / 1000
+              for name in profiles[0]['direct']}
+    lazy_loaded = profiles[0]['lazy_loaded']
+    over = total_ms > args.budget_ms
+    print(f"import budget: run_full_server {total_ms:.0f} ms of {args.budget_ms:.0f} ms "
+          f"({'OVER' if over else 'ok'}), bunq/openai imported: {', '.join(lazy_loaded) or 'neither'}")
+    for name, ms in sorted(direct.items(), key=lambda item: -item[1])[:6]:
+        print(f"  {name:<22} {ms:6.0f} ms  {ms / total_ms:4.0%}")
+
+    first_request = ("import run_full_server as r; "
+                     "assert r.app.test_client().get('/memories/cache/stats').status_code == 200")
+    interpreter = statistics.median(wall_time('pass') for _ in range(args.runs))
+    lazy = statistics.median(wall_time(first_request) for _ in range(args.runs))
+    eager = statistics.median(wall_time("import openai, bunq.sdk.context.api_context, "
+                                        "bunq.sdk.model.generated.endpoint, transaction_store; "
+                                        "import run_full_server as r; r.services.get('classifier'); "
+                                        + first_request.split('; ', 1)[1]) for _ in range(args.runs))
+    print(f"first request: {lazy * 1000:.0f} ms from process start (bare interpreter {interpreter * 1000:.0f} ms); "
+          f"eager {eager * 1000:.0f} ms before the bunq handshake")
+
+    deferred = run("import time, run_full_server as r\n"
+                   "for name in ('openai', 'classifier'):\n"
+                   "    start = time.perf_counter(); r.services.get(name)\n"
+                   "    print(name, (time.perf_counter() - start) * 1000)").stdout.split('\n')
+    built = dict(line.split() for line in deferred if re.match(r'(openai|classifier) ', line))
+    print("deferred to first use: " + ', '.join(f"{name} {float(ms):.0f} ms" for name, ms in built.items())
+          + ", bunq session: handshake (network)")
+
+    if over or lazy_loaded:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
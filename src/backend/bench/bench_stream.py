@@ -0,0 +1,85 @@
+"""
+Benchmark: time-to-first-token vs full completion for the streaming endpoints.
+
+Runs /api/chat (app.py), /api/persona-response and /api/battle-arena
+(battle.py) through their Flask test clients against the stub LLM, once
+blocking and once with streaming requested, and reports how long the user
+waits before seeing anything:
+
+  • blocking   – time until the JSON body arrives
+  • streaming  – time until the first `delta` event, and until the end
+
+Usage:
+    python bench_stream.py --latency 0.3 --token-delay 0.05
+"""
+import argparse
+import os
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(HERE, '..'))
+
+os.environ.setdefault('OPENAI_API_KEY', 'stub')
+
+from openai import OpenAI
+
+import app as chat_app
+import battle
+from stub_llm_server import start_stub_server
+
+REQUESTS = [
+    ('chat', chat_app, '/api/chat',
+     {'message': 'How much did I spend on groceries?', 'character': 'Zen Zeke', 'persona': 'Minimalist'}),
+    ('persona-response', battle, '/api/persona-response',
+     {'question': 'Should I buy a new car?', 'personas': ['The Cautious Saver'], 'messageType': 'initial'}),
+    ('battle-arena', battle, '/api/battle-arena',
+     {'question': 'Should I buy a new car?',
+      'personas': ['The Budgeting Maestro', 'The Spontaneous Spender', 'The Cautious Saver', 'The Minimalist']}),
+]
+
+
+def blocking(client, path, body) -> float:
+    start = time.perf_counter()
+    resp = client.post(path, json=body)
+    assert resp.status_code == 200, resp.get_data(as_text=True)
+    return time.perf_counter() - start
+
+
+def streaming(client, path, body):
+    start = time.perf_counter()
+    resp = client.post(path, json={**body, 'stream': True}, buffered=False)
+    first = None
+    events = 0
+    for chunk in resp.response:
+        text = chunk.decode('utf-8') if isinstance(chunk, bytes) else chunk
+        if first is None and 'event: delta' in text:
+            first = time.perf_counter() - start
+        events += text.count('event: ')
+    assert 'event: error' not in text
+    return first, time.perf_counter() - start, events
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--latency', type=float, default=0.3, help='stub time to first token')
+    parser.add_argument('--token-delay', type=float, default=0.05, help='stub delay between streamed words')
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server(latency=args.latency, token_delay=args.token_delay)
+    client = OpenAI(base_url=base_url, api_key='stub', max_retries=0)
+    chat_app.client = client
+    battle.client = client
+
+    print(f"stub: {args.latency:.2f}s to first token, {args.token_delay * 1000:.0f}ms per word")
+    print(f"{'endpoint':<18} {'blocking':>9} {'ttft':>9} {'stream end':>11} {'events':>7}")
+    for name, module, path, body in REQUESTS:
+        client_ = module.app.test_client()
+        wait = blocking(client_, path, body)
+        ttft, total, events = streaming(client_, path, body)
+        print(f"{name:<18} {wait:8.2f}s {ttft:8.2f}s {total:10.2f}s {events:>7}")
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark: GET /memories/summary/<user>?fields=... (summary_pipeline.py).
+
+CSV data from bulk_synthetic (--rows per persona) and the stub LLM, through
+Flask's test client. Each request shape runs cold (summary cache cleared)
+and warm; the table shows the median time, the LLM calls the stub served
+and the pipeline stages that actually ran:
+
+  • metrics   – categories, topMerchants, spendingBreakdown, weekdaySpending
+  • peaks     – peaks, topCategories
+  • default   – no fields parameter: metrics plus the persona / conversation
+                points (one LLM call when cold)
+  • all       – every field, the year-in-review narrative included (two LLM
+                calls when cold)
+
+Usage:
+    python bench_summary_fields.py --rows 20000 --repeats 20 --llm-latency 0.2
+"""
+import argparse
+import contextlib
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(HERE, '..', 'api'))
+sys.path.append(os.path.join(HERE, '..'))
+
+import bulk_synthetic
+from stub_llm_server import StubLLMHandler, start_stub_server
+
+METRICS = 'categories,topMerchants,spendingBreakdown,weekdaySpending'
+SHAPES = {
+    'metrics': f'?fields={METRICS}',
+    'peaks': '?fields=peaks,topCategories',
+    'default': '',
+    'all': None,   # filled in from the pipeline's fields
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=20_000, help='transactions per persona')
+    parser.add_argument('--repeats', type=int, default=20, help='warm requests per shape')
+    parser.add_argument('--llm-latency', type=float, default=0.2, help='stub LLM seconds per call')
+    args = parser.parse_args()
+
+    server, url = start_stub_server(latency=args.llm_latency)
+    tmp = tempfile.mkdtemp(prefix='bench_summary_fields_')
+    with contextlib.redirect_stdout(open(os.devnull, 'w')):
+        bulk_synthetic.generate_all(args.rows, tmp)
+    os.environ.update({'OPENAI_BASE_URL': url, 'NVIDIA_RIVA_TOKEN': 'stub', 'USE_API_FOR_DATA': 'false',
+                       'WARM_UP_SERVICES': 'false', 'CSV_BASE_FILE_PATH': tmp + os.sep})
+    with contextlib.redirect_stdout(open(os.devnull, 'w')):   # debug_env and the route print a lot
+        import run_full_server as server_module
+    SHAPES['all'] = '?fields=' + ','.join(server_module.summary_pipeline.fields)
+    client = server_module.app.test_client()
+
+    def get(query: str):
+        calls = StubLLMHandler.request_count
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(open(os.devnull, 'w')):
+            response = client.get(f'/memories/summary/1{query}')
+        elapsed = time.perf_counter() - start
+        assert response.status_code == 200, response.get_json()
+        return elapsed, StubLLMHandler.request_count - calls
+
+    get('?fields=categories')   # first use: CSV parse, the OpenAI client
+    get('?fields=conversationPoints')
+    print(f"{args.rows:,} transactions, stub LLM {args.llm_latency * 1000:.0f} ms per call")
+    print(f"{'shape':<9} {'cold':>10} {'LLM':>4} {'warm':>10} {'LLM':>4}   stages run (cold)")
+    for shape, query in SHAPES.items():
+        server_module.summary_cache.memory.clear()
+        stages = []
+        evaluate = server_module.summary_pipeline.evaluate
+
+        def recording(*a, **kw):
+            evaluation = evaluate(*a, **kw)
+            stages.append(evaluation.computed)
+            return evaluation
+
+        server_module.summary_pipeline.evaluate = recording
+        cold, cold_calls = get(query)
+        server_module.summary_pipeline.evaluate = evaluate
+        warm = [get(query) for _ in range(args.repeats)]
+        warm_ms = statistics.median(t for t, _ in warm) * 1000
+        print(f"{shape:<9} {cold * 1000:8.1f}ms {cold_calls:>4} {warm_ms:8.1f}ms {sum(c for _, c in warm):>4}   "
+              f"{', '.join(stages[0])}")
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
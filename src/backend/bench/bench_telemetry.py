@@ -0,0 +1,124 @@
+"""
+Benchmark: what the telemetry layer (telemetry.py) costs.
+
+  • span cost   – one `with telemetry.span(...)` block, enabled (a
+                  histogram observation) and disabled (the shared no-op),
+                  plus a counter increment
+  • pipeline    – GET /memories/summary/<user> through Flask's test client
+                  with CSV data and the stub LLM, telemetry.ENABLED flipped
+                  on and off between requests: cold (summary cache
+                  cleared, so every stage and the conversation call run)
+                  and warm (summary cache hits). The median difference is
+                  at the noise floor, so the overhead is also estimated as
+                  histogram observations per request x the span cost
+  • scrape      – time and size of one GET /metrics
+
+Usage:
+    python bench_telemetry.py --requests 500 --llm-latency 0.0
+"""
+import argparse
+import contextlib
+import os
+import statistics
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(HERE, '..', 'api'))
+sys.path.append(os.path.join(HERE, '..'))
+API_DIR = os.path.join(HERE, '..', 'api')
+
+
+def per_call_us(fn, n: int = 200_000) -> float:
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def span_costs() -> dict:
+    import telemetry
+    counter = telemetry.counter('bench_total', 'bench')
+
+    def enabled():
+        with telemetry._Span('bench', {}):
+            pass
+
+    def disabled():
+        with telemetry._NOOP_SPAN:
+            pass
+
+    return {'span': per_call_us(enabled), 'noop': per_call_us(disabled),
+            'counter': per_call_us(lambda: counter.inc(endpoint='payment'))}
+
+
+def observations() -> int:
+    """Histogram observations recorded so far in this process."""
+    import telemetry
+    return sum(sum(series[:-1]) for instrument in telemetry.registry._instruments.values()
+               if isinstance(instrument, telemetry.Histogram) for series in instrument._series.values())
+
+
+def pipeline(requests: int, llm_latency: float, span_us: float) -> None:
+    from stub_llm_server import start_stub_server
+
+    server, url = start_stub_server(latency=llm_latency)
+    os.environ.update({'OPENAI_BASE_URL': url, 'NVIDIA_RIVA_TOKEN': 'stub',
+                       'USE_API_FOR_DATA': 'false', 'WARM_UP_SERVICES': 'false'})
+    os.chdir(API_DIR)   # CSV_BASE_FILE_PATH is relative to api/
+    import run_full_server as server_module
+    import telemetry
+
+    client = server_module.app.test_client()
+    users = sorted(server_module.personas)
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):   # the route prints every summary
+        for user in users:   # first use: the OpenAI client, CSV parses
+            assert client.get(f'/memories/summary/{user}').status_code == 200
+
+    print(f"pipeline: {requests} requests per mode and phase, interleaved on / off, "
+          f"stub LLM {llm_latency * 1000:.0f} ms")
+    print(f"{'phase':<6} {'off':>9} {'on':>9} {'measured':>9} {'obs/req':>8} {'estimated':>10}")
+    for phase, clear in (('cold', True), ('warm', False)):
+        times = {True: [], False: []}
+        observed = 0
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            for i in range(requests):
+                for enabled in ((True, False) if i % 2 else (False, True)):
+                    telemetry.ENABLED = enabled
+                    if clear:
+                        server_module.summary_cache.memory.clear()
+                    before = observations()
+                    start = time.perf_counter()
+                    response = client.get(f'/memories/summary/{users[i % len(users)]}')
+                    times[enabled].append(time.perf_counter() - start)
+                    observed += observations() - before
+                    assert response.status_code == 200, response.get_json()
+        telemetry.ENABLED = True
+        off = statistics.median(times[False]) * 1000
+        on = statistics.median(times[True]) * 1000
+        per_request = observed / requests
+        estimated = per_request * span_us / 1000 / on
+        print(f"{phase:<6} {off:7.2f}ms {on:7.2f}ms {(on - off) / off:+9.1%} {per_request:8.1f} {estimated:10.2%}")
+
+    start = time.perf_counter()
+    body = client.get('/metrics').data
+    series = sum(1 for line in body.splitlines() if line and not line.startswith(b'#'))
+    print(f"scrape: GET /metrics {(time.perf_counter() - start) * 1000:.1f} ms, {len(body) / 1024:.1f} KB, "
+          f"{series} series")
+    server.shutdown()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=500, help='per mode and phase')
+    parser.add_argument('--llm-latency', type=float, default=0.0, help='stub LLM seconds per call')
+    args = parser.parse_args()
+
+    costs = span_costs()
+    print(f"span cost: {costs['span']:.2f} µs enabled, {costs['noop']:.2f} µs disabled, "
+          f"counter.inc {costs['counter']:.2f} µs")
+    pipeline(args.requests, args.llm_latency, costs['span'])
+
+
+if __name__ == '__main__':
+    main()
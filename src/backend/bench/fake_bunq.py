@@ -0,0 +1,132 @@
+"""
+In-process fake of the bunq SDK listing endpoints used by api/bunq_ingest.py.
+
+FakeBunq generates accounts and payments deterministically and exposes
+`MonetaryAccountBankApiObject` / `PaymentApiObject` stand-ins whose `list`
+classmethods honour `count` / `older_id` exactly like the real API
+(newest first, `older_id` / `newer_id` cursors in the returned Pagination).
+`add_payments` simulates new activity for incremental syncs. Install it
+over the SDK classes with `FakeBunq.install(bunq_ingest)`.
+"""
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+MERCHANTS = ['Albert Heijn', 'Jumbo', 'Shell', 'NS', 'Spotify', 'Netflix', 'Bol.com',
+             'Zalando', 'H&M', 'Kruidvat', 'Thuisbezorgd', 'Local Charity', 'Salary']
+
+
+class FakePagination:
+    """Mirror of bunq.Pagination for the parts bunq_ingest uses."""
+
+    def __init__(self, older_id=None, newer_id=None, count=None):
+        self.older_id = older_id
+        self.newer_id = newer_id
+        self.count = count
+
+    def has_previous_page(self) -> bool:
+        return self.older_id is not None
+
+    def has_next_page_assured(self) -> bool:
+        return self.newer_id is not None
+
+    @property
+    def url_params_previous_page(self) -> dict:
+        params = {'older_id': str(self.older_id)}
+        if self.count is not None:
+            params['count'] = str(self.count)
+        return params
+
+
+class FakeBunq:
+    """
+    Args:
+        accounts: number of monetary accounts.
+        payments_per_account: payments per account, spread evenly over `days`.
+        days: how far back the generated history goes.
+        latency: seconds slept per list call (simulates a network round-trip).
+    """
+
+    def __init__(self, accounts: int = 20, payments_per_account: int = 500,
+                 days: int = 540, latency: float = 0.0, seed: int = 7):
+        self._rng = random.Random(seed)
+        now = datetime.utcnow()
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+        self.accounts = [SimpleNamespace(id_=1000 + a, _description=f"Account {a + 1}")
+                         for a in range(accounts)]
+        # payments[account_id] is newest-first; ids grow with creation time
+        self.payments = {acct.id_: [] for acct in self.accounts}
+        self._next_id = 1
+        step = days * 86400 / max(payments_per_account, 1)
+        for i in reversed(range(payments_per_account)):
+            for acct in self.accounts:
+                created = now - timedelta(seconds=i * step + self._rng.random() * step)
+                self.payments[acct.id_].insert(0, self._payment(created))
+
+    def _payment(self, created: datetime) -> SimpleNamespace:
+        merchant = self._rng.choice(MERCHANTS)
+        amount = self._rng.uniform(500, 4000) if merchant == 'Salary' else -self._rng.uniform(2, 150)
+        payment = SimpleNamespace(
+            id_=self._next_id,
+            created=created.strftime('%Y-%m-%d %H:%M:%S.%f'),
+            description=f"{merchant} payment",
+            amount=SimpleNamespace(value=f"{amount:.2f}", currency='EUR'),
+            counterparty_alias=SimpleNamespace(pointer=SimpleNamespace(name=merchant)),
+        )
+        self._next_id += 1
+        return payment
+
+    def add_payments(self, per_account: int) -> None:
+        """Append `per_account` new payments (created now) to every account."""
+        for _ in range(per_account):
+            for acct in self.accounts:
+                self.payments[acct.id_].insert(0, self._payment(datetime.utcnow()))
+
+    def _tick(self):
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    @staticmethod
+    def _page(rows, params, id_of):
+        params = params or {}
+        count = int(params.get('count', 10))
+        if 'newer_id' in params:
+            # the `count` items right after the cursor, returned newest first
+            newer = [r for r in rows if id_of(r) > int(params['newer_id'])]
+            page = newer[-count:]
+            newer_id = id_of(page[0]) if len(newer) > count else None
+            return SimpleNamespace(value=page, pagination=FakePagination(None, newer_id, count))
+        if 'older_id' in params:
+            older = int(params['older_id'])
+            rows = [r for r in rows if id_of(r) < older]
+        page = rows[:count]
+        older_id = id_of(page[-1]) if len(rows) > count else None
+        return SimpleNamespace(value=page, pagination=FakePagination(older_id, None, count))
+
+    def install(self, module) -> None:
+        """Replace the SDK classes referenced by `module` with this fake."""
+        fake = self
+
+        class MonetaryAccountBankApiObject:
+            @classmethod
+            def list(cls, params=None, custom_headers=None):
+                fake._tick()
+                return fake._page(fake.accounts, params, lambda a: a.id_)
+
+        class PaymentApiObject:
+            @classmethod
+            def list(cls, monetary_account_id=None, params=None, custom_headers=None):
+                fake._tick()
+                return fake._page(fake.payments[monetary_account_id], params, lambda p: p.id_)
+
+        module.MonetaryAccountBankApiObject = MonetaryAccountBankApiObject
+        module.PaymentApiObject = PaymentApiObject
+
+    def expected_count(self, since: str) -> int:
+        return sum(1 for rows in self.payments.values() for p in rows if p.created[:10] >= since)
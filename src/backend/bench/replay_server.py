@@ -0,0 +1,373 @@
+"""
+Local stand-in for the bunq API and the OpenAI-compatible LLM endpoint, so
+the memories pipeline (bunq ingest -> preprocess -> classify -> metrics ->
+conversation points) runs end to end without the sandbox or NVIDIA:
+
+  • bunq   – installation, device-server and session-server, so the real
+             SDK (ApiContext.create, BunqContext.load_api_context) does
+             its handshake here, plus paginated MonetaryAccountBank and
+             Payment listings (count, older_id / newer_id cursors, newest
+             first). Responses are signed with the stand-in's own server
+             key, which the SDK receives at installation and verifies as
+             it would bunq's. Each account is one of the data/*.csv
+             personas (round-robin) and replays that persona's rows,
+             repeated further back in time until it has --payments rows
+  • LLM    – /v1/chat/completions, answered by stub_llm_server
+  • record – with --record FILE every request is forwarded to
+             --bunq-upstream / --llm-upstream and the exchange appended
+             to FILE (JSON lines)
+  • replay – with --replay FILE recorded responses are served again: bunq
+             matched by method and path, the LLM also by request body. A
+             request that isn't in the recording counts as a miss; the LLM
+             stub answers it, bunq answers 404 (generated data would be
+             signed with a key the recorded installation doesn't have)
+
+Latency and error rate are set separately for bunq and the LLM. Injected
+bunq errors are 429s, as bunq's rate limiter sends them. GET /_replay/stats
+returns requests per route, injected errors, and replay hits and misses.
+
+Point the backend at it with BUNQ_API_URL and OPENAI_BASE_URL, both
+http://127.0.0.1:<port>/v1.
+
+Usage:
+    python replay_server.py --port 8901 --accounts 8 --payments 2000 --latency 0.05
+    python replay_server.py --port 8901 --record sandbox.jsonl    # needs BUNQ_API_KEY etc. on the client side
+    python replay_server.py --port 8901 --replay sandbox.jsonl
+"""
+import argparse
+import base64
+import csv
+import glob
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter, defaultdict, deque
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from Cryptodome.Hash import SHA256  # pycryptodomex, which the bunq SDK depends on
+from Cryptodome.PublicKey import RSA
+from Cryptodome.Signature import pkcs1_15
+
+from stub_llm_server import StubHTTPServer, StubLLMHandler
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(HERE, '..', 'data')
+
+USER_ID = 1
+ACCOUNT_ID_BASE = 100
+MAX_PAGE_SIZE = 200   # bunq's limit
+SESSION_TIMEOUT_SECONDS = 7 * 24 * 3600
+BUNQ_UPSTREAM = 'https://public-api.sandbox.bunq.com'
+LLM_UPSTREAM = 'https://integrate.api.nvidia.com'
+CREATED_FORMAT = '%Y-%m-%d %H:%M:%S.%f'
+
+ROUTES = [
+    ('POST', re.compile(r'/v1/installation$'), 'installation'),
+    ('POST', re.compile(r'/v1/device-server$'), 'device-server'),
+    ('POST', re.compile(r'/v1/session-server$'), 'session-server'),
+    ('GET', re.compile(r'/v1/user/(\d+)/monetary-account-bank$'), 'monetary-account-bank'),
+    ('GET', re.compile(r'/v1/user/(\d+)/monetary-account/(\d+)/payment$'), 'payment'),
+]
+# recorded response headers worth replaying
+KEPT_HEADERS = ('content-type', 'x-bunq-')
+
+
+class PersonaBank:
+    """
+    Accounts and payments generated from the persona CSVs. Payment ids grow
+    with creation time within an account and are unique across accounts;
+    the newest payment of every account is an hour old.
+    """
+
+    def __init__(self, accounts: int = 8, payments_per_account: int = 2000, data_dir: str = DATA_DIR):
+        files = sorted(glob.glob(os.path.join(data_dir, '*.csv')))
+        if not files:
+            raise FileNotFoundError(f"No persona CSVs in {data_dir}")
+        personas = [(os.path.splitext(os.path.basename(f))[0], self._read(f)) for f in files]
+        newest_at = datetime.utcnow() - timedelta(hours=1)
+
+        self.accounts: List[Dict] = []
+        self.payments: Dict[int, List[str]] = {}   # account id -> JSON items, newest first
+        self.ids: Dict[int, List[int]] = {}        # account id -> payment ids, newest first
+        for a in range(accounts):
+            name, rows = personas[a % len(personas)]
+            account_id = ACCOUNT_ID_BASE + a
+            self.accounts.append({'MonetaryAccountBank': {
+                'id': account_id, 'description': name, 'status': 'ACTIVE', 'currency': 'EUR',
+                'alias': [{'type': 'IBAN', 'value': f"NL00BUNQ{account_id:010d}", 'name': name}],
+            }})
+            shift = newest_at - rows[0][0]
+            span = rows[0][0] - rows[-1][0] + timedelta(days=1)
+            items, ids = [], []
+            for k in range(payments_per_account):
+                created, row = rows[k % len(rows)]
+                created += shift - span * (k // len(rows))
+                payment_id = 1 + a + accounts * (payments_per_account - 1 - k)
+                items.append(json.dumps({'Payment': self._payment(payment_id, account_id, name, created, row)}))
+                ids.append(payment_id)
+            self.payments[account_id] = items
+            self.ids[account_id] = ids
+
+    @staticmethod
+    def _read(path: str) -> List[Tuple[datetime, Dict]]:
+        with open(path, newline='', encoding='utf-8') as fh:
+            rows = [(datetime.strptime(r['Timestamp'], '%Y-%m-%d %H:%M:%S'), r) for r in csv.DictReader(fh)]
+        rows.sort(key=lambda item: item[0], reverse=True)
+        return rows
+
+    @staticmethod
+    def _payment(payment_id: int, account_id: int, name: str, created: datetime, row: Dict) -> Dict:
+        stamp = created.strftime(CREATED_FORMAT)
+        return {
+            'id': payment_id, 'created': stamp, 'updated': stamp, 'monetary_account_id': account_id,
+            'amount': {'value': f"{float(row['Amount']):.2f}", 'currency': 'EUR'},
+            'description': row['Description'], 'type': 'MASTERCARD',
+            'alias': {'iban': f"NL00BUNQ{account_id:010d}", 'display_name': name, 'country': 'NL'},
+            'counterparty_alias': {'iban': None, 'display_name': row['Merchant'], 'country': 'NL'},
+        }
+
+    @property
+    def rows(self) -> int:
+        return sum(len(ids) for ids in self.ids.values())
+
+    def page(self, path: str, items: List[str], ids: List[int], params: Dict[str, str]) -> Dict:
+        """One listing page with bunq's Pagination block; `ids` are newest first."""
+        count = min(int(params.get('count', 10)), MAX_PAGE_SIZE)
+        if 'newer_id' in params:
+            # the `count` items right after the cursor, still newest first
+            end = sum(1 for i in ids if i > int(params['newer_id']))
+            start = max(0, end - count)
+        else:
+            start = sum(1 for i in ids if i >= int(params['older_id'])) if 'older_id' in params else 0
+            end = start + count
+        page_items, page_ids = items[start:end], ids[start:end]
+
+        def url(cursor: str, value: int) -> str:
+            return f"{path}?count={count}&{cursor}={value}"
+
+        more_newer = 'newer_id' in params and start > 0
+        return {
+            'Response': [json.loads(item) for item in page_items],
+            'Pagination': {
+                'older_url': url('older_id', page_ids[-1]) if page_ids and end < len(ids) else None,
+                'newer_url': url('newer_id', page_ids[0]) if more_newer else None,
+                'future_url': None if more_newer else url('newer_id', ids[0] if ids else 0),
+            },
+        }
+
+
+def load_recording(path: str) -> Dict[str, deque]:
+    recording = defaultdict(deque)
+    with open(path, encoding='utf-8') as fh:
+        for line in fh:
+            if line.strip():
+                entry = json.loads(line)
+                recording[entry['key']].append(entry)
+    return recording
+
+
+def request_key(method: str, path: str, body: bytes, service: str) -> str:
+    if service == 'bunq' or not body:
+        return f"{method} {path}"
+    try:
+        canonical = json.dumps(json.loads(body), sort_keys=True).encode('utf-8')
+    except ValueError:
+        canonical = body
+    return f"{method} {path} {hashlib.sha256(canonical).hexdigest()}"
+
+
+class ReplayHandler(StubLLMHandler):
+    bank: Optional[PersonaBank] = None
+    server_key = None
+    bunq_latency = 0.0
+    bunq_error_rate = 0.0
+    record_path: Optional[str] = None
+    recording: Optional[Dict[str, deque]] = None
+    upstreams = {'bunq': BUNQ_UPSTREAM, 'llm': LLM_UPSTREAM}
+    stats = Counter()
+    _lock = threading.Lock()
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def do_DELETE(self):
+        self._dispatch('DELETE')
+
+    def _count(self, *names: str) -> None:
+        with ReplayHandler._lock:
+            self.stats.update(names)
+
+    def _send(self, status: int, data: bytes, headers: Dict[str, str]) -> None:
+        try:
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _send_bunq(self, status: int, payload: Dict) -> None:
+        data = json.dumps(payload).encode('utf-8')
+        signature = pkcs1_15.new(self.server_key).sign(SHA256.new(data))
+        self._send(status, data, {'Content-Type': 'application/json',
+                                  'X-Bunq-Client-Response-Id': f"replay-{time.time_ns()}",
+                                  'X-Bunq-Server-Signature': base64.b64encode(signature).decode('ascii')})
+
+    def _dispatch(self, method: str) -> None:
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        path = urlsplit(self.path).path
+        if path == '/_replay/stats':
+            self._send_json(200, dict(self.stats))
+            return
+        service = 'llm' if path.rstrip('/').endswith('/chat/completions') else 'bunq'
+        route = 'chat/completions' if service == 'llm' else next(
+            (name for m, pattern, name in ROUTES if m == method and pattern.search(path)), 'other')
+        self._count(route)
+        key = request_key(method, self.path, body, service)
+
+        if self.record_path:
+            self._record(method, service, key, body)
+            return
+        if self.recording is not None:
+            entries = self.recording.get(key)
+            if entries:
+                entry = entries.popleft() if len(entries) > 1 else entries[0]   # the last one repeats
+                self._count('replay_hits')
+                self._send(entry['status'], entry['body'].encode('utf-8'), entry['headers'])
+                return
+            self._count('replay_misses')
+            if service == 'bunq':
+                self._send_bunq(404, {'Error': [{'error_description':
+                                                     f'{method} {self.path} is not in the recording.'}]})
+                return
+
+        if service == 'llm':
+            self.complete(json.loads(body or b'{}'))
+        else:
+            self._bunq(method, path, route, body)
+
+    def _bunq(self, method: str, path: str, route: str, body: bytes) -> None:
+        time.sleep(self.bunq_latency)
+        if route not in ('installation', 'device-server') and random.random() < self.bunq_error_rate:
+            self._count('errors_injected')
+            self._send_bunq(429, {'Error': [{'error_description': 'Too many requests. You can do a maximum '
+                                                                  'of 3 calls per 3 second to this endpoint.',
+                                             'error_description_translated': 'Too many requests.'}]})
+            return
+
+        now = datetime.utcnow().strftime(CREATED_FORMAT)
+        if route == 'installation':
+            public_key = self.server_key.publickey().export_key().decode('ascii')
+            self._send_bunq(200, {'Response': [{'Id': {'id': 1}},
+                                               {'Token': {'id': 1, 'created': now, 'updated': now,
+                                                          'token': 'replay-installation-token'}},
+                                               {'ServerPublicKey': {'server_public_key': public_key}}]})
+        elif route == 'device-server':
+            self._send_bunq(200, {'Response': [{'Id': {'id': 1}}]})
+        elif route == 'session-server':
+            self._send_bunq(200, {'Response': [{'Id': {'id': 1}},
+                                               {'Token': {'id': 2, 'created': now, 'updated': now,
+                                                          'token': f'replay-session-{time.time_ns()}'}},
+                                               {'UserPerson': {'id': USER_ID, 'display_name': 'Replay',
+                                                               'session_timeout': SESSION_TIMEOUT_SECONDS}}]})
+        elif route == 'monetary-account-bank':
+            params = {k: v[-1] for k, v in parse_qs(urlsplit(self.path).query).items()}
+            accounts = [json.dumps(a) for a in self.bank.accounts]
+            ids = [a['MonetaryAccountBank']['id'] for a in self.bank.accounts][::-1]
+            self._send_bunq(200, self.bank.page(path, accounts[::-1], ids, params))
+        elif route == 'payment':
+            account_id = int(ROUTES[4][1].search(path).group(2))
+            if account_id not in self.bank.payments:
+                self._send_bunq(404, {'Error': [{'error_description': 'Monetary account not found.'}]})
+                return
+            params = {k: v[-1] for k, v in parse_qs(urlsplit(self.path).query).items()}
+            self._send_bunq(200, self.bank.page(path, self.bank.payments[account_id],
+                                                self.bank.ids[account_id], params))
+        else:
+            self._send_bunq(404, {'Error': [{'error_description': f'{method} {path} is not emulated.'}]})
+
+    def _record(self, method: str, service: str, key: str, body: bytes) -> None:
+        headers = {k: v for k, v in self.headers.items()
+                   if k.lower() not in ('host', 'content-length', 'accept-encoding', 'connection')}
+        request = urllib.request.Request(self.upstreams[service] + self.path, data=body or None,
+                                         headers=headers, method=method)
+        try:
+            with urllib.request.urlopen(request, timeout=120) as response:
+                status, response_headers, data = response.status, response.headers, response.read()
+        except urllib.error.HTTPError as e:
+            status, response_headers, data = e.code, e.headers, e.read()
+        kept = {k: v for k, v in response_headers.items() if k.lower().startswith(KEPT_HEADERS)}
+        with ReplayHandler._lock:
+            with open(self.record_path, 'a', encoding='utf-8') as fh:
+                fh.write(json.dumps({'key': key, 'service': service, 'status': status, 'headers': kept,
+                                     'body': data.decode('utf-8')}) + '\n')
+            self.stats['recorded'] += 1
+        self._send(status, data, kept)
+
+
+def start_replay_server(port: int = 0, accounts: int = 8, payments: int = 2000, data_dir: str = DATA_DIR,
+                        latency: float = 0.0, error_rate: float = 0.0,
+                        llm_latency: float = 0.0, llm_error_rate: float = 0.0,
+                        record: Optional[str] = None, replay: Optional[str] = None,
+                        bunq_upstream: str = BUNQ_UPSTREAM, llm_upstream: str = LLM_UPSTREAM):
+    """
+    Start the stand-in in a daemon thread. Returns (server, base_url); use
+    base_url for both BUNQ_API_URL and OPENAI_BASE_URL and call
+    server.shutdown() when done. Port 0 picks a free port.
+    """
+    handler = type('ConfiguredReplayHandler', (ReplayHandler,), {
+        'bank': None if record or replay else PersonaBank(accounts, payments, data_dir),
+        'server_key': RSA.generate(2048),
+        'bunq_latency': latency, 'bunq_error_rate': error_rate,
+        'latency': llm_latency, 'error_rate': llm_error_rate,
+        'record_path': record,
+        'recording': load_recording(replay) if replay else None,
+        'upstreams': {'bunq': bunq_upstream.rstrip('/'), 'llm': llm_upstream.rstrip('/')},
+        'stats': Counter(),
+    })
+    server = StubHTTPServer(('127.0.0.1', port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8901)
+    parser.add_argument('--accounts', type=int, default=8)
+    parser.add_argument('--payments', type=int, default=2000, help='payments per account')
+    parser.add_argument('--data', default=DATA_DIR, help='directory of persona CSVs')
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds added to every bunq response')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of bunq calls answered with 429')
+    parser.add_argument('--llm-latency', type=float, default=0.2)
+    parser.add_argument('--llm-error-rate', type=float, default=0.0)
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--record', help='forward to the upstreams and append exchanges to this file')
+    mode.add_argument('--replay', help='serve responses from a recording')
+    parser.add_argument('--bunq-upstream', default=BUNQ_UPSTREAM)
+    parser.add_argument('--llm-upstream', default=LLM_UPSTREAM)
+    args = parser.parse_args()
+
+    server, url = start_replay_server(args.port, args.accounts, args.payments, args.data,
+                                      args.latency, args.error_rate, args.llm_latency, args.llm_error_rate,
+                                      args.record, args.replay, args.bunq_upstream, args.llm_upstream)
+    mode = (f"recording to {args.record}" if args.record else f"replaying {args.replay}" if args.replay
+            else f"{args.accounts} accounts x {args.payments} payments")
+    print(f"bunq / LLM stand-in listening on {url} ({mode})")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,73 @@
+"""
+Async flavour of stub_llm_server.py for high-concurrency load tests.
+
+Same canned replies, payloads and streaming format, but served by uvicorn
+on an event loop, so hundreds of simultaneous slow completions cost a
+coroutine each instead of a thread and the stub itself doesn't become
+the bottleneck being measured.
+
+Usage:
+    STUB_LATENCY=0.5 uvicorn stub_llm_asgi:app --port 8900
+    python stub_llm_asgi.py --port 8900 --latency 0.5
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from stub_llm_server import (build_reply, chunk_frame, completion_payload, is_slow, stream_words, usage_payload,
+                             wants_usage)
+
+LATENCY = float(os.getenv('STUB_LATENCY', 0.0))
+ERROR_RATE = float(os.getenv('STUB_ERROR_RATE', 0.0))
+SLOW_MATCH = os.getenv('STUB_SLOW_MATCH')
+SLOW_LATENCY = float(os.getenv('STUB_SLOW_LATENCY', 0.0))
+TOKEN_DELAY = float(os.getenv('STUB_TOKEN_DELAY', 0.0))
+
+_request_ids = itertools.count(1)
+
+
+async def chat_completions(request):
+    body = json.loads(await request.body() or b'{}')
+    request_id = next(_request_ids)
+
+    await asyncio.sleep(SLOW_LATENCY if is_slow(body, SLOW_MATCH) else LATENCY)
+    if random.random() < ERROR_RATE:
+        return JSONResponse({'error': {'message': 'injected failure'}}, status_code=random.choice((429, 503)))
+
+    content = build_reply(body)
+    words = stream_words(content)
+    if not body.get('stream'):
+        await asyncio.sleep(TOKEN_DELAY * max(0, len(words) - 1))
+        return JSONResponse(completion_payload(body, content, request_id))
+
+    async def frames():
+        yield chunk_frame(body, request_id, {'role': 'assistant', 'content': ''})
+        for i, word in enumerate(words):
+            if i and TOKEN_DELAY:
+                await asyncio.sleep(TOKEN_DELAY)
+            yield chunk_frame(body, request_id, {'content': word})
+        yield chunk_frame(body, request_id, {}, finish_reason='stop')
+        if wants_usage(body):
+            yield chunk_frame(body, request_id, None, usage=usage_payload(body, content))
+        yield b"data: [DONE]\n\n"
+    return StreamingResponse(frames(), media_type='text/event-stream')
+
+
+app = Starlette(routes=[Route('/v1/chat/completions', chat_completions, methods=['POST'])])
+
+if __name__ == '__main__':
+    import uvicorn
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--port', type=int, default=8900)
+    parser.add_argument('--latency', type=float, default=0.2)
+    parser.add_argument('--token-delay', type=float, default=0.0)
+    args = parser.parse_args()
+    LATENCY, TOKEN_DELAY = args.latency, args.token_delay
+    uvicorn.run(app, host='127.0.0.1', port=args.port, log_level='warning', access_log=False, backlog=4096)
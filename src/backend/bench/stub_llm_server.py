@@ -0,0 +1,318 @@
+"""
+Local stand-in for an OpenAI-compatible /v1/chat/completions endpoint.
+
+Answers with canned but well-formed content so the backends and the
+benchmarks in this folder can run without network access or API spend:
+
+  • batch merchant classification  -> JSON array, one item per merchant
+  • single merchant classification -> {"category", "reasoning"}
+  • persona conversation points     -> {"conversationPoints", "persona_id",
+                                      "persona_scores"}, persona picked
+                                      from a hash of the transactions; just
+                                      {"conversationPoints"} when the
+                                      persona is given
+  • synthetic transaction batches  -> {"transactions": [...]}, sometimes
+                                      a couple of rows short, like the
+                                      real model
+  • anything else                  -> a short fixed sentence
+
+Latency and error rate are configurable so concurrency, retry and
+rate-limiting behaviour can be measured. With "stream": true the reply is
+sent as chat.completion.chunk SSE frames, one word each, `token_delay`
+seconds apart after the initial latency. Requests whose system prompt
+contains `slow_match` use `slow_latency` instead, to simulate one
+straggling persona.
+
+Usage in responses (and in a trailing chunk for streams that ask for it
+with stream_options.include_usage) counts ~4 characters per token and
+reports `cached_tokens` the way a provider prefix cache would: prompts of
+1024+ tokens are cached in 128-token blocks, and a request is credited
+with the leading blocks an earlier request already sent.
+
+Usage:
+    python stub_llm_server.py --port 8900 --latency 0.2 --error-rate 0.05
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STUB_TEXT = "*adjusts glasses* Keep a budget, pay yourself first, and let compounding do the heavy lifting."
+
+
+def _guess_category(merchant: str) -> str:
+    m = merchant.lower()
+    for needle, category in (('heijn', 'groceries'), ('jumbo', 'groceries'), ('shell', 'transport'),
+                             ('ns', 'transport'), ('spotify', 'subscriptions'), ('netflix', 'subscriptions'),
+                             ('salary', 'finance'), ('rent', 'rent and mortgage'), ('charity', 'gifts')):
+        if needle in m:
+            return category
+    return 'other'
+
+
+STUB_MERCHANTS = (('Albert Heijn', 'groceries'), ('Jumbo', 'groceries'), ('NS', 'others'),
+                  ('Spotify', 'subscriptions'), ('Cafe de Jaren', 'food'), ('Pathe', 'entertainment'))
+STUB_BAD_ROW_RATE = 0.02   # rows that break the schema, like a sloppy model's
+
+
+def _fake_transactions(count: int) -> list:
+    rows = []
+    for _ in range(count):
+        merchant, category = random.choice(STUB_MERCHANTS)
+        rows.append({
+            'Timestamp': f"2025-{random.randint(4, 6):02d}-{random.randint(1, 28):02d} "
+                         f"{random.randint(7, 22):02d}:{random.randint(0, 59):02d}:00",
+            'Merchant': merchant,
+            'Amount': -round(random.uniform(2, 120), 2),
+            'Description': f"{category} purchase",
+            'Location': random.choice(('Amsterdam', 'Utrecht', 'Rotterdam')),
+            'Category': category,
+            'Account': 'Main',
+        })
+        if random.random() < STUB_BAD_ROW_RATE:
+            rows[-1].update(random.choice(({'Category': 'transport'}, {'Timestamp': '14/05/2025'})))
+    return rows
+
+
+def build_reply(body: dict) -> str:
+    """Pick canned content for a chat.completions request body."""
+    messages = body.get('messages') or [{}]
+    system = next((m.get('content', '') for m in messages if m.get('role') == 'system'), '')
+    user = messages[-1].get('content', '')
+
+    if 'JSON array of merchant names' in system:
+        try:
+            names = json.loads(user)
+        except ValueError:
+            names = []
+        return json.dumps([
+            {'merchant': n, 'category': _guess_category(n), 'reasoning': 'Stub classification.'}
+            for n in names
+        ])
+    batch = re.match(r"\s*Create (\d+) Dutch banking transactions", user)
+    if batch:
+        count = int(batch.group(1))
+        return json.dumps({'transactions': _fake_transactions(random.randint(max(1, count - 2), count))})
+    if 'choose exactly one persona ID' in system:
+        persona_id = 1 + int(hashlib.sha256(user.encode('utf-8')).hexdigest(), 16) % 8
+        return json.dumps({
+            'conversationPoints': ['Set a monthly grocery budget.', 'Review your subscriptions.',
+                                   'Move a fixed amount to savings on payday.', 'Plan one treat a week.'],
+            'persona_id': persona_id,
+            'persona_scores': [0.65 if pid == persona_id else 0.05 for pid in range(1, 9)],
+        })
+    if 'has been identified as' in system:
+        return json.dumps({'conversationPoints': ['Keep doing what works for you.', 'Review your subscriptions.',
+                                                  'Move a fixed amount to savings on payday.',
+                                                  'Plan one treat a week.']})
+    if user.startswith('Merchant: '):
+        name = user[len('Merchant: '):]
+        return json.dumps({'category': _guess_category(name), 'reasoning': 'Stub classification.'})
+    return STUB_TEXT
+
+
+class PrefixCacheModel:
+    """Rough model of provider-side prompt caching, shared by every request to the stub."""
+    block_tokens = 128
+    min_tokens = 1024
+
+    def __init__(self):
+        self._seen = set()
+        self._lock = threading.Lock()
+
+    def cached_tokens(self, body: dict) -> int:
+        prompt = "".join(f"{m.get('role')}\n{m.get('content') or ''}\n" for m in body.get('messages', []))
+        block_chars = self.block_tokens * 4
+        if len(prompt) // 4 < self.min_tokens:
+            return 0
+        h = hashlib.sha256(str(body.get('model')).encode('utf-8'))
+        cached, matching = 0, True
+        with self._lock:
+            for start in range(0, len(prompt) - block_chars + 1, block_chars):
+                h.update(prompt[start:start + block_chars].encode('utf-8'))
+                digest = h.copy().digest()
+                if matching and digest in self._seen:
+                    cached += self.block_tokens
+                else:
+                    matching = False
+                    self._seen.add(digest)
+        return cached if cached >= self.min_tokens else 0
+
+
+prefix_cache = PrefixCacheModel()
+
+
+def usage_payload(body: dict, content: str) -> dict:
+    prompt_chars = sum(len(m.get('content') or '') for m in body.get('messages', []))
+    return {
+        'prompt_tokens': prompt_chars // 4,
+        'completion_tokens': len(content) // 4,
+        'total_tokens': (prompt_chars + len(content)) // 4,
+        'prompt_tokens_details': {'cached_tokens': prefix_cache.cached_tokens(body)},
+    }
+
+
+def completion_payload(body: dict, content: str, request_id: int) -> dict:
+    """A chat.completion response body, with rough ~4 chars/token usage."""
+    return {
+        'id': f'chatcmpl-stub-{request_id}',
+        'object': 'chat.completion',
+        'created': int(time.time()),
+        'model': body.get('model', 'stub'),
+        'choices': [{
+            'index': 0,
+            'message': {'role': 'assistant', 'content': content},
+            'finish_reason': 'stop',
+        }],
+        'usage': usage_payload(body, content),
+    }
+
+
+def chunk_frame(body: dict, request_id: int, delta: dict, finish_reason=None, usage: dict = None) -> bytes:
+    """One `data:` SSE frame carrying a chat.completion.chunk (delta=None: the usage-only chunk)."""
+    frame = {
+        'id': f'chatcmpl-stub-{request_id}',
+        'object': 'chat.completion.chunk',
+        'created': int(time.time()),
+        'model': body.get('model', 'stub'),
+        'choices': [] if delta is None else [{'index': 0, 'delta': delta, 'finish_reason': finish_reason}],
+    }
+    if usage is not None:
+        frame['usage'] = usage
+    return f"data: {json.dumps(frame)}\n\n".encode('utf-8')
+
+
+def wants_usage(body: dict) -> bool:
+    return bool((body.get('stream_options') or {}).get('include_usage'))
+
+
+def stream_words(content: str):
+    """The reply split into streamed chunks, one word (plus trailing space) each."""
+    return re.findall(r'\S+\s*', content)
+
+
+def is_slow(body: dict, slow_match) -> bool:
+    system = next((m.get('content') or '' for m in body.get('messages', []) if m.get('role') == 'system'), '')
+    return slow_match is not None and slow_match in system
+
+
+class StubLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    latency = 0.0
+    error_rate = 0.0
+    slow_match = None
+    slow_latency = 0.0
+    token_delay = 0.0
+    request_count = 0
+    _count_lock = threading.Lock()
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def _send_json(self, status: int, payload: dict) -> None:
+        data = json.dumps(payload).encode('utf-8')
+        try:
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client timed out and hung up
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = json.loads(self.rfile.read(length) or b'{}')
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self._send_json(404, {'error': {'message': f'unknown path {self.path}'}})
+            return
+        self.complete(body)
+
+    def complete(self, body: dict) -> None:
+        """Answer a chat.completions request body (after latency / injected errors)."""
+        with StubLLMHandler._count_lock:
+            StubLLMHandler.request_count += 1
+
+        time.sleep(self.slow_latency if is_slow(body, self.slow_match) else self.latency)
+        if random.random() < self.error_rate:
+            self._send_json(random.choice((429, 503)), {'error': {'message': 'injected failure'}})
+            return
+
+        content = build_reply(body)
+        if body.get('stream'):
+            self._stream(body, content)
+            return
+        # a blocking reply takes as long as the whole stream would have
+        time.sleep(self.token_delay * max(0, len(stream_words(content)) - 1))
+        self._send_json(200, completion_payload(body, content, StubLLMHandler.request_count))
+
+    def _stream(self, body: dict, content: str) -> None:
+        def chunk(delta: dict, finish_reason=None) -> bytes:
+            return chunk_frame(body, StubLLMHandler.request_count, delta, finish_reason)
+
+        # no Content-Length: the body ends when the connection closes
+        self.close_connection = True
+        try:
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Connection', 'close')
+            self.end_headers()
+            self.wfile.write(chunk({'role': 'assistant', 'content': ''}))
+            for i, word in enumerate(stream_words(content)):
+                if i and self.token_delay:
+                    time.sleep(self.token_delay)
+                self.wfile.write(chunk({'content': word}))
+                self.wfile.flush()
+            self.wfile.write(chunk({}, finish_reason='stop'))
+            if wants_usage(body):
+                self.wfile.write(chunk_frame(body, StubLLMHandler.request_count, None,
+                                             usage=usage_payload(body, content)))
+            self.wfile.write(b"data: [DONE]\n\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client stopped reading
+
+
+class StubHTTPServer(ThreadingHTTPServer):
+    # the default listen backlog of 5 refuses connections under load tests
+    request_queue_size = 1024
+
+
+def start_stub_server(port: int = 0, latency: float = 0.0, error_rate: float = 0.0,
+                      slow_match: str = None, slow_latency: float = 0.0, token_delay: float = 0.0):
+    """
+    Start the stub in a daemon thread. Returns (server, base_url); call
+    server.shutdown() when done. Port 0 picks a free port.
+    """
+    handler = type('ConfiguredStubLLMHandler', (StubLLMHandler,),
+                   {'latency': latency, 'error_rate': error_rate,
+                    'slow_match': slow_match, 'slow_latency': slow_latency,
+                    'token_delay': token_delay})
+    server = StubHTTPServer(('127.0.0.1', port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8900)
+    parser.add_argument('--latency', type=float, default=0.2, help='seconds added to every response')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of requests answered with 429/503')
+    parser.add_argument('--slow-match', help='system-prompt substring that selects --slow-latency')
+    parser.add_argument('--slow-latency', type=float, default=0.0)
+    parser.add_argument('--token-delay', type=float, default=0.0, help='seconds between streamed words')
+    args = parser.parse_args()
+
+    server, url = start_stub_server(args.port, args.latency, args.error_rate,
+                                    slow_match=args.slow_match, slow_latency=args.slow_latency,
+                                    token_delay=args.token_delay)
+    print(f"Stub LLM listening on {url} (latency={args.latency}s, error_rate={args.error_rate})")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
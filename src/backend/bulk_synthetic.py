@@ -0,0 +1,312 @@
+"""
+Seeded, LLM-free bulk transaction generator for load tests.
+
+synthetic_data_generation.py writes realistic rows at LLM speed; this
+module learns a per-persona model from the existing data/*.csv files and
+samples as many rows as a load test needs, deterministically for a given
+seed, without any network calls.
+
+  • recurring rows (salary, rent) – each simulated user keeps the same few
+    payments (merchant, amount, day of month, time) and receives them every
+    month, as often per month as the persona's data shows
+  • everything else               – a Poisson number of rows per user,
+    bootstrapped from the persona's rows (merchant, category, description,
+    location, account together) with kernel-smoothed amounts and
+    time of day, on uniformly drawn days
+
+Each output file is a run of simulated users over the months the source
+data covers, every user's rows in time order, in the same columns as the
+source CSVs. Rows are sampled and formatted a chunk at a time with NumPy,
+so memory stays flat however many rows are asked for.
+
+Usage:
+    python bulk_synthetic.py --rows 1000000 --seed 7 --out synthetic_bulk
+    python bulk_synthetic.py --rows 10000000 --personas Zen_Zeke --format parquet   # needs pyarrow
+"""
+import argparse
+import csv
+import functools
+import glob
+import importlib.util
+import io
+import math
+import os
+import time
+import zlib
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from transaction_writer import FIELDNAMES
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(HERE, 'data')
+
+RECURRING_CATEGORIES = ('salary', 'rent')
+CHUNK_ROWS = 1_000_000
+DAY = 86400
+
+
+def _bandwidth(values: np.ndarray) -> float:
+    """Silverman's rule of thumb; 0 for fewer than two distinct values."""
+    if len(values) < 2:
+        return 0.0
+    return float(1.06 * values.std() * len(values) ** -0.2)
+
+
+@functools.lru_cache(maxsize=1)
+def _times_of_day() -> np.ndarray:
+    """b'HH:MM:SS' for every second of the day."""
+    stamps = np.datetime_as_string(np.arange(DAY).astype('datetime64[s]')).astype('S19')
+    return stamps.view('S1').reshape(DAY, 19)[:, 11:].copy().view('S8').ravel()
+
+
+def _csv_field(value: str) -> str:
+    buf = io.StringIO()
+    csv.writer(buf, lineterminator='').writerow([value])
+    return buf.getvalue()
+
+
+class PersonaModel:
+    """
+    Per-persona sampling model fitted on one transactions CSV.
+
+    Usage:
+        model = PersonaModel.fit('data/Zen_Zeke.csv')
+        chunk = model.sample(np.random.default_rng(7), users=1000)
+        # chunk = {'timestamps': int64 seconds, 'templates': int64, 'amounts': float64}
+
+    `templates` index the source rows; their Merchant, Description,
+    Location, Category and Account are copied into the generated row.
+    """
+
+    def __init__(self, name: str, rows: pd.DataFrame):
+        self.name = name
+        self.rows = rows.reset_index(drop=True)
+        stamps = pd.to_datetime(self.rows['Timestamp'])
+
+        first, last = stamps.min().to_period('M'), stamps.max().to_period('M')
+        self.month_starts = (np.arange(first.ordinal, last.ordinal + 1).astype('datetime64[M]')
+                             .astype('datetime64[s]').astype(np.int64))
+        month_ends = (np.arange(first.ordinal + 1, last.ordinal + 2).astype('datetime64[M]')
+                      .astype('datetime64[s]').astype(np.int64))
+        self.month_days = (month_ends - self.month_starts) // DAY
+        self.days = int(self.month_days.sum())
+
+        self.amounts = self.rows['Amount'].to_numpy(dtype=np.float64)
+        self.time_of_day = (stamps.dt.hour * 3600 + stamps.dt.minute * 60 + stamps.dt.second).to_numpy(np.int64)
+        self.day_of_month = stamps.dt.day.to_numpy(np.int64)
+        categories = self.rows['Category'].str.lower().to_numpy()
+
+        # recurring: (template indices, mean payments per user per month)
+        self.recurring: Dict[str, tuple] = {}
+        for category in RECURRING_CATEGORIES:
+            idx = np.flatnonzero(categories == category)
+            if len(idx):
+                self.recurring[category] = (idx, len(idx) / len(self.month_starts))
+
+        self.discretionary = np.flatnonzero(~np.isin(categories, RECURRING_CATEGORIES))
+        self.rate = len(self.discretionary) / self.days   # rows per user per day
+        self.tod_bandwidth = _bandwidth(self.time_of_day[self.discretionary])
+
+        # log-amount kernel bandwidth per row, from the spread within its category
+        log_amounts = np.log(np.abs(self.amounts) + 0.01)
+        self.amount_bandwidth = np.zeros(len(self.rows))
+        for category in np.unique(categories[self.discretionary]):
+            idx = self.discretionary[categories[self.discretionary] == category]
+            self.amount_bandwidth[idx] = _bandwidth(log_amounts[idx])
+
+        self.rows_per_user = self.rate * self.days + sum(
+            per_month for _, per_month in self.recurring.values()) * len(self.month_starts)
+        # rows are ordered by one packed int64 key: user | seconds into the period | template
+        self.template_bits = max(1, len(self.rows) - 1).bit_length()
+        self.max_users = (1 << 62) // ((self.days * DAY) << self.template_bits)
+
+    @classmethod
+    def fit(cls, path: str) -> 'PersonaModel':
+        rows = pd.read_csv(path, dtype={f: str for f in FIELDNAMES if f != 'Amount'}, keep_default_na=False)
+        return cls(os.path.splitext(os.path.basename(path))[0], rows[FIELDNAMES])
+
+    def sample(self, rng: np.random.Generator, users: int) -> Dict[str, np.ndarray]:
+        """Rows for `users` simulated users, grouped by user and in time order within each."""
+        if users > self.max_users:
+            raise ValueError(f"at most {self.max_users} users per chunk for {self.name}")
+        span = self.days * DAY
+        period = self.month_starts - self.month_starts[0]
+        keys = []
+
+        for templates, per_month in self.recurring.values():
+            # each user keeps the same floor/ceil(per_month) payments every month
+            picks = rng.choice(templates, size=(users, math.ceil(per_month), 1))
+            kept = np.arange(picks.shape[1]) < (per_month // 1 + (rng.random(users) < per_month % 1))[:, None]
+            day = np.minimum(self.day_of_month[picks], self.month_days) - 1
+            offsets = period + day * DAY + self.time_of_day[picks]
+            user_keys = ((np.arange(users)[:, None, None] * span + offsets) << self.template_bits) | picks
+            keys.append(user_keys[kept].ravel())
+
+        if len(self.discretionary):
+            counts = rng.poisson(self.rate * self.days, users)
+            n = int(counts.sum())
+            templates = rng.choice(self.discretionary, n)
+            tod = self.time_of_day[templates] + np.rint(rng.normal(0, self.tod_bandwidth, n) / 60).astype(np.int64) * 60
+            offsets = rng.integers(0, self.days, n) * DAY + np.clip(tod, 0, DAY - 1)
+            keys.append(((np.repeat(np.arange(users) * span, counts) + offsets) << self.template_bits) | templates)
+
+        keys = np.sort(np.concatenate(keys))
+        templates = keys & ((1 << self.template_bits) - 1)
+        stamps = self.month_starts[0] + (keys >> self.template_bits) % span
+        # amount noise is drawn per row after sorting; recurring templates have zero bandwidth
+        noise = np.exp(rng.normal(0, 1, len(keys)) * self.amount_bandwidth[templates])
+        return {'timestamps': stamps, 'templates': templates, 'amounts': np.round(self.amounts[templates] * noise, 2)}
+
+
+def fit_personas(data_dir: str = DATA_DIR, names: Optional[Iterable[str]] = None) -> Dict[str, PersonaModel]:
+    paths = sorted(glob.glob(os.path.join(data_dir, '*.csv')))
+    if names is not None:
+        wanted = set(names)
+        paths = [p for p in paths if os.path.splitext(os.path.basename(p))[0] in wanted]
+    return {model.name: model for model in map(PersonaModel.fit, paths)}
+
+
+# ────────────────────────────────────────────────────────────────
+# Writers: one chunk of sampled rows at a time
+# ────────────────────────────────────────────────────────────────
+class CsvSink:
+    """
+    Formats whole chunks as byte strings with NumPy: every field is a lookup
+    into a small table (calendar days of the period, seconds of the day,
+    euro amounts, cents, and the pre-quoted text columns of each template)
+    and the pieces are joined with np.char.add. Rows come out NUL-padded
+    to a common width; the padding is dropped before writing.
+    """
+
+    def __init__(self, path: str, model: PersonaModel):
+        rows = model.rows
+        self.first_day = model.month_starts[0] // DAY
+        self.days = np.char.add(np.datetime_as_string((self.first_day + np.arange(model.days)).astype('datetime64[D]'))
+                                .astype('S'), b' ')
+        self.times = _times_of_day()
+        self.cents = np.array([b'.%02d' % c for c in range(100)])
+        self.euros = self._euro_table(1000)
+        self.prefix = np.char.encode([',' + _csv_field(m) + ',' for m in rows['Merchant']], 'utf-8')
+        self.suffix = np.char.encode([''.join(',' + _csv_field(row[f]) for f in FIELDNAMES[3:]) + '\n'
+                                      for row in rows.to_dict('records')], 'utf-8')
+        self.fh = open(path, 'wb')
+        self.fh.write((','.join(FIELDNAMES) + '\n').encode())
+
+    @staticmethod
+    def _euro_table(size: int) -> np.ndarray:
+        """'0'..'size-1' followed by '-0'..'-(size-1)'."""
+        euros = np.arange(size).astype(f'S{len(str(size))}')
+        return np.concatenate([euros, np.char.add(b'-', euros)])
+
+    def write(self, chunk: Dict[str, np.ndarray]) -> None:
+        stamps, templates = chunk['timestamps'], chunk['templates']
+        cents = np.rint(chunk['amounts'] * 100).astype(np.int64)
+        whole, fraction = np.divmod(np.abs(cents), 100)
+        size = len(self.euros) // 2
+        if len(whole) and whole.max() >= size:
+            size = int(whole.max()) * 2
+            self.euros = self._euro_table(size)
+
+        lines = np.char.add(self.days[stamps // DAY - self.first_day], self.times[stamps % DAY])
+        lines = np.char.add(lines, self.prefix[templates])
+        lines = np.char.add(lines, self.euros[whole + (cents < 0) * size])
+        lines = np.char.add(lines, self.cents[fraction])
+        lines = np.char.add(lines, self.suffix[templates])
+        buf = lines.view(np.uint8)
+        self.fh.write(buf[buf != 0].tobytes())
+
+    def close(self) -> None:
+        self.fh.close()
+
+
+class ParquetSink:
+    """One row group per chunk; the text columns are dictionary-encoded against the templates."""
+
+    def __init__(self, path: str, model: PersonaModel):
+        if importlib.util.find_spec('pyarrow') is None:
+            raise RuntimeError("Parquet output needs pyarrow (pip install pyarrow); use --format csv")
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.pa = pa
+        self.dictionaries = {f: pa.array(model.rows[f].tolist(), pa.string()) for f in FIELDNAMES if f not in ('Timestamp', 'Amount')}
+        self.schema = pa.schema([(f, pa.timestamp('s') if f == 'Timestamp' else pa.float64() if f == 'Amount'
+                                  else pa.dictionary(pa.int32(), pa.string())) for f in FIELDNAMES])
+        self.writer = pq.ParquetWriter(path, self.schema)
+
+    def write(self, chunk: Dict[str, np.ndarray]) -> None:
+        pa = self.pa
+        indices = pa.array(chunk['templates'].astype(np.int32))
+        columns = {
+            'Timestamp': pa.array(chunk['timestamps'].astype('datetime64[s]')),
+            'Amount': pa.array(chunk['amounts']),
+            **{f: pa.DictionaryArray.from_arrays(indices, values) for f, values in self.dictionaries.items()},
+        }
+        self.writer.write_table(pa.table([columns[f] for f in FIELDNAMES], schema=self.schema))
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+SINKS = {'csv': CsvSink, 'parquet': ParquetSink}
+
+
+def generate(model: PersonaModel, rows: int, path: str, fmt: str = 'csv', seed: int = 0,
+             chunk_rows: int = CHUNK_ROWS) -> int:
+    """
+    Write exactly `rows` generated rows for one persona to `path`. The
+    random stream is seeded from (seed, persona name), so the same
+    arguments give byte-identical files and personas don't shift when
+    others are added or left out.
+    """
+    rng = np.random.default_rng([seed, zlib.crc32(model.name.encode())])
+    rows_per_user = max(model.rows_per_user, 1e-9)
+    sink = SINKS[fmt](path, model)
+    written = 0
+    try:
+        while written < rows:
+            # a little over what is left, so the last chunk rarely needs a top-up
+            users = max(1, int(min(chunk_rows, (rows - written) * 1.05 + 2 * rows_per_user) / rows_per_user))
+            chunk = model.sample(rng, users)
+            take = min(rows - written, len(chunk['templates']))
+            sink.write({k: v[:take] for k, v in chunk.items()})
+            written += take
+    finally:
+        sink.close()
+    return written
+
+
+def generate_all(rows: int, out_dir: str, fmt: str = 'csv', seed: int = 0, data_dir: str = DATA_DIR,
+                 personas: Optional[Iterable[str]] = None) -> List[str]:
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for name, model in fit_personas(data_dir, personas).items():
+        path = os.path.join(out_dir, f"{name}.{fmt}")
+        start = time.perf_counter()
+        generate(model, rows, path, fmt, seed)
+        elapsed = time.perf_counter() - start
+        print(f"• {name}: {rows:,} rows in {elapsed:.2f}s ({rows / elapsed:,.0f} rows/s) → {path}", flush=True)
+        paths.append(path)
+    return paths
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate synthetic transactions from the persona CSVs, without an LLM")
+    parser.add_argument('--rows', type=int, default=100_000, help='rows per persona')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--format', choices=sorted(SINKS), default='csv')
+    parser.add_argument('--out', default='synthetic_bulk', help='output directory')
+    parser.add_argument('--data', default=DATA_DIR, help='directory of persona CSVs to learn from')
+    parser.add_argument('--personas', nargs='*', help='file names without .csv (default: all)')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    paths = generate_all(args.rows, args.out, args.format, args.seed, args.data, args.personas)
+    print(f"\n✅  {args.rows * len(paths):,} rows in {len(paths)} file(s), {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
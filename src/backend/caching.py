@@ -0,0 +1,213 @@
+"""
+Small in-process caches shared by the backend services.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+
+class LRUCache:
+    """
+    Thread-safe LRU cache with an optional per-entry TTL.
+
+    Keeps hit/miss/eviction counters so callers can report how well the
+    cache is doing. Entries are stamped with wall-clock time so they can
+    be persisted and restored across restarts without losing their age.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: Optional[float] = None):
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _expired(self, stored_at: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - stored_at > self.ttl_seconds
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and self._expired(entry[1], time.time()):
+                del self._data[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key: Hashable, value: Any, stored_at: Optional[float] = None) -> None:
+        with self._lock:
+            self._data[key] = (value, time.time() if stored_at is None else stored_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.pop(key, None)
+            return default if entry is None else entry[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            entry = self._data.get(key)
+            return entry is not None and not self._expired(entry[1], time.time())
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def entries(self) -> List[Tuple[Hashable, Any, float]]:
+        """Snapshot of (key, value, stored_at), least recently used first."""
+        with self._lock:
+            now = time.time()
+            return [(k, v, ts) for k, (v, ts) in self._data.items()
+                    if not self._expired(ts, now)]
+
+    def load_entries(self, entries: Iterable[Tuple[Hashable, Any, float]]) -> None:
+        """Bulk-insert entries produced by `entries()`, dropping expired ones."""
+        with self._lock:
+            now = time.time()
+            for key, value, stored_at in entries:
+                if not self._expired(stored_at, now):
+                    self.set(key, value, stored_at=stored_at)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'hits':        self.hits,
+            'misses':      self.misses,
+            'evictions':   self.evictions,
+            'size':        len(self._data),
+            'max_entries': self.max_entries,
+            'hit_ratio':   round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class TieredCache:
+    """
+    LRUCache in memory with an optional on-disk tier (one JSON file per
+    key in `directory`). Memory misses fall through to disk and are
+    promoted back into memory on a disk hit. Values must be JSON-serializable
+    and keys must be filesystem-safe strings (e.g. hex digests).
+
+    The disk tier holds at most `max_disk_entries` files: when a write goes
+    over, the least recently written files are deleted. Expired files are
+    deleted when a read finds them.
+    """
+
+    def __init__(self, max_entries: int = 256, directory: Optional[str] = None,
+                 ttl_seconds: Optional[float] = None, max_disk_entries: int = 4096):
+        if max_disk_entries <= 0:
+            raise ValueError("max_disk_entries must be positive")
+        self.memory = LRUCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        self.max_disk_entries = max_disk_entries
+        self.disk_hits = 0
+        self.disk_evictions = 0
+        self._disk_lock = threading.Lock()
+        self._disk_entries = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self._disk_entries = len(self._disk_files())
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _disk_files(self) -> List[str]:
+        return [os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith('.json')]
+
+    def _remove(self, path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            return
+        with self._disk_lock:
+            self._disk_entries -= 1
+            self.disk_evictions += 1
+
+    def _prune_disk(self) -> None:
+        """Delete the least recently written files until max_disk_entries remain."""
+        by_age = []
+        for path in self._disk_files():
+            try:
+                by_age.append((os.path.getmtime(path), path))
+            except OSError:
+                pass
+        by_age.sort()
+        with self._disk_lock:
+            self._disk_entries = len(by_age)
+        for _, path in by_age[:max(len(by_age) - self.max_disk_entries, 0)]:
+            self._remove(path)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self.memory.get(key)
+        if value is not None or not self.directory:
+            return default if value is None else value
+        try:
+            with open(self._path(key), encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return default
+        if self.ttl_seconds is not None and time.time() - entry['stored_at'] > self.ttl_seconds:
+            self._remove(self._path(key))
+            return default
+        self.disk_hits += 1
+        self.memory.set(key, entry['value'], stored_at=entry['stored_at'])
+        return entry['value']
+
+    def set(self, key: str, value: Any) -> None:
+        self.memory.set(key, value)
+        if not self.directory:
+            return
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'stored_at': time.time(), 'value': value}, f, ensure_ascii=False)
+            new = not os.path.exists(path)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Could not write cache entry {key} to disk: {e}")
+            return
+        if new:
+            with self._disk_lock:
+                self._disk_entries += 1
+                over = self._disk_entries > self.max_disk_entries
+            if over:
+                self._prune_disk()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self.memory.stats()
+        # memory misses that were answered from disk count as hits overall
+        lookups = stats['hits'] + stats['misses']
+        hits = stats['hits'] + self.disk_hits
+        stats.update({
+            'disk_hits': self.disk_hits,
+            'disk_entries': self._disk_entries,
+            'disk_evictions': self.disk_evictions,
+            'hit_ratio': round(hits / lookups, 4) if lookups else 0.0,
+        })
+        return stats
+
+
+def fingerprint(value: Any, version: str = '') -> str:
+    """Stable sha256 hex digest of a JSON-serializable value plus a version tag."""
+    h = hashlib.sha256(version.encode('utf-8'))
+    h.update(json.dumps(value, sort_keys=True, separators=(',', ':'), default=str).encode('utf-8'))
+    return h.hexdigest()
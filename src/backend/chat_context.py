@@ -0,0 +1,177 @@
+"""
+Token-budgeted transaction context for the /api/chat system prompt.
+
+Instead of pasting the whole history into every prompt, build_chat_context
+fills a fixed token budget in priority order: aggregates, then the rows
+relevant to the question, then recent rows. It comes in two parts:
+  • stable – the aggregates from analyze_transactions plus a short tail of
+    the `recent_rows` newest rows, capped at `stable_tokens`. It depends
+    only on the transactions, so it is byte-identical across questions and
+    can sit in the cached prompt prefix (build it once per transaction set
+    with build_stable_context). The tail is kept small on purpose: rows in
+    the stable part are spent before any relevance matching, so they come
+    out of the budget for rows that answer the question
+  • per-request – rows relevant to the user's message (a month, date,
+    merchant or category it mentions), newest first, then the next most
+    recent rows, until the rest of the budget runs out
+Tokens are estimated at ~4 characters each, which is close enough for
+budgeting without pulling in a tokenizer.
+"""
+import calendar
+import json
+import re
+import time
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+# Configuration defaults
+default_limits = {
+    'chat_context_tokens': 3000,
+    'chat_context_stable_tokens': 1500,
+    'chat_context_recent_rows': 10
+}
+
+MONTH_NUMBERS = {name.lower(): f"{i:02d}" for i, name in enumerate(calendar.month_name) if name}
+MONTH_NUMBERS.update({name.lower(): f"{i:02d}" for i, name in enumerate(calendar.month_abbr) if name})
+
+_DATE_RE = re.compile(r"\b(\d{4})(?:-(\d{2})(?:-(\d{2}))?)?\b")
+_WORD_RE = re.compile(r"[a-z0-9']+")
+_NAME_RE = re.compile(r"[A-Za-z]+")
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + 3) // 4
+
+
+def format_transaction(txn: Dict) -> str:
+    return (f"{txn['timestamp']} | {txn['merchant']} | €{txn['amount']:.2f} | "
+            f"{txn['category']} | {txn['description']} | {txn['location']}\n")
+
+
+def format_insights(insights: Dict) -> str:
+    if not insights:
+        return ""
+    return (
+        "SUMMARY INSIGHTS:\n"
+        f"Total spent: €{insights['total_spent']:.2f}\n"
+        f"Total income: €{insights['total_income']:.2f}\n"
+        f"Category breakdown: {json.dumps(insights['category_percentage'])}\n"
+        f"Top merchants: {json.dumps(insights['top_merchants'])}\n"
+        f"Monthly spending: {json.dumps(insights['monthly_trend'])}\n"
+    )
+
+
+def _date_prefixes(message: str) -> Set[str]:
+    """Timestamp prefixes ('2025', '2025-04', '-04-', '2025-04-07') mentioned in the message."""
+    prefixes = set()
+    for year, month, day in _DATE_RE.findall(message):
+        prefixes.add("-".join(p for p in (year, month, day) if p))
+    for word in _NAME_RE.findall(message):
+        month = MONTH_NUMBERS.get(word.lower())
+        # "may" is usually the verb; only the capitalised form counts as a month
+        if month and (word.lower() != 'may' or word == 'May'):
+            prefixes.add(f"-{month}-")
+    return prefixes
+
+
+def _is_relevant(txn: Dict, text: str, words: Set[str], dates: Set[str]) -> bool:
+    day = txn['timestamp'][:10]
+    for d in dates:
+        if (d.startswith('-') and day[4:8] == d) or day.startswith(d):
+            return True
+    merchant = txn['merchant'].lower()
+    if merchant and (merchant in text or any(w in words for w in merchant.split() if len(w) > 3)):
+        return True
+    category = txn['category'].lower()
+    return bool(category) and (category in words or category.rstrip('s') in words or category in text)
+
+
+class StableContext(NamedTuple):
+    text: str
+    rows: FrozenSet[int]        # indices into the transactions it was built from
+    tokens: int
+    newest_first: Tuple[int, ...]
+
+
+def _newest_first(transactions: Sequence[Dict]) -> Tuple[int, ...]:
+    return tuple(sorted(range(len(transactions)), key=lambda i: transactions[i]['timestamp'], reverse=True))
+
+
+def build_stable_context(transactions: Sequence[Dict], insights: Dict,
+                         max_tokens: int = default_limits['chat_context_stable_tokens'],
+                         recent_rows: int = default_limits['chat_context_recent_rows']) -> StableContext:
+    """The message-independent part of the context: summary plus up to `recent_rows` newest rows that fit."""
+    newest_first = _newest_first(transactions)
+    summary = format_insights(insights)
+    used = estimate_tokens(summary)
+    chosen: List[int] = []
+    parts: List[str] = []
+    for i in newest_first[:recent_rows]:
+        line = format_transaction(transactions[i])
+        cost = estimate_tokens(line)
+        if used + cost > max_tokens:
+            break
+        used += cost
+        chosen.append(i)
+        parts.append(line)
+
+    header = f"RECENT TRANSACTIONS ({len(chosen)} most recent of {len(transactions)}):\n"
+    text = (summary + "\n" if summary else "") + header + "".join(parts)
+    return StableContext(text, frozenset(chosen), estimate_tokens(text), newest_first)
+
+
+def build_chat_context(transactions: Sequence[Dict], message: str, insights: Dict,
+                       max_tokens: int = default_limits['chat_context_tokens'],
+                       stable_tokens: int = default_limits['chat_context_stable_tokens'],
+                       recent_rows: int = default_limits['chat_context_recent_rows'],
+                       stable: Optional[StableContext] = None) -> Tuple[str, str, Dict]:
+    """
+    Returns (stable context, per-request context, info) where info has the
+    estimated token counts, how many rows were included (and how many of
+    those matched the message), and the build time in ms. Pass `stable`
+    (from build_stable_context) to reuse it instead of rebuilding it.
+    """
+    start = time.perf_counter()
+    if stable is None:
+        stable = build_stable_context(transactions, insights, min(stable_tokens, max_tokens), recent_rows)
+    text = message.lower()
+    words = set(_WORD_RE.findall(text))
+    dates = _date_prefixes(message)
+
+    used = stable.tokens
+    newest_first = [i for i in stable.newest_first if i not in stable.rows]
+    # Lazy, so matching stops as soon as the budget is full
+    relevant = (i for i in newest_first if _is_relevant(transactions[i], text, words, dates))
+
+    chosen: List[int] = []
+    parts: List[str] = []
+    taken = set()
+    relevant_rows = 0
+    for pool in (relevant, newest_first):
+        for i in pool:
+            if i in taken:
+                continue
+            line = format_transaction(transactions[i])
+            cost = estimate_tokens(line)
+            if used + cost > max_tokens:
+                break
+            used += cost
+            taken.add(i)
+            chosen.append(i)
+            parts.append(line)
+        if pool is relevant:
+            relevant_rows = len(chosen)
+
+    request_context = ""
+    if chosen:
+        request_context = (f"MORE TRANSACTIONS ({len(chosen)} shown, those relevant to the question first):\n"
+                           + "".join(parts))
+
+    info = {
+        'tokens':        stable.tokens + estimate_tokens(request_context),
+        'stable_tokens': stable.tokens,
+        'rows':          len(stable.rows) + len(chosen),
+        'relevant_rows': relevant_rows,
+        'total_rows':    len(transactions),
+        'build_ms':      round((time.perf_counter() - start) * 1000, 2),
+    }
+    return stable.text, request_context, info
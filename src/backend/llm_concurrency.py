@@ -0,0 +1,173 @@
+"""
+Helpers for fanning LLM calls out concurrently without hammering the endpoint.
+
+  • bounded_map     – run a function over items on a bounded thread pool,
+                      returning results in input order
+  • gather_with_timeout – the same, but give up on items still running
+                      after a deadline instead of waiting for them
+  • TokenBucket     – per-endpoint request rate limiter
+  • call_with_retry – retry 429 / 5xx / connection errors with jittered
+                      exponential backoff
+"""
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+# Configuration defaults
+default_limits = {
+    'max_in_flight': 8,
+    'requests_per_second': 10.0,
+    'burst': 10,
+    'max_retries': 5,
+    'backoff_base_seconds': 0.5,
+    'backoff_max_seconds': 30.0,
+}
+
+
+class TokenBucket:
+    """
+    Classic token bucket: `rate` tokens are added per second up to
+    `capacity`; every request takes one token and blocks until one is free.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Block until `tokens` are available; returns the time spent waiting."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                delay = (tokens - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+_rate_limiters: Dict[str, TokenBucket] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(endpoint: str,
+                     rate: float = default_limits['requests_per_second'],
+                     capacity: Optional[float] = default_limits['burst']) -> TokenBucket:
+    """Return the shared TokenBucket for `endpoint` (e.g. a base URL), creating it on first use."""
+    with _rate_limiters_lock:
+        bucket = _rate_limiters.get(endpoint)
+        if bucket is None:
+            bucket = _rate_limiters[endpoint] = TokenBucket(rate, capacity)
+        return bucket
+
+
+def is_retryable(exc: Exception) -> bool:
+    """429s, 5xx responses, timeouts and dropped connections are worth retrying."""
+    status = getattr(exc, 'status_code', None)
+    if status is not None:
+        return status == 429 or status >= 500
+    # openai.APIConnectionError / APITimeoutError carry no status code
+    return type(exc).__name__ in ('APIConnectionError', 'APITimeoutError', 'ConnectionError', 'TimeoutError')
+
+
+def _retry_after(exc: Exception) -> Optional[float]:
+    response = getattr(exc, 'response', None)
+    headers = getattr(response, 'headers', None) or {}
+    try:
+        return float(headers.get('retry-after'))
+    except (TypeError, ValueError):
+        return None
+
+
+def call_with_retry(fn: Callable, *args,
+                    rate_limiter: Optional[TokenBucket] = None,
+                    max_retries: int = default_limits['max_retries'],
+                    base_delay: float = default_limits['backoff_base_seconds'],
+                    max_delay: float = default_limits['backoff_max_seconds'],
+                    retry_on: Callable[[Exception], bool] = is_retryable,
+                    **kwargs) -> Any:
+    """
+    Call fn(*args, **kwargs), taking a rate-limiter token before every
+    attempt. Errors for which retry_on(exc) is true (by default 429 / 5xx /
+    connection errors) are retried with "full jitter" backoff (a random
+    delay up to base * 2^attempt, capped at max_delay), honouring a
+    Retry-After header when the server sends one.
+    """
+    for attempt in range(max_retries + 1):
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+        try:
+            return fn(*args, **kwargs)
+        except Exception as exc:
+            if attempt >= max_retries or not retry_on(exc):
+                raise
+            delay = _retry_after(exc)
+            if delay is None:
+                delay = random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+            print(f"LLM call failed ({exc.__class__.__name__}), retry {attempt + 1}/{max_retries} in {delay:.2f}s")
+            time.sleep(delay)
+
+
+def bounded_map(fn: Callable, items: Iterable,
+                max_workers: int = default_limits['max_in_flight'],
+                return_exceptions: bool = False) -> List:
+    """
+    Apply fn to every item with at most `max_workers` calls in flight.
+    Results come back in input order. With return_exceptions=True a
+    failing item yields its exception instead of aborting the whole map.
+    """
+    items = list(items)
+    if not items:
+        return []
+
+    def run(item):
+        try:
+            return fn(item)
+        except Exception as exc:
+            if return_exceptions:
+                return exc
+            raise
+
+    if max_workers <= 1 or len(items) == 1:
+        return [run(item) for item in items]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as pool:
+        return list(pool.map(run, items))
+
+
+def gather_with_timeout(fn: Callable, items: Iterable, timeout: float,
+                        max_workers: int = default_limits['max_in_flight']) -> List:
+    """
+    Run fn over items concurrently and return within `timeout` seconds.
+    Results come back in input order; an item that raised yields its
+    exception and one still running at the deadline yields a TimeoutError.
+    Abandoned calls keep running in the background until they finish, so
+    fn should carry its own request timeout as well.
+    """
+    items = list(items)
+    if not items:
+        return []
+    pool = ThreadPoolExecutor(max_workers=min(max_workers, len(items)))
+    futures = [pool.submit(fn, item) for item in items]
+    done, _ = wait(futures, timeout=timeout)
+    pool.shutdown(wait=False, cancel_futures=True)
+
+    results = []
+    for future in futures:
+        if future not in done:
+            results.append(TimeoutError(f"no result within {timeout:g}s"))
+        elif future.exception() is not None:
+            results.append(future.exception())
+        else:
+            results.append(future.result())
+    return results
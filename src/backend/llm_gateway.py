@@ -0,0 +1,266 @@
+"""
+One pooled HTTP client per process for every OpenAI-compatible LLM call.
+
+Every module used to build its own OpenAI() client, and each client got
+its own connection pool with the SDK defaults (5 s keep-alive, 600 s
+read timeout), so a burst after a short pause paid a fresh TLS handshake
+per connection. Everything now goes through here:
+
+  • get_client       – OpenAI client for a base URL / key, sharing one
+                       httpx connection pool with every other client
+  • get_async_client – the same for AsyncOpenAI (asgi_app.py)
+  • record_usage     – feed a completion's usage in, to track how many
+                       prompt tokens the provider served from its
+                       prefix cache (usage.prompt_tokens_details.cached_tokens)
+  • stats            – requests, connections opened vs reused,
+                       time-to-response-headers latency and prompt caching
+
+Response latency and token counts also go to the telemetry histograms and
+counters behind /metrics (see telemetry.py).
+
+Pool size, keep-alive, timeouts, retries and HTTP/2 come from
+default_limits, overridable with the LLM_* environment variables below.
+HTTP/2 needs the optional `h2` package; without it we stay on HTTP/1.1.
+httpx and the openai SDK are imported with the first client, so importing
+this module (and every app that does) stays cheap.
+"""
+import importlib.util
+import os
+import threading
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Dict, Optional
+
+import telemetry
+
+if TYPE_CHECKING:
+    import httpx
+    from openai import AsyncOpenAI, OpenAI
+
+# Configuration defaults
+default_limits = {
+    'max_connections': 100,
+    'max_keepalive_connections': 50,
+    'keepalive_expiry_seconds': 60.0,
+    'connect_timeout_seconds': 5.0,
+    'read_timeout_seconds': 120.0,
+    'max_retries': 2,
+    'http2': False,
+}
+
+MAX_CONNECTIONS = int(os.getenv('LLM_MAX_CONNECTIONS', default_limits['max_connections']))
+MAX_KEEPALIVE_CONNECTIONS = int(os.getenv('LLM_MAX_KEEPALIVE_CONNECTIONS',
+                                          default_limits['max_keepalive_connections']))
+KEEPALIVE_EXPIRY_SECONDS = float(os.getenv('LLM_KEEPALIVE_EXPIRY_SECONDS',
+                                           default_limits['keepalive_expiry_seconds']))
+CONNECT_TIMEOUT_SECONDS = float(os.getenv('LLM_CONNECT_TIMEOUT_SECONDS',
+                                          default_limits['connect_timeout_seconds']))
+READ_TIMEOUT_SECONDS = float(os.getenv('LLM_READ_TIMEOUT_SECONDS', default_limits['read_timeout_seconds']))
+MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', default_limits['max_retries']))
+HTTP2 = os.getenv('LLM_HTTP2', str(default_limits['http2'])).lower() == 'true'
+
+response_seconds = telemetry.histogram('llm_response_seconds',
+                                       'Time from sending an LLM request to its response headers')
+tokens = telemetry.counter('llm_tokens_total', 'LLM tokens per usage label and kind (prompt, cached, completion)')
+
+
+class GatewayMetrics:
+    """
+    Counters fed by httpx event hooks and the httpcore trace extension.
+    A request counts as reused when it went out without opening a new
+    connection first.
+    """
+
+    def __init__(self, window: int = 2048):
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)
+        self.requests = 0
+        self.responses = 0
+        self.connections_opened = 0
+        self.connections_reused = 0
+        self.tls_handshakes = 0
+        self._usage: Dict[str, Dict[str, int]] = {}
+
+    def on_request(self, request: 'httpx.Request', is_async: bool = False) -> None:
+        state = {'start': time.perf_counter(), 'connected': False}
+
+        def trace(event: str, info: Dict) -> None:
+            if event == 'connection.connect_tcp.complete':
+                state['connected'] = True
+                with self._lock:
+                    self.connections_opened += 1
+            elif event == 'connection.start_tls.complete':
+                with self._lock:
+                    self.tls_handshakes += 1
+
+        async def atrace(event: str, info: Dict) -> None:
+            trace(event, info)
+
+        # httpcore insists on a coroutine callback for async clients
+        request.extensions['trace'] = atrace if is_async else trace
+        request.extensions['llm_gateway'] = state
+        with self._lock:
+            self.requests += 1
+
+    def on_response(self, response: 'httpx.Response') -> None:
+        state = response.request.extensions.get('llm_gateway')
+        if state is None:
+            return
+        elapsed_ms = (time.perf_counter() - state['start']) * 1000
+        with self._lock:
+            self.responses += 1
+            if not state['connected']:
+                self.connections_reused += 1
+            self._latencies.append(elapsed_ms)
+        response_seconds.observe(elapsed_ms / 1000, status=response.status_code)
+
+    def record_usage(self, usage, label: str = 'default') -> None:
+        if usage is None:
+            return  # provider did not report usage
+        details = getattr(usage, 'prompt_tokens_details', None)
+        cached = getattr(details, 'cached_tokens', None) or 0
+        prompt = usage.prompt_tokens or 0
+        completion = getattr(usage, 'completion_tokens', None) or 0
+        with self._lock:
+            totals = self._usage.setdefault(label, {'completions': 0, 'prompt_tokens': 0, 'cached_tokens': 0,
+                                                    'completion_tokens': 0, 'completions_with_cache_hit': 0})
+            totals['completions'] += 1
+            totals['prompt_tokens'] += prompt
+            totals['cached_tokens'] += cached
+            totals['completion_tokens'] += completion
+            totals['completions_with_cache_hit'] += 1 if cached else 0
+        tokens.inc(prompt, label=label, kind='prompt')
+        tokens.inc(cached, label=label, kind='cached')
+        tokens.inc(completion, label=label, kind='completion')
+
+    def prompt_cache_stats(self) -> Dict:
+        with self._lock:
+            return {
+                label: {**totals, 'cached_ratio': round(totals['cached_tokens'] / totals['prompt_tokens'], 4)
+                        if totals['prompt_tokens'] else 0.0}
+                for label, totals in self._usage.items()
+            }
+
+    def stats(self) -> Dict:
+        prompt_cache = self.prompt_cache_stats()
+        with self._lock:
+            latencies = sorted(self._latencies)
+            sent = self.connections_opened + self.connections_reused
+
+            def pct(p):
+                return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 1) if latencies else None
+
+            return {
+                'requests':           self.requests,
+                'responses':          self.responses,
+                'connections_opened': self.connections_opened,
+                'connections_reused': self.connections_reused,
+                'tls_handshakes':     self.tls_handshakes,
+                'reuse_ratio':        round(self.connections_reused / sent, 4) if sent else 0.0,
+                'latency_ms':         {'p50': pct(0.50), 'p95': pct(0.95), 'p99': pct(0.99),
+                                       'window': len(latencies)},
+                'prompt_cache':       prompt_cache,
+            }
+
+
+metrics = GatewayMetrics()
+
+
+def _http2_enabled() -> bool:
+    if HTTP2 and importlib.util.find_spec('h2') is None:
+        print("LLM_HTTP2 is set but the h2 package is not installed; using HTTP/1.1")
+        return False
+    return HTTP2
+
+
+def _pool_settings() -> Dict:
+    import httpx
+    return {
+        'limits': httpx.Limits(max_connections=MAX_CONNECTIONS,
+                               max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                               keepalive_expiry=KEEPALIVE_EXPIRY_SECONDS),
+        'timeout': httpx.Timeout(READ_TIMEOUT_SECONDS, connect=CONNECT_TIMEOUT_SECONDS),
+        'http2': _http2_enabled(),
+    }
+
+
+async def _on_request_async(request: 'httpx.Request') -> None:
+    metrics.on_request(request, is_async=True)
+
+
+async def _on_response_async(response: 'httpx.Response') -> None:
+    metrics.on_response(response)
+
+
+_lock = threading.Lock()
+_http_client: Optional['httpx.Client'] = None
+_async_http_client: Optional['httpx.AsyncClient'] = None
+_clients: Dict[tuple, object] = {}
+
+
+def _shared_http_client() -> 'httpx.Client':
+    global _http_client
+    if _http_client is None:
+        from openai import DefaultHttpxClient
+        _http_client = DefaultHttpxClient(
+            event_hooks={'request': [metrics.on_request], 'response': [metrics.on_response]},
+            **_pool_settings()
+        )
+    return _http_client
+
+
+def _shared_async_http_client() -> 'httpx.AsyncClient':
+    global _async_http_client
+    if _async_http_client is None:
+        from openai import DefaultAsyncHttpxClient
+        _async_http_client = DefaultAsyncHttpxClient(
+            event_hooks={'request': [_on_request_async], 'response': [_on_response_async]},
+            **_pool_settings()
+        )
+    return _async_http_client
+
+
+def get_client(base_url: Optional[str] = None, api_key: Optional[str] = None) -> 'OpenAI':
+    """
+    Shared OpenAI client for base_url / api_key (None = the SDK's own
+    environment defaults, OPENAI_BASE_URL / OPENAI_API_KEY). Callers that
+    do their own retrying should use .with_options(max_retries=0), which
+    keeps the shared pool.
+    """
+    key = ('sync', base_url, api_key)
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            from openai import OpenAI
+            client = _clients[key] = OpenAI(base_url=base_url, api_key=api_key, max_retries=MAX_RETRIES,
+                                            http_client=_shared_http_client())
+        return client
+
+
+def get_async_client(base_url: Optional[str] = None, api_key: Optional[str] = None) -> 'AsyncOpenAI':
+    """AsyncOpenAI counterpart of get_client. Use it from one event loop per process."""
+    key = ('async', base_url, api_key)
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            from openai import AsyncOpenAI
+            client = _clients[key] = AsyncOpenAI(base_url=base_url, api_key=api_key, max_retries=MAX_RETRIES,
+                                                 http_client=_shared_async_http_client())
+        return client
+
+
+def record_usage(usage, label: str = 'default') -> None:
+    """Count a completion's prompt / cached-prompt / completion tokens under `label` (e.g. 'chat', 'persona')."""
+    metrics.record_usage(usage, label)
+
+
+def stats() -> Dict:
+    settings = {
+        'max_connections':           MAX_CONNECTIONS,
+        'max_keepalive_connections': MAX_KEEPALIVE_CONNECTIONS,
+        'keepalive_expiry_seconds':  KEEPALIVE_EXPIRY_SECONDS,
+        'read_timeout_seconds':      READ_TIMEOUT_SECONDS,
+        'max_retries':               MAX_RETRIES,
+        'http2':                     HTTP2,
+    }
+    return {**metrics.stats(), 'settings': settings}
@@ -0,0 +1,143 @@
+"""
+Deterministic persona scoring for the memories summary.
+
+run_full_server's generate_conversation_points sends the whole transaction
+history to the LLM, mostly to get back persona_id and persona_scores: slow,
+billed per row, and not guaranteed to give the same answer twice. With
+PERSONA_SCORING=rules (the default) personas are scored locally from the
+same TransactionColumns the analytics use, and the LLM only writes the
+conversation points from the spending metrics:
+
+  • features        – a handful of spending ratios per user (savings rate,
+                      discretionary / giving / investing / discount share,
+                      side income, small and impulse purchases), a few
+                      NumPy reductions over the columns
+  • PERSONA_PROFILES – for every persona the feature values it typically
+                      shows; a user's score for a persona falls off with
+                      the scaled squared distance to its profile
+  • score_matrix    – softmax over the 8 personas for any number of feature
+                      rows at once, with a temperature calibrated on the
+                      labeled data/*.csv personas (bench/bench_persona_scoring.py)
+
+The profiles were read off the labeled persona files in data/, so treat
+them as rules to revisit when the categories or the personas change.
+"""
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from analytics import TransactionColumns
+
+# Configuration defaults
+default_limits = {
+    'temperature': 0.6,         # softmax temperature, see bench_persona_scoring.py --calibrate
+    'small_purchase_eur': 25,   # outgoing payments below this count as small purchases
+}
+
+FEATURES = ('savings_rate', 'discretionary_share', 'goods_share', 'giving_share', 'investing_share',
+            'side_income_share', 'discount_share', 'small_purchase_share', 'impulse_share')
+
+# Categories as the CSVs and the merchant classifier (classification.CATEGORY_DESCRIPTIONS) name them
+DISCRETIONARY_CATEGORIES = frozenset({'food', 'entertainment', 'personal', 'clothing', 'shopping', 'travel'})
+GOODS_CATEGORIES = frozenset({'personal', 'clothing', 'shopping'})
+GIVING_CATEGORIES = frozenset({'charity', 'gifts'})
+INVESTING_CATEGORIES = frozenset({'finance', 'savings', 'investments'})
+FIXED_CATEGORIES = frozenset({'rent', 'rent and mortgage', 'utilities'})
+
+# Lower-case merchant name fragments, for what the category alone doesn't say
+GIVING_MERCHANTS = ('charity', 'donat', 'food bank', 'shelter', 'red cross', 'unicef', 'foundation',
+                    'fundrais', 'community')
+INVESTING_MERCHANTS = ('invest', 'stock', 'etf', 'dividend', 'broker', 'degiro', 'crypto')
+SIDE_INCOME_MERCHANTS = ('freelance', 'startup', 'crypto', 'side', 'project', 'consult', 'funding')
+DISCOUNT_MERCHANTS = ('action', 'lidl', 'aldi', 'hema', 'kruidvat', 'outlet', 'coupon', 'discount', 'sale',
+                      'vinted', 'marktplaats')
+
+# persona id -> typical value of every feature, in FEATURES order
+PERSONA_PROFILES = {
+    1: (0.65, 0.10, 0.05, 0.00, 0.08, 0.00, 0.02, 0.32, 0.24),    # The Budgeting Maestro
+    2: (-0.80, 0.60, 0.27, 0.00, 0.00, 0.00, 0.00, 0.35, 0.57),   # The Spontaneous Spender
+    3: (0.88, 0.11, 0.06, 0.00, 0.03, 0.02, 0.03, 0.23, 0.19),    # The Cautious Saver
+    4: (0.65, 0.09, 0.04, 0.00, 0.45, 0.10, 0.00, 0.18, 0.30),    # The Investment Enthusiast
+    5: (0.77, 0.14, 0.09, 0.00, 0.00, 0.00, 0.05, 0.59, 0.28),    # The Deal Hunter
+    6: (0.88, 0.10, 0.03, 0.00, 0.00, 0.05, 0.01, 0.44, 0.39),    # The Minimalist
+    7: (-0.25, 0.20, 0.10, 0.47, 0.00, 0.00, 0.00, 0.05, 0.27),   # The Generous Giver
+    8: (0.50, 0.12, 0.03, 0.00, 0.24, 0.33, 0.00, 0.28, 0.31),    # The Financial Adventurer
+}
+# how far a feature may typically stray from a profile
+FEATURE_SCALES = (0.15, 0.08, 0.05, 0.10, 0.10, 0.10, 0.02, 0.07, 0.06)
+
+PERSONA_IDS = tuple(sorted(PERSONA_PROFILES))
+_PROFILES = np.array([PERSONA_PROFILES[pid] for pid in PERSONA_IDS])
+_SCALES = np.array(FEATURE_SCALES)
+
+
+def _category_mask(cols: TransactionColumns, names: frozenset) -> np.ndarray:
+    table = np.array([c.lower() in names for c in cols.categories], dtype=bool)
+    return table[cols.category_codes] if len(table) else np.zeros(len(cols), dtype=bool)
+
+
+def _merchant_mask(cols: TransactionColumns, fragments: Sequence[str]) -> np.ndarray:
+    table = np.array([any(f in m.lower() for f in fragments) for m in cols.merchants], dtype=bool)
+    return table[cols.merchant_codes] if len(table) else np.zeros(len(cols), dtype=bool)
+
+
+def features(cols: TransactionColumns, small_purchase_eur: float = default_limits['small_purchase_eur']) -> np.ndarray:
+    """The FEATURES of one user's transactions, as a float vector."""
+    amounts = cols.amounts
+    outgoing = amounts < 0
+    incoming = amounts > 0
+    spent = -amounts[outgoing]
+    spend = float(spent.sum())
+    income = float(amounts[incoming].sum())
+
+    def spend_share(mask):
+        return float(spent[mask[outgoing]].sum()) / spend if spend else 0.0
+
+    discretionary = _category_mask(cols, DISCRETIONARY_CATEGORIES)
+    giving = _category_mask(cols, GIVING_CATEGORIES) | _merchant_mask(cols, GIVING_MERCHANTS)
+    investing = _category_mask(cols, INVESTING_CATEGORIES) | _merchant_mask(cols, INVESTING_MERCHANTS)
+    side_income = incoming & _merchant_mask(cols, SIDE_INCOME_MERCHANTS)
+    # rent and utilities are neither small nor impulsive, whatever their size
+    variable = outgoing & ~_category_mask(cols, FIXED_CATEGORIES)
+    n_outgoing = int(outgoing.sum())
+    n_variable = int(variable.sum())
+
+    return np.array([
+        (income - spend) / max(income, spend) if income or spend else 0.0,
+        spend_share(discretionary),
+        spend_share(_category_mask(cols, GOODS_CATEGORIES)),
+        spend_share(giving),
+        float(np.abs(amounts[investing]).sum()) / (income + spend) if income or spend else 0.0,
+        float(amounts[side_income].sum()) / income if income else 0.0,
+        spend_share(_merchant_mask(cols, DISCOUNT_MERCHANTS)),
+        int((variable & (amounts > -small_purchase_eur * 100)).sum()) / n_variable if n_variable else 0.0,
+        int((outgoing & discretionary).sum()) / n_outgoing if n_outgoing else 0.0,
+    ])
+
+
+def score_matrix(feature_rows: np.ndarray, temperature: float = default_limits['temperature']) -> np.ndarray:
+    """Persona probabilities, one row per feature row and one column per PERSONA_IDS entry."""
+    z = (np.atleast_2d(feature_rows)[:, None, :] - _PROFILES[None, :, :]) / _SCALES
+    logits = -0.5 * np.square(z).sum(axis=2) / temperature
+    logits -= logits.max(axis=1, keepdims=True)
+    weights = np.exp(logits)
+    return weights / weights.sum(axis=1, keepdims=True)
+
+
+def score(cols: TransactionColumns, temperature: float = default_limits['temperature']) -> Dict:
+    """
+    {"persona_id": <int>, "persona_scores": [...]} in the shape the LLM used
+    to return: scores indexed by persona id - 1, summing to 1.
+    """
+    probabilities = score_matrix(features(cols), temperature)[0]
+    return {
+        'persona_id': PERSONA_IDS[int(np.argmax(probabilities))],
+        'persona_scores': [round(float(p), 4) for p in probabilities],
+    }
+
+
+def score_many(columns: Sequence[TransactionColumns], temperature: float = default_limits['temperature']) -> List[Dict]:
+    """score() for several users; the profile distances are computed in one batch."""
+    matrix = score_matrix(np.array([features(cols) for cols in columns]), temperature)
+    return [{'persona_id': PERSONA_IDS[int(np.argmax(row))], 'persona_scores': [round(float(p), 4) for p in row]}
+            for row in matrix]
@@ -0,0 +1,48 @@
+"""
+System prompts laid out for provider-side prefix caching.
+
+OpenAI reuses the longest prompt prefix it has seen recently (in 128-token
+steps once a prompt passes 1024 tokens), and vLLM / NIM style servers
+reuse KV blocks the same way, but only for byte-identical leading text.
+Prompts are therefore assembled as
+
+  [persona definition and rules]  – identical for every request to a persona
+  [per-character data]            – identical until the underlying data changes
+  [per-request text]              – the question, rows relevant to it
+
+with nothing request-specific ahead of stable text. PromptRegistry renders
+the persona part once at startup for every known key, so requests reuse
+the exact same string instead of re-running the f-string.
+"""
+from typing import Callable, Dict, Hashable, Iterable
+
+
+class PromptRegistry:
+    """
+    Usage:
+        registry = PromptRegistry(render, keys)   # render(*key) -> str
+        prompt = registry.get(*key)
+
+    Keys outside the precompiled set (e.g. an unknown persona sent by a
+    client) are rendered on demand and not stored.
+    """
+
+    def __init__(self, render: Callable[..., str], keys: Iterable[Hashable]):
+        self.render = render
+        self._prompts: Dict[Hashable, str] = {key: render(*key) for key in keys}
+        self.hits = 0
+        self.renders = 0
+
+    def get(self, *key) -> str:
+        prompt = self._prompts.get(key)
+        if prompt is not None:
+            self.hits += 1
+            return prompt
+        self.renders += 1
+        return self.render(*key)
+
+    def __len__(self) -> int:
+        return len(self._prompts)
+
+    def stats(self) -> Dict:
+        return {'prompts': len(self._prompts), 'hits': self.hits, 'renders': self.renders}
@@ -0,0 +1,189 @@
+"""
+Cache of persona answers to the questions everyone asks.
+
+The battle arena sees the same handful of questions ("Should I buy or
+rent?", "How much should I save?") over and over, and every persona turn
+used to be a fresh completion. ResponseCache keys answers by persona,
+message type, the normalized question and the turn's context:
+
+  • variants   – each key collects up to N different answers; lookups
+                 miss until it has them all, then return one at random,
+                 so repeat askers don't always get the same reply
+  • TTL / size – entries expire and are evicted LRU-first (caching.LRUCache)
+  • near-duplicates – with an embedding function (see load_embedder), a
+                 question that misses exactly is matched against the
+                 full entries for the same persona and context by cosine
+                 similarity
+
+The question is swapped out of the context before it is fingerprinted,
+because the frontend's initial-turn context quotes it verbatim.
+
+Rebuttals are never cached: their context is the other personas' freshly
+generated answers, so a rebuttal key would practically never repeat, and
+keying on the question alone would answer arguments that weren't made.
+stats() breaks hits and misses down per message type.
+"""
+import random
+import re
+import threading
+from collections import defaultdict
+from typing import Callable, Dict, Hashable, Optional, Sequence, Tuple
+
+import numpy as np
+
+from caching import LRUCache, fingerprint
+
+# Configuration defaults
+default_limits = {
+    'response_cache_size': 2048,
+    'response_cache_ttl_hours': 24,
+    'response_cache_variants': 3,
+    'response_cache_similarity': 0.9
+}
+
+# Message types answered from generated context, see the module docstring
+UNCACHED_MESSAGE_TYPES = frozenset({'rebuttal'})
+
+_PUNCT_RE = re.compile(r"[^\w\s]")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_question(text: str) -> str:
+    """'  Should I buy, or RENT?? ' -> 'should i buy or rent'"""
+    text = text.lower().replace("’", "'").replace("'", "")
+    return _SPACE_RE.sub(" ", _PUNCT_RE.sub(" ", text)).strip()
+
+
+def load_embedder(model_name: str) -> Optional[Callable[[str], np.ndarray]]:
+    """
+    Embedding function backed by a local sentence-transformers model, or
+    None (logged) when the package or model is not available.
+    """
+    try:
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer(model_name)
+    except Exception as e:
+        print(f"Near-duplicate matching disabled, could not load embedding model {model_name}: {e}")
+        return None
+    return lambda text: model.encode(text, normalize_embeddings=True)
+
+
+class ResponseCache:
+    """
+    Usage:
+        cache = ResponseCache(variants=3)
+        text = cache.get(persona, message_type, question, context)
+        if text is None:
+            text = generate(...)
+            cache.add(persona, message_type, question, context, text)
+    """
+
+    def __init__(self, max_entries: int = default_limits['response_cache_size'],
+                 ttl_seconds: Optional[float] = default_limits['response_cache_ttl_hours'] * 3600,
+                 variants: int = default_limits['response_cache_variants'],
+                 embed: Optional[Callable[[str], Sequence[float]]] = None,
+                 similarity: float = default_limits['response_cache_similarity'],
+                 uncached_types: Sequence[str] = UNCACHED_MESSAGE_TYPES):
+        if variants <= 0:
+            raise ValueError("variants must be positive")
+        self._cache = LRUCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self.variants = variants
+        self.embed = embed
+        self.similarity = similarity
+        self.uncached_types = frozenset(uncached_types)
+        self._lock = threading.Lock()
+        # group -> {normalized question: unit embedding}, for near-duplicate lookups
+        self._index = LRUCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.by_message_type = defaultdict(lambda: {'hits': 0, 'near_hits': 0, 'misses': 0, 'bypassed': 0})
+
+    def _key(self, persona_type: str, message_type: str, question: str, context: str) -> Tuple[Hashable, str]:
+        normalized = normalize_question(question)
+        template = context.replace(question, "{question}") if question else context
+        group = (persona_type, message_type, fingerprint(normalize_question(template)))
+        return group, normalized
+
+    def _embedding(self, normalized: str) -> np.ndarray:
+        vector = np.asarray(self.embed(normalized), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _nearest(self, group: Hashable, normalized: str) -> Optional[list]:
+        with self._lock:
+            candidates = [(q, v) for q, v in (self._index.get(group) or {}).items() if (group, q) in self._cache]
+        if not candidates:
+            return None
+        scores = np.stack([v for _, v in candidates]) @ self._embedding(normalized)
+        best = int(np.argmax(scores))
+        if scores[best] < self.similarity:
+            return None
+        entry = self._cache.get((group, candidates[best][0]))
+        return entry if entry is not None and len(entry) >= self.variants else None
+
+    def get(self, persona_type: str, message_type: str, question: str, context: str = "") -> Optional[str]:
+        """
+        A cached answer, or None when this key still needs (more) variants
+        generated or message_type is never cached.
+        """
+        counts = self.by_message_type[message_type]
+        if message_type in self.uncached_types:
+            counts['bypassed'] += 1
+            return None
+        group, normalized = self._key(persona_type, message_type, question, context)
+        entry = self._cache.get((group, normalized))
+        if entry is not None and len(entry) >= self.variants:
+            self.hits += 1
+            counts['hits'] += 1
+            return random.choice(entry)
+        if entry is None and self.embed is not None:
+            entry = self._nearest(group, normalized)
+            if entry is not None:
+                self.near_hits += 1
+                counts['near_hits'] += 1
+                return random.choice(entry)
+        self.misses += 1
+        counts['misses'] += 1
+        return None
+
+    def add(self, persona_type: str, message_type: str, question: str, context: str, text: str) -> None:
+        if not text or message_type in self.uncached_types:
+            return
+        group, normalized = self._key(persona_type, message_type, question, context)
+        key = (group, normalized)
+        embedding = self._embedding(normalized) if self.embed is not None else None
+        with self._lock:
+            entry = self._cache.get(key) or []
+            # duplicates count too, or a deterministic model would never fill a key
+            if len(entry) >= self.variants:
+                return
+            # copy-on-write, so readers never see a list being appended to
+            self._cache.set(key, entry + [text])
+            if embedding is not None:
+                # rebuilt on every add (only after an LLM call), dropping evicted / expired questions
+                index = {q: v for q, v in (self._index.get(group) or {}).items() if (group, q) in self._cache}
+                index[normalized] = embedding
+                self._index.set(group, index)
+
+    def stats(self) -> Dict:
+        lru = self._cache.stats()
+        return {
+            'hits':        self.hits,
+            'near_hits':   self.near_hits,
+            'misses':      self.misses,
+            'hit_ratio':   _hit_ratio(self.hits, self.near_hits, self.misses),
+            'size':        lru['size'],
+            'evictions':   lru['evictions'],
+            'variants':    self.variants,
+            'near_duplicate_matching': self.embed is not None,
+            'by_message_type': {
+                message_type: dict(counts, hit_ratio=_hit_ratio(counts['hits'], counts['near_hits'], counts['misses']))
+                for message_type, counts in list(self.by_message_type.items())
+            },
+        }
+
+
+def _hit_ratio(hits: int, near_hits: int, misses: int) -> float:
+    lookups = hits + near_hits + misses
+    return round((hits + near_hits) / lookups, 4) if lookups else 0.0
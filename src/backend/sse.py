@@ -0,0 +1,151 @@
+"""
+Server-sent events helpers for streaming LLM output out of the Flask apps.
+
+  • wants_stream      – did the client ask for a streamed response?
+  • CompletionStream  – iterate the text deltas of a stream=True chat
+                        completion, timing time-to-first-token
+  • AsyncCompletionStream – the same for AsyncOpenAI (`async for`)
+  • CachedStream      – the same interface over an already-known answer
+  • sse_event         – format one SSE frame
+  • sse_response      – wrap a generator of frames in a text/event-stream Response
+
+Frames are `event: <name>` plus a JSON `data:` line, so browsers can read
+them with EventSource or by parsing a fetch() body stream.
+"""
+import json
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Iterator, Optional
+
+from flask import Response
+
+
+def wants_stream(request) -> bool:
+    """True for ?stream=1, {"stream": true} in the JSON body, or Accept: text/event-stream."""
+    if request.args.get('stream', '').lower() in ('1', 'true'):
+        return True
+    body = request.get_json(silent=True) or {}
+    if body.get('stream') is True:
+        return True
+    return 'text/event-stream' in request.headers.get('Accept', '')
+
+
+def sse_event(event: str, data: Dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def sse_response(events: Iterable[str]) -> Response:
+    return Response(events, mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',  # don't let a reverse proxy buffer the stream
+    })
+
+
+class CompletionStream:
+    """
+    Iterate the text deltas of a streamed chat completion.
+
+    Usage:
+        stream = CompletionStream(client.chat.completions.create, model=..., messages=...)
+        for delta in stream:
+            ...
+        stream.text, stream.timings()   # full text, {'ttft_ms', 'total_ms'}
+
+    Setting `cancel` (a threading.Event) stops the stream at the next chunk
+    and closes the underlying HTTP response. `on_complete(text)` is called
+    only when the completion ran to the end (not cancelled, no error).
+    `on_usage(usage)` asks for the trailing usage chunk and receives it.
+    """
+
+    def __init__(self, create: Callable, cancel: Optional[threading.Event] = None,
+                 on_complete: Optional[Callable[[str], None]] = None,
+                 on_usage: Optional[Callable[[Any], None]] = None, **kwargs):
+        self.create = create
+        self.kwargs = kwargs
+        self.cancel = cancel
+        self.on_complete = on_complete
+        self.on_usage = on_usage
+        if on_usage is not None:
+            self.kwargs.setdefault('stream_options', {'include_usage': True})
+        self.text = ''
+        self.ttft_ms: Optional[float] = None
+        self.total_ms: Optional[float] = None
+
+    def __iter__(self) -> Iterator[str]:
+        start = time.perf_counter()
+        stream = self.create(stream=True, **self.kwargs)
+        parts = []
+        try:
+            for chunk in stream:
+                if self.cancel is not None and self.cancel.is_set():
+                    return
+                if getattr(chunk, 'usage', None) is not None and self.on_usage is not None:
+                    self.on_usage(chunk.usage)
+                if not chunk.choices:
+                    continue  # e.g. a trailing usage-only chunk
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                if self.ttft_ms is None:
+                    self.ttft_ms = round((time.perf_counter() - start) * 1000, 1)
+                parts.append(delta)
+                yield delta
+        finally:
+            stream.close()
+            self.text = ''.join(parts)
+            self.total_ms = round((time.perf_counter() - start) * 1000, 1)
+        if self.on_complete is not None:
+            self.on_complete(self.text)
+
+    def timings(self) -> Dict:
+        return {'ttft_ms': self.ttft_ms, 'total_ms': self.total_ms}
+
+
+class AsyncCompletionStream(CompletionStream):
+    """
+    CompletionStream for an async `create` (AsyncOpenAI). Iterate with
+    `async for`; cancel by cancelling the task that iterates it.
+    """
+
+    async def __aiter__(self) -> AsyncIterator[str]:
+        start = time.perf_counter()
+        stream = await self.create(stream=True, **self.kwargs)
+        parts = []
+        try:
+            async for chunk in stream:
+                if getattr(chunk, 'usage', None) is not None and self.on_usage is not None:
+                    self.on_usage(chunk.usage)
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                if self.ttft_ms is None:
+                    self.ttft_ms = round((time.perf_counter() - start) * 1000, 1)
+                parts.append(delta)
+                yield delta
+        finally:
+            await stream.close()
+            self.text = ''.join(parts)
+            self.total_ms = round((time.perf_counter() - start) * 1000, 1)
+        if self.on_complete is not None:
+            self.on_complete(self.text)
+
+
+class CachedStream(CompletionStream):
+    """A CompletionStream (sync or async) that yields a known answer as a single delta"""
+
+    def __init__(self, text: str):
+        super().__init__(create=None)
+        self.cached_text = text
+
+    def __iter__(self) -> Iterator[str]:
+        start = time.perf_counter()
+        self.ttft_ms = round((time.perf_counter() - start) * 1000, 1)
+        self.text = self.cached_text
+        yield self.cached_text
+        self.total_ms = round((time.perf_counter() - start) * 1000, 1)
+
+    async def __aiter__(self) -> AsyncIterator[str]:
+        for delta in self:
+            yield delta
@@ -4,17 +4,27 @@ Fixed version – May 2025
 ---------------------------------------------------------------
 • Requires:  openai>=1.13.3, pandas
 • Set your key in the env var OPENAI_API_KEY  *or*  pass it explicitly.
+• Batches for every persona run concurrently under a shared rate limiter;
+  failed batches are retried with backoff.
+• Rows stream to disk as each batch lands (transaction_writer.py):
+  validated against the schema, optionally gzip/zstd-compressed and rolled
+  over at a size threshold. Memory holds only the batches in flight, and
+  an interrupted run resumes from what is already on disk.
+• For load tests (millions of rows, no LLM, seeded) use bulk_synthetic.py,
+  which samples from models fitted on data/*.csv.
 """
 
-import csv
 import json
 import os
-import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
-from typing import List, Dict
+from typing import Callable, Dict, Iterable, List, Optional
 
 import pandas as pd
-from openai import OpenAI
+
+from llm_concurrency import call_with_retry, get_rate_limiter, is_retryable
+from llm_gateway import get_client
+from transaction_writer import FIELDNAMES, TransactionWriter, validate_row
 
 # ────────────────────────────────────────────────────────────────
 # Configuration ─ adjust to taste
@@ -24,6 +34,13 @@ BATCH_SIZE = 10           # 5-20 works fine; keep the JSON small
 ROWS_IN_FULL_DATASET = 100
 DATE_RANGE = ("2025-04-01", "2025-06-30")
 
+MAX_IN_FLIGHT = int(os.getenv('SYNTH_MAX_IN_FLIGHT', 16))                # concurrent batch requests
+REQUESTS_PER_SECOND = float(os.getenv('SYNTH_REQUESTS_PER_SECOND', 8))   # keep under your account's RPM
+MAX_BATCH_RETRIES = int(os.getenv('SYNTH_MAX_BATCH_RETRIES', 5))         # per batch, with exponential backoff
+OUTPUT_DIR = os.getenv('SYNTH_OUTPUT_DIR', 'synthetic_output')             # one file set per persona; reruns resume
+COMPRESSION = os.getenv('SYNTH_COMPRESSION') or None                       # gzip | zstd (needs zstandard)
+MAX_FILE_BYTES = int(float(os.getenv('SYNTH_MAX_FILE_MB', 0)) * 1024 * 1024) or None   # roll over to a new part
+
 # ────────────────────────────────────────────────────────────────
 # Static data: 8 personas and matching user profiles
 # ────────────────────────────────────────────────────────────────
@@ -60,7 +77,10 @@ user_profiles: Dict[int, str] = {
 # ────────────────────────────────────────────────────────────────
 # OpenAI client
 # ────────────────────────────────────────────────────────────────
-client = OpenAI()  # uses OPENAI_API_KEY from the environment
+# retries happen per batch (call_with_retry), so the SDK's own are off
+client = get_client().with_options(max_retries=0)  # uses OPENAI_API_KEY from the environment
+rate_limiter = get_rate_limiter(f"synthetic:{client.base_url}", rate=REQUESTS_PER_SECOND,
+                                capacity=max(1.0, REQUESTS_PER_SECOND))
 
 
 # ────────────────────────────────────────────────────────────────
@@ -109,56 +129,171 @@ Return JSON only: {{ "transactions": [ … ] }}
     return obj.get("transactions", [])
 
 
+def valid_rows(rows) -> List[Dict]:
+    """Keep the rows that pass validate_row, normalized."""
+    if not isinstance(rows, list):
+        return []
+    valid = []
+    for row in rows:
+        try:
+            valid.append(validate_row(row))
+        except (ValueError, TypeError):
+            pass
+    return valid
+
+
+class EmptyBatch(ValueError):
+    """A reply that parsed but held no valid rows."""
+
+
+def retry_batch_on(exc: Exception) -> bool:
+    """
+    Transient API errors (llm_concurrency.is_retryable), bad JSON and empty
+    batches are worth another try; auth errors, unknown models and bugs
+    fail straight away.
+    """
+    return is_retryable(exc) or isinstance(exc, (EmptyBatch, json.JSONDecodeError))
+
+
+def generate_batch_with_retry(persona_id: int, num_rows: int) -> List[Dict]:
+    """generate_batch under the rate limiter, retrying failures that retry_batch_on accepts."""
+    def attempt():
+        rows = valid_rows(generate_batch(persona_id, num_rows))
+        if not rows:
+            raise EmptyBatch("empty batch")
+        return rows
+
+    return call_with_retry(attempt, rate_limiter=rate_limiter, max_retries=MAX_BATCH_RETRIES,
+                           retry_on=retry_batch_on)
+
+
 # ────────────────────────────────────────────────────────────────
-# Build full dataset in multiple batches
+# Streaming pipeline: batches go to a sink as they land
 # ────────────────────────────────────────────────────────────────
-def generate_full_dataset(persona_id: int, total_rows: int = ROWS_IN_FULL_DATASET,
-                           batch_size: int = BATCH_SIZE) -> List[Dict]:
-    all_rows: List[Dict] = []
-    batches = (total_rows + batch_size - 1) // batch_size
-
-    for batch_idx in range(batches):
-        rows_needed = min(batch_size, total_rows - len(all_rows))
-        print(f"• Batch {batch_idx + 1}/{batches} … ", end="", flush=True)
+def stream_datasets(persona_ids: Iterable[int], total_rows: int,
+                    sink: Callable[[int, List[Dict]], None], written: Optional[Dict[int, int]] = None,
+                    batch_size: int = BATCH_SIZE, max_in_flight: int = MAX_IN_FLIGHT) -> Dict[int, int]:
+    """
+    Generate rows until every persona has `total_rows`, handing each
+    finished batch to sink(persona_id, rows) as it lands. `written` gives
+    rows already produced per persona (a resumed run). At most
+    max_in_flight batches are outstanding, and only those are held in
+    memory. Shortfalls from short batches are requested once they add up
+    to a full batch or the persona has nothing else in flight, and a batch
+    never takes a persona past its target. Raises RuntimeError once
+    max_in_flight batches in a row fail after their retries.
+    """
+    persona_ids = list(persona_ids)
+    written = {pid: (written or {}).get(pid, 0) for pid in persona_ids}
+    planned = dict(written)   # written + requested by batches in flight
+    in_flight = dict.fromkeys(persona_ids, 0)
+    pending = {}
+    failures = 0
+    last_error: Optional[Exception] = None
+
+    def next_jobs():
+        for pid in persona_ids:
+            while len(pending) < max_in_flight and (
+                    total_rows - planned[pid] >= batch_size or (planned[pid] < total_rows and not in_flight[pid])):
+                yield pid, min(batch_size, total_rows - planned[pid])
+
+    pool = ThreadPoolExecutor(max_workers=max_in_flight)
+    try:
+        while True:
+            for pid, num_rows in next_jobs():
+                planned[pid] += num_rows
+                in_flight[pid] += 1
+                pending[pool.submit(generate_batch_with_retry, pid, num_rows)] = (pid, num_rows)
+            if not pending:
+                break
 
-        try:
-            batch_rows = generate_batch(persona_id, rows_needed)
-            if not batch_rows:
-                raise ValueError("empty batch")
-            all_rows.extend(batch_rows)
-            print(f"OK  ({len(batch_rows)} rows)")
-        except Exception as exc:
-            print(f"FAILED  → {exc}")
-            # brief backoff, then try the batch again once
-            time.sleep(2)
-            continue
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                pid, num_rows = pending.pop(future)
+                planned[pid] -= num_rows
+                in_flight[pid] -= 1
+                try:
+                    rows = future.result()[:total_rows - written[pid]]
+                except Exception as exc:
+                    failures += 1
+                    last_error = exc
+                    continue
+                failures = 0
+                sink(pid, rows)
+                written[pid] += len(rows)
+                planned[pid] += len(rows)
+                if written[pid] >= total_rows:
+                    print(f"• {personas[pid]['character']}: {written[pid]} rows", flush=True)
+
+            if failures >= max_in_flight:
+                raise RuntimeError(f"{failures} batches in a row failed (last error: {last_error!r}); "
+                                   f"rows written so far are kept")
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    return written
+
+
+def generate_all_datasets(persona_ids: Iterable[int], total_rows: int = ROWS_IN_FULL_DATASET,
+                          batch_size: int = BATCH_SIZE, max_in_flight: int = MAX_IN_FLIGHT) -> Dict[int, List[Dict]]:
+    """In-memory variant of stream_datasets for small datasets and previews."""
+    datasets: Dict[int, List[Dict]] = {pid: [] for pid in persona_ids}
+    stream_datasets(list(datasets), total_rows, lambda pid, rows: datasets[pid].extend(rows),
+                    batch_size=batch_size, max_in_flight=max_in_flight)
+    return datasets
 
-        # polite pacing
-        time.sleep(1.5)
 
-    return all_rows[:total_rows]   # trim in case we got extra rows
+def generate_full_dataset(persona_id: int, total_rows: int = ROWS_IN_FULL_DATASET,
+                          batch_size: int = BATCH_SIZE) -> List[Dict]:
+    return generate_all_datasets([persona_id], total_rows, batch_size)[persona_id]
 
 
 # ────────────────────────────────────────────────────────────────
-# Save helper
+# Writing to disk
 # ────────────────────────────────────────────────────────────────
-def save_to_csv(rows: List[Dict], persona_id: int) -> str:
+def open_writer(persona_id: int, out_dir: str = OUTPUT_DIR, compression: Optional[str] = COMPRESSION,
+                max_bytes: Optional[int] = MAX_FILE_BYTES) -> TransactionWriter:
+    """Writer for a persona's file set in out_dir; picks up where an earlier run stopped."""
+    os.makedirs(out_dir, exist_ok=True)
+    base = os.path.join(out_dir, personas[persona_id]['character'].replace(' ', '_'))
+    return TransactionWriter(base, compression=compression, max_bytes=max_bytes)
+
+
+def write_all_datasets(persona_ids: Iterable[int], total_rows: int = ROWS_IN_FULL_DATASET,
+                       out_dir: str = OUTPUT_DIR, compression: Optional[str] = COMPRESSION,
+                       max_bytes: Optional[int] = MAX_FILE_BYTES, batch_size: int = BATCH_SIZE,
+                       max_in_flight: int = MAX_IN_FLIGHT) -> Dict[int, TransactionWriter]:
+    """
+    Stream `total_rows` rows per persona into out_dir. Rerunning after an
+    interruption only generates what the files don't already hold.
+    """
+    writers = {pid: open_writer(pid, out_dir, compression, max_bytes) for pid in persona_ids}
+    for pid, writer in writers.items():
+        if writer.rows:
+            print(f"• {personas[pid]['character']}: resuming with {writer.rows} rows on disk")
+    stream_datasets(list(writers), total_rows, lambda pid, rows: writers[pid].write_batch(rows),
+                    written={pid: w.rows for pid, w in writers.items()},
+                    batch_size=batch_size, max_in_flight=max_in_flight)
+    return writers
+
+
+def save_to_csv(rows: Iterable[Dict], persona_id: int, out_dir: str = ".", compression: Optional[str] = None,
+                max_bytes: Optional[int] = None) -> List[str]:
+    """Write rows (any iterable) to a new timestamped file set, a batch at a time; returns the paths."""
     persona = personas[persona_id]
-    filename = f"{persona['character'].replace(' ', '_')}_{datetime.now():%Y%m%d_%H%M%S}.csv"
+    base = os.path.join(out_dir, f"{persona['character'].replace(' ', '_')}_{datetime.now():%Y%m%d_%H%M%S}")
+    writer = TransactionWriter(base, compression=compression, max_bytes=max_bytes)
 
-    if not rows:
-        raise ValueError("No rows to write – aborting CSV save.")
+    batch: List[Dict] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= 1000:
+            writer.write_batch(batch)
+            batch = []
+    writer.write_batch(batch)
 
-    with open(filename, "w", newline="", encoding="utf-8") as fh:
-        writer = csv.DictWriter(
-            fh,
-            fieldnames=["Timestamp", "Merchant", "Amount", "Description",
-                        "Location", "Category", "Account"]
-        )
-        writer.writeheader()
-        writer.writerows(rows)
-
-    return filename
+    if not writer.rows:
+        raise ValueError("No valid rows to write – aborting CSV save.")
+    return writer.paths
 
 
 # ────────────────────────────────────────────────────────────────
@@ -173,37 +308,35 @@ def main() -> None:
     for pid, p in personas.items():
         print(f"{pid}: {p['name']}  –  {p['character']}")
 
-    # user picks one
+    # user picks one (or all)
     while True:
         try:
-            choice = int(input("\nPick a persona (1-8): "))
-            if 1 <= choice <= 8:
+            choice = int(input("\nPick a persona (1-8, or 0 for all): "))
+            if 0 <= choice <= 8:
                 break
         except ValueError:
             pass
-        print("→ Enter a number between 1 and 8.")
+        print("→ Enter a number between 0 and 8.")
+    chosen = list(personas) if choice == 0 else [choice]
 
     # small sample first
     print("\nGenerating a small sample (5 rows) …")
-    sample = generate_batch(choice, 5)
+    sample = generate_batch_with_retry(chosen[0], 5)
     print(pd.DataFrame(sample), "\n")
 
-    cont = input("Generate full 100-row dataset? (y/n): ").lower()
+    cont = input(f"Generate full {ROWS_IN_FULL_DATASET}-row dataset(s)? (y/n): ").lower()
     if cont != "y":
         print("Cancelled.")
         return
 
-    print("\nBuilding full dataset…")
-    full = generate_full_dataset(choice, ROWS_IN_FULL_DATASET)
-    print(f"\nTotal rows: {len(full)}")
-
-    if full:
-        print(pd.DataFrame(full[:7]))   # peek at first few
+    print(f"\nStreaming full dataset(s) to {OUTPUT_DIR}/ …")
+    writers = write_all_datasets(chosen, ROWS_IN_FULL_DATASET)
 
-        filename = save_to_csv(full, choice)
-        print(f"\n✅  Saved to {filename}")
-    else:
-        print("⚠️  No data generated – nothing saved.")
+    for pid, writer in writers.items():
+        stats = writer.stats()
+        print(f"\n{personas[pid]['character']}: {stats['rows']} rows, {stats['bytes']:,} bytes")
+        for path in writer.paths:
+            print(f"✅  {path}")
 
 
 if __name__ == "__main__":
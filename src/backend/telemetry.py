@@ -0,0 +1,325 @@
+"""
+Per-stage timings and counters for the Flask apps, exported in the
+Prometheus text format.
+
+The /stats endpoints each answer one question about one component; nothing
+said where a slow /memories/summary request actually spent its time.
+Everything here is stdlib and in-process:
+
+  • span             – `with telemetry.span('memories.fetch'):` times a
+                       block into the stage_seconds histogram (and opens an
+                       OpenTelemetry span when TELEMETRY_OTEL is set)
+  • histogram /
+    counter          – named instruments with labels, created once per
+                       process and shared by name
+  • register_stats   – expose an existing stats() dict (caches, the LLM
+                       gateway, ...) as gauges, read at scrape time
+  • instrument_flask – request duration per route, method and status, and
+                       a GET /metrics endpoint serving render()
+
+TELEMETRY_ENABLED=false turns spans and the request hooks into no-ops.
+OpenTelemetry needs the optional `opentelemetry-api` package; spans go to
+whatever tracer provider the process configures (e.g. through
+opentelemetry-instrument and the OTEL_* environment variables).
+"""
+import importlib.util
+import math
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Sequence, Tuple
+
+# Configuration defaults
+default_limits = {
+    'enabled': True,
+    'otel': False,
+    'buckets': (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+}
+
+ENABLED = os.getenv('TELEMETRY_ENABLED', str(default_limits['enabled'])).lower() == 'true'
+OTEL = os.getenv('TELEMETRY_OTEL', str(default_limits['otel'])).lower() == 'true'
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: str = '') -> str:
+    parts = [f'{k}="{_escape(v)}"' for k, v in key]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """
+    Usage:
+        pages = telemetry.counter('bunq_pages_total', 'Pages fetched from bunq')
+        pages.inc(endpoint='payment')
+    """
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._lock = threading.Lock()
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(_label_key(labels), 0)
+
+    def render(self) -> list:
+        with self._lock:
+            values = sorted(self._values.items())
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        lines += [f'{self.name}{_format_labels(key)} {_format_value(v)}' for key, v in values]
+        return lines
+
+
+class Histogram:
+    """
+    Usage:
+        latency = telemetry.histogram('llm_response_seconds', 'Time to response headers')
+        latency.observe(0.42, status=200)
+
+    Cumulative buckets as Prometheus expects them, plus _sum and _count.
+    """
+
+    def __init__(self, name: str, help: str, buckets: Sequence[float] = default_limits['buckets']):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # label key -> per-bucket counts (the last one is +Inf), then the sum
+        self._series: Dict[LabelKey, list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        self.observe_key(value, _label_key(labels))
+
+    def observe_key(self, value: float, key: LabelKey) -> None:
+        """observe() with labels already turned into a key by _label_key."""
+        index = bisect_left(self.buckets, value)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series.setdefault(key, [0] * (len(self.buckets) + 1) + [0.0])
+        with self._lock:
+            series[index] += 1
+            series[-1] += value
+
+    def count(self, **labels) -> int:
+        series = self._series.get(_label_key(labels))
+        return sum(series[:-1]) if series else 0
+
+    def render(self) -> list:
+        with self._lock:
+            series = sorted((key, values[:-1], values[-1]) for key, values in self._series.items())
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        for key, counts, total in series:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (math.inf,), counts):
+                cumulative += n
+                le = 'le="%s"' % _format_value(bound)
+                lines.append(f'{self.name}_bucket{_format_labels(key, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{_format_labels(key)} {_format_value(total)}')
+            lines.append(f'{self.name}_count{_format_labels(key)} {cumulative}')
+        return lines
+
+
+class Registry:
+    """
+    Every instrument and stats source of one process; render() is the
+    /metrics body.
+    """
+
+    def __init__(self, namespace: str = ''):
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._instruments: Dict[str, object] = {}
+        self._stats: Dict[str, Callable[[], Dict]] = {}
+
+    def _get(self, cls, name: str, help: str, **kwargs):
+        name = self.namespace + name
+        with self._lock:
+            instrument = self._instruments.get(name)
+            if instrument is None:
+                instrument = self._instruments[name] = cls(name, help, **kwargs)
+            elif not isinstance(instrument, cls):
+                raise ValueError(f"{name} is already registered as a {type(instrument).__name__}")
+            return instrument
+
+    def counter(self, name: str, help: str) -> Counter:
+        return self._get(Counter, name, help)
+
+    def histogram(self, name: str, help: str, buckets: Sequence[float] = default_limits['buckets']) -> Histogram:
+        return self._get(Histogram, name, help, buckets=buckets)
+
+    def register_stats(self, prefix: str, stats: Callable[[], Dict]) -> None:
+        """Expose the numeric leaves of stats() as <prefix>_<key>[_<key>...] gauges."""
+        self._stats[prefix] = stats
+
+    def render(self) -> str:
+        with self._lock:
+            instruments = list(self._instruments.values())
+            sources = list(self._stats.items())
+        lines = []
+        for instrument in instruments:
+            lines += instrument.render()
+        for prefix, stats in sources:
+            try:
+                values = stats()
+            except Exception as e:   # one broken source shouldn't take /metrics down
+                print(f"Could not collect {prefix} stats: {e}")
+                continue
+            for name, value in _flatten(self.namespace + prefix, values):
+                lines += [f'# TYPE {name} gauge', f'{name} {_format_value(value)}']
+        return '\n'.join(lines) + '\n'
+
+
+def _flatten(prefix: str, value) -> list:
+    if isinstance(value, bool):
+        return [(prefix, int(value))]
+    if isinstance(value, (int, float)):
+        return [(prefix, value)]
+    if isinstance(value, dict):
+        return [item for key, v in value.items()
+                for item in _flatten(f"{prefix}_{re.sub(r'[^a-zA-Z0-9_]', '_', str(key))}", v)]
+    return []   # strings, None, lists: not a gauge
+
+
+registry = Registry()
+
+stage_seconds = registry.histogram('stage_seconds', 'Time spent per pipeline stage')
+request_seconds = registry.histogram('http_request_seconds', 'Flask request duration, until the response is returned')
+
+
+def counter(name: str, help: str) -> Counter:
+    return registry.counter(name, help)
+
+
+def histogram(name: str, help: str, buckets: Sequence[float] = default_limits['buckets']) -> Histogram:
+    return registry.histogram(name, help, buckets)
+
+
+def register_stats(prefix: str, stats: Callable[[], Dict]) -> None:
+    registry.register_stats(prefix, stats)
+
+
+def render() -> str:
+    return registry.render()
+
+
+def _otel_tracer():
+    if not OTEL:
+        return None
+    if importlib.util.find_spec('opentelemetry') is None:
+        print("TELEMETRY_OTEL is set but the opentelemetry-api package is not installed; spans stay local")
+        return None
+    from opentelemetry import trace
+    return trace.get_tracer('bunq-wrapped')
+
+
+_tracer = _otel_tracer()
+
+# stage name / (route, method, status) -> label key, so they aren't rebuilt per observation
+_stage_keys: Dict[str, LabelKey] = {}
+_request_keys: Dict[Tuple, LabelKey] = {}
+
+
+class _Span:
+    __slots__ = ('name', 'labels', 'start', 'seconds', '_key', '_otel')
+
+    def __init__(self, name: str, labels: Dict):
+        self.name = name
+        self.labels = labels
+        self.seconds = None
+        self._key = _stage_keys.get(name) if not labels else None
+        self._otel = None
+
+    def __enter__(self) -> '_Span':
+        if _tracer is not None:
+            self._otel = _tracer.start_as_current_span(self.name, attributes=self.labels)
+            self._otel.__enter__()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.seconds = time.perf_counter() - self.start
+        key = self._key
+        if key is None:
+            key = _label_key({'stage': self.name, **self.labels})
+            if not self.labels:
+                _stage_keys[self.name] = key
+        stage_seconds.observe_key(self.seconds, key)
+        if self._otel is not None:
+            self._otel.__exit__(*exc)
+
+
+class _NoopSpan:
+    name = None
+    labels = {}
+    seconds = None
+
+    def __enter__(self) -> '_NoopSpan':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def span(name: str, **labels):
+    """
+    Context manager timing a block as stage `name`; `labels` become
+    histogram labels (and span attributes), so keep their values few.
+    The span's .seconds is set when the block exits.
+    """
+    return _Span(name, labels) if ENABLED else _NOOP_SPAN
+
+
+def instrument_flask(app) -> None:
+    """Time every request of `app` and serve render() at GET /metrics."""
+    from flask import Response, g, request
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        return Response(render(), content_type=CONTENT_TYPE)
+
+    # ENABLED is read per request (not just here) so it can be flipped at runtime
+    @app.before_request
+    def start_timer():
+        if ENABLED:
+            g.telemetry_start = time.perf_counter()
+
+    @app.after_request
+    def observe_request(response):
+        start = g.pop('telemetry_start', None)
+        if start is not None:
+            route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+            labels = (route, request.method, response.status_code)
+            key = _request_keys.get(labels)
+            if key is None:
+                key = _request_keys[labels] = _label_key(dict(zip(('route', 'method', 'status'), labels)))
+            request_seconds.observe_key(time.perf_counter() - start, key)
+        return response
@@ -0,0 +1,230 @@
+"""
+Columnar, memory-mapped transaction files.
+
+Reading a persona CSV means parsing text and building a dict per row in
+every worker process. A bundle stores the same transactions once as plain
+.npy columns that np.load maps read-only, so any number of processes
+share one page-cached copy and nothing is parsed at load time:
+
+  <name>.bundle/
+    meta.json              row count, source file, dictionaries
+    timestamps.npy         int64 seconds since 1970-01-01
+    days.npy               int64 days since 1970-01-01
+    amounts.npy            int64 signed cents
+    category_codes.npy     int32 codes into meta['dictionaries']['categories']
+    merchant_codes.npy     … merchants, and likewise accounts, descriptions, locations
+
+Dictionaries are in first-seen order, exactly as analytics.TransactionColumns
+builds them from records, so metrics (and their tie-breaking) match the
+CSV path. load_bundle returns a TransactionBundle, a TransactionColumns
+subclass that the analytics functions accept directly.
+
+Usage:
+    python transaction_bundle.py data/*.csv               # writes data/<name>.bundle/
+    bundle = load_bundle('data/Zen_Zeke.bundle')
+    analytics.compute_metrics(bundle)
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from analytics import TransactionColumns
+
+BUNDLE_VERSION = 1
+CHUNK_ROWS = 1_000_000
+HEADER_BYTES = 128   # reserved .npy header, filled in once the row count is known
+
+# bundle column -> CSV header, as in the persona files
+DEFAULT_HEADER_MAPPING = {
+    'timestamp': 'Timestamp',
+    'merchant': 'Merchant',
+    'amount': 'Amount',
+    'description': 'Description',
+    'location': 'Location',
+    'category': 'Category',
+    'account': 'Account',
+}
+TEXT_COLUMNS = {'merchant': 'merchants', 'category': 'categories', 'account': 'accounts',
+                'description': 'descriptions', 'location': 'locations'}
+ARRAYS = {'timestamps': np.int64, 'days': np.int64, 'amounts': np.int64,
+          **{f'{key}_codes': np.int32 for key in TEXT_COLUMNS}}
+
+
+class TransactionBundle(TransactionColumns):
+    """
+    TransactionColumns backed by memory-mapped arrays, plus the columns the
+    analytics don't use: timestamps, account / description / location codes
+    and their dictionaries. Arrays are read-only.
+    """
+
+    def __init__(self, path: str, arrays: Dict[str, np.ndarray], dictionaries: Dict[str, List[str]],
+                 meta: Dict):
+        super().__init__(arrays['days'], arrays['amounts'],
+                         arrays['category_codes'], dictionaries['categories'],
+                         arrays['merchant_codes'], dictionaries['merchants'])
+        self.path = path
+        self.meta = meta
+        self.timestamps = arrays['timestamps']
+        self.account_codes, self.accounts = arrays['account_codes'], dictionaries['accounts']
+        self.description_codes, self.descriptions = arrays['description_codes'], dictionaries['descriptions']
+        self.location_codes, self.locations = arrays['location_codes'], dictionaries['locations']
+
+
+def load_bundle(path: str) -> TransactionBundle:
+    """Map a bundle written by convert_csv; O(1) in the number of rows."""
+    with open(os.path.join(path, 'meta.json'), encoding='utf-8') as fh:
+        meta = json.load(fh)
+    if meta.get('version') != BUNDLE_VERSION:
+        raise ValueError(f"{path}: unsupported bundle version {meta.get('version')!r}")
+    arrays = {name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r') for name in ARRAYS}
+    if any(len(a) != meta['rows'] for a in arrays.values()):
+        raise ValueError(f"{path}: column lengths don't match meta.json")
+    return TransactionBundle(path, arrays, meta['dictionaries'], meta)
+
+
+def bundle_path(csv_path: str) -> str:
+    return os.path.splitext(csv_path)[0] + '.bundle'
+
+
+def is_current(csv_path: str, path: Optional[str] = None) -> bool:
+    """True if the bundle exists and was converted from the CSV as it is now."""
+    try:
+        with open(os.path.join(path or bundle_path(csv_path), 'meta.json'), encoding='utf-8') as fh:
+            source = json.load(fh)['source']
+        st = os.stat(csv_path)
+    except (OSError, ValueError, KeyError):
+        return False
+    return source['mtime_ns'] == st.st_mtime_ns and source['size'] == st.st_size
+
+
+class _ColumnWriter:
+    """Appends chunks to a .npy file whose header is written last."""
+
+    def __init__(self, path: str, dtype):
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.rows = 0
+        self.fh = open(path, 'wb')
+        self.fh.seek(HEADER_BYTES)
+
+    def write(self, values: np.ndarray) -> None:
+        self.fh.write(np.ascontiguousarray(values, dtype=self.dtype).tobytes())
+        self.rows += len(values)
+
+    def close(self) -> None:
+        header = repr({'descr': np.lib.format.dtype_to_descr(self.dtype), 'fortran_order': False,
+                       'shape': (self.rows,)})
+        header = header.ljust(HEADER_BYTES - 10 - 1) + '\n'
+        self.fh.seek(0)
+        self.fh.write(b'\x93NUMPY\x01\x00' + len(header).to_bytes(2, 'little') + header.encode('latin1'))
+        self.fh.close()
+
+
+def _read_chunks(csv_path: str, header_mapping: Dict[str, str], chunk_rows: int):
+    missing = [key for key in DEFAULT_HEADER_MAPPING if key not in header_mapping]
+    if missing:
+        raise KeyError(f"Header mapping missing required keys: {missing}")
+    columns = [header_mapping[key] for key in DEFAULT_HEADER_MAPPING]
+    return pd.read_csv(csv_path, usecols=columns, dtype=str, keep_default_na=False, chunksize=chunk_rows)
+
+
+def convert_csv(csv_path: str, out_path: Optional[str] = None,
+                header_mapping: Optional[Dict[str, str]] = None, chunk_rows: int = CHUNK_ROWS) -> str:
+    """
+    Convert a transactions CSV into a bundle, a chunk at a time (memory is
+    bounded by chunk_rows, not the file). Fields are stripped and must be
+    non-empty, and amounts must parse, as in
+    run_full_server.iter_transactions_from_csv; a bad row raises
+    ValueError naming it. The bundle is written to a temporary directory
+    and moved into place, so readers never see a half-written one.
+    """
+    header_mapping = header_mapping or DEFAULT_HEADER_MAPPING
+    out_path = out_path or bundle_path(csv_path)
+    tmp_path = f"{out_path}.tmp{os.getpid()}"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    st = os.stat(csv_path)
+
+    writers = {name: _ColumnWriter(os.path.join(tmp_path, f'{name}.npy'), dtype) for name, dtype in ARRAYS.items()}
+    index: Dict[str, Dict[str, int]] = {key: {} for key in TEXT_COLUMNS}
+    rows = 0
+    try:
+        for chunk in _read_chunks(csv_path, header_mapping, chunk_rows):
+            columns = {key: chunk[header_mapping[key]] for key in DEFAULT_HEADER_MAPPING}
+
+            # text: factorize the chunk, then strip and map only its distinct values
+            for key in TEXT_COLUMNS:
+                local, uniques = pd.factorize(columns[key], sort=False)
+                stripped = [value.strip() for value in uniques]
+                if '' in stripped:
+                    _raise_bad_row(rows, np.flatnonzero(local == stripped.index('')), f"empty {key}")
+                codes = np.array([index[key].setdefault(value, len(index[key])) for value in stripped], dtype=np.int32)
+                writers[f'{key}_codes'].write(codes[local])
+
+            stamps = pd.to_datetime(columns['timestamp'].str.strip(), format='ISO8601', errors='coerce')
+            if stamps.isna().any():
+                _raise_bad_row(rows, np.flatnonzero(stamps.isna().to_numpy()), "bad timestamp")
+            seconds = stamps.to_numpy(dtype='datetime64[s]').astype(np.int64)
+            writers['timestamps'].write(seconds)
+            writers['days'].write(seconds // 86400)
+
+            amounts = pd.to_numeric(columns['amount'].str.strip(), errors='coerce').to_numpy(dtype=np.float64)
+            if np.isnan(amounts).any():
+                _raise_bad_row(rows, np.flatnonzero(np.isnan(amounts)), "bad amount")
+            writers['amounts'].write(np.rint(amounts * 100).astype(np.int64))
+            rows += len(chunk)
+    except BaseException:
+        for writer in writers.values():
+            writer.fh.close()
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+    for writer in writers.values():
+        writer.close()
+
+    meta = {
+        'version': BUNDLE_VERSION,
+        'rows': rows,
+        'source': {'path': os.path.abspath(csv_path), 'mtime_ns': st.st_mtime_ns, 'size': st.st_size},
+        'dictionaries': {name: list(index[key]) for key, name in TEXT_COLUMNS.items()},
+    }
+    with open(os.path.join(tmp_path, 'meta.json'), 'w', encoding='utf-8') as fh:
+        json.dump(meta, fh, ensure_ascii=False)
+
+    shutil.rmtree(out_path, ignore_errors=True)
+    os.replace(tmp_path, out_path)
+    return out_path
+
+
+def _raise_bad_row(offset: int, positions: Sequence[int], reason: str):
+    # 1-based data rows, as iter_transactions_from_csv numbers them
+    raise ValueError(f"Invalid data on row {offset + int(positions[0]) + 1}: {reason}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Convert transaction CSVs into memory-mapped column bundles")
+    parser.add_argument('csv', nargs='+')
+    parser.add_argument('--out', help='bundle directory (only with a single CSV)')
+    parser.add_argument('--force', action='store_true', help='convert even if the bundle is current')
+    args = parser.parse_args()
+    if args.out and len(args.csv) > 1:
+        parser.error("--out needs exactly one CSV")
+
+    for csv_path in args.csv:
+        out_path = args.out or bundle_path(csv_path)
+        if not args.force and is_current(csv_path, out_path):
+            print(f"• {out_path} is up to date")
+            continue
+        start = time.perf_counter()
+        convert_csv(csv_path, out_path)
+        rows = load_bundle(out_path).meta['rows']
+        print(f"• {csv_path} → {out_path}: {rows:,} rows in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Parsed transaction files shared across requests.
+
+Both backends read the persona CSVs on every request. TransactionFileCache
+parses a file once and hands every caller the same tuple of row dicts
+until the file's mtime or size changes, at which point the next load
+re-parses it. Rows are shared between requests and threads, so callers
+must treat them as read-only.
+"""
+import os
+import threading
+from typing import Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+from caching import LRUCache
+
+Rows = Tuple[Dict, ...]
+
+
+def _signature(path: str) -> Tuple[int, int]:
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+class TransactionFileCache:
+    """
+    Usage:
+        files = TransactionFileCache()
+        rows = files.load(path, parse)   # parse(path) -> iterable of dicts
+
+    `variant` distinguishes different parses of the same file (e.g. two
+    header mappings); it must be hashable.
+    """
+
+    def __init__(self, max_files: int = 64):
+        self._cache = LRUCache(max_entries=max_files)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.parses = 0
+
+    def load(self, file_path: str, parse: Callable[[str], Iterable[Dict]],
+             variant: Optional[Hashable] = None) -> Rows:
+        path = os.path.abspath(file_path)
+        key = (path, variant)
+        signature = _signature(path)
+
+        entry = self._cache.get(key)
+        if entry is None or entry[0] != signature:
+            entry = self._parse(key, signature, parse)
+        else:
+            self.hits += 1
+        return entry[1]
+
+    def _parse(self, key, signature, parse):
+        path = key[0]
+        with self._lock:
+            # another thread may have parsed it while we waited
+            entry = self._cache.get(key)
+            if entry is not None and entry[0] == signature:
+                self.hits += 1
+                return entry
+            rows = tuple(parse(path))
+            self.parses += 1
+            # a write that lands mid-parse changes the signature again, so
+            # the next load picks it up
+            entry = (signature, rows)
+            self._cache.set(key, entry)
+            return entry
+
+    def preload(self, file_paths: Iterable[str], parse: Callable[[str], Iterable[Dict]],
+                variant: Optional[Hashable] = None) -> int:
+        """Parse every file up front; returns how many loaded. Failures are logged, not raised."""
+        loaded = 0
+        for file_path in file_paths:
+            try:
+                self.load(file_path, parse, variant)
+                loaded += 1
+            except Exception as e:
+                print(f"Could not preload {file_path}: {e}")
+        return loaded
+
+    def stats(self) -> Dict:
+        loads = self.hits + self.parses
+        return {
+            'files':     len(self._cache),
+            'hits':      self.hits,
+            'parses':    self.parses,
+            'hit_ratio': round(self.hits / loads, 4) if loads else 0.0,
+        }
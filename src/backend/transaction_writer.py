@@ -0,0 +1,176 @@
+"""
+Validated, crash-safe streaming writer for persona transaction CSVs.
+
+The synthetic generators hand over rows a batch at a time; nothing holds
+the whole dataset in memory.
+
+  • every row is checked against the schema (Timestamp format, signed
+    numeric Amount, allowed Category) and normalized; bad rows are
+    counted and dropped
+  • each batch is appended as a self-contained unit (a gzip member or
+    zstd frame when compressed; concatenations of those are valid files)
+    and fsynced, then recorded in a small JSON manifest next to the output
+  • with max_bytes set, output rolls over to a new numbered part once
+    the current one reaches the threshold; every part starts with the
+    CSV header
+  • opening a writer on an existing manifest resumes it: bytes past the
+    last recorded batch (a batch cut short by a crash) are truncated and
+    writing continues from there
+"""
+import csv
+import gzip
+import importlib.util
+import io
+import json
+import math
+import os
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+FIELDNAMES = ["Timestamp", "Merchant", "Amount", "Description", "Location", "Category", "Account"]
+CATEGORIES = frozenset({
+    'salary', 'groceries', 'food', 'entertainment', 'rent', 'health', 'finance', 'personal', 'subscriptions', 'others'
+})
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+COMPRESSIONS = {None: '', 'gzip': '.gz', 'zstd': '.zst'}
+
+
+def validate_row(row) -> Dict:
+    """
+    Return the row normalized to FIELDNAMES (Category lower-cased, Amount a
+    float rounded to cents), or raise ValueError saying what is wrong.
+    Salary must be money coming in and rent money going out.
+    """
+    if not isinstance(row, dict):
+        raise ValueError(f"not an object: {row!r}")
+    missing = [f for f in FIELDNAMES if row.get(f) in (None, '')]
+    if missing:
+        raise ValueError(f"missing {', '.join(missing)}")
+
+    out = {f: str(row[f]).strip() for f in FIELDNAMES}
+    datetime.strptime(out['Timestamp'], TIMESTAMP_FORMAT)   # ValueError on a bad format
+
+    if isinstance(row['Amount'], bool):
+        raise ValueError(f"Amount is not a number: {row['Amount']!r}")
+    amount = float(row['Amount'])
+    if not math.isfinite(amount) or amount == 0:
+        raise ValueError(f"Amount must be a non-zero number: {row['Amount']!r}")
+    out['Amount'] = round(amount, 2)
+
+    category = out['Category'].lower()
+    if category not in CATEGORIES:
+        raise ValueError(f"unknown Category {out['Category']!r}")
+    if (category == 'salary' and amount < 0) or (category == 'rent' and amount > 0):
+        raise ValueError(f"{category} with the wrong sign: {amount}")
+    out['Category'] = category
+    return out
+
+
+def _compressor(compression: Optional[str]):
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"compression must be one of {', '.join(str(c) for c in COMPRESSIONS)}")
+    if compression == 'gzip':
+        return gzip.compress
+    if compression == 'zstd':
+        if importlib.util.find_spec('zstandard') is None:
+            raise RuntimeError("zstd output needs the zstandard package (pip install zstandard)")
+        import zstandard
+        return zstandard.ZstdCompressor().compress
+    return lambda data: data
+
+
+class TransactionWriter:
+    """
+    Usage:
+        writer = TransactionWriter('out/Zen_Zeke', compression='gzip', max_bytes=64 << 20)
+        writer.write_batch(rows)   # validated, appended and committed
+        writer.rows, writer.rejected, writer.paths
+
+    Writes out/Zen_Zeke.csv.gz (or out/Zen_Zeke-001.csv.gz, -002, ... with
+    max_bytes) plus out/Zen_Zeke.manifest.json. A part may overshoot
+    max_bytes by up to one batch.
+    """
+
+    def __init__(self, base_path: str, compression: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.base_path = base_path
+        self.compression = compression
+        self.max_bytes = max_bytes or None
+        self.manifest_path = f"{base_path}.manifest.json"
+        self._compress = _compressor(compression)
+        self.rejected = 0
+        self.parts: List[Dict] = []
+        self.rows = 0
+        if os.path.exists(self.manifest_path):
+            self._resume()
+
+    def _resume(self) -> None:
+        with open(self.manifest_path, encoding='utf-8') as fh:
+            manifest = json.load(fh)
+        if manifest['compression'] != self.compression:
+            raise ValueError(f"{self.manifest_path} was written with compression={manifest['compression']!r}")
+        directory = os.path.dirname(self.manifest_path)
+        for part in manifest['parts']:
+            path = os.path.join(directory, part['file'])
+            size = os.path.getsize(path)
+            if size < part['bytes']:
+                raise ValueError(f"{path} is shorter than its manifest entry ({size} < {part['bytes']} bytes)")
+            if size > part['bytes']:
+                with open(path, 'r+b') as fh:   # drop a batch the crash cut short
+                    fh.truncate(part['bytes'])
+        self.parts = manifest['parts']
+        self.rows = manifest['rows']
+
+    @property
+    def paths(self) -> List[str]:
+        directory = os.path.dirname(self.manifest_path)
+        return [os.path.join(directory, part['file']) for part in self.parts]
+
+    def _part_name(self, number: int) -> str:
+        stem = os.path.basename(self.base_path)
+        suffix = f"-{number:03d}" if self.max_bytes else ""
+        return f"{stem}{suffix}.csv{COMPRESSIONS[self.compression]}"
+
+    def write_batch(self, rows: Iterable) -> int:
+        """Validate and append one batch; returns how many rows were written."""
+        valid = []
+        for row in rows:
+            try:
+                valid.append(validate_row(row))
+            except (ValueError, TypeError):
+                self.rejected += 1
+        if not valid:
+            return 0
+
+        new_part = not self.parts or (self.max_bytes and self.parts[-1]['bytes'] >= self.max_bytes)
+        if new_part:
+            self.parts.append({'file': self._part_name(len(self.parts) + 1), 'bytes': 0, 'rows': 0})
+        part = self.parts[-1]
+
+        buf = io.StringIO()
+        writer = csv.DictWriter(buf, fieldnames=FIELDNAMES, lineterminator='\n')
+        if new_part:
+            writer.writeheader()
+        writer.writerows(valid)
+        data = self._compress(buf.getvalue().encode('utf-8'))
+
+        # a new part may have a leftover file from a crash before its manifest entry
+        with open(self.paths[-1], 'wb' if new_part else 'ab') as fh:
+            fh.write(data)
+            fh.flush()
+            os.fsync(fh.fileno())
+        part['bytes'] += len(data)
+        part['rows'] += len(valid)
+        self.rows += len(valid)
+        self._save_manifest()
+        return len(valid)
+
+    def _save_manifest(self) -> None:
+        tmp = f"{self.manifest_path}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as fh:
+            json.dump({'fieldnames': FIELDNAMES, 'compression': self.compression, 'max_bytes': self.max_bytes,
+                       'rows': self.rows, 'parts': self.parts}, fh, indent=1)
+        os.replace(tmp, self.manifest_path)
+
+    def stats(self) -> Dict:
+        return {'rows': self.rows, 'rejected': self.rejected, 'files': len(self.parts),
+                'bytes': sum(part['bytes'] for part in self.parts)}
@@ -1,6 +1,6 @@
 import React, { useState, useEffect, useCallback, useRef } from 'react';
 import { ArrowLeft, Send, Check, Award, HelpCircle, Sword } from 'lucide-react';
-import axios from 'axios';
+import { postEventStream } from './streamEvents';
 
 // Get image path function
 const getImagePath = (imageName) => {
@@ -24,6 +24,8 @@ const BattleArenaScreen = ({ setCurrentScreen }) => {
   const [debateOrder, setDebateOrder] = useState([]);
   const [isTyping, setIsTyping] = useState(false);
   const messagesEndRef = useRef(null);
+  // Turn ("stage-speaker") whose response is currently being requested/streamed
+  const activeTurnRef = useRef(null);
   
   // Scroll to bottom whenever messages change
   useEffect(() => {
@@ -131,6 +133,7 @@ const BattleArenaScreen = ({ setCurrentScreen }) => {
   
   // Start the debate
   const startDebate = () => {
+    activeTurnRef.current = null;
     setDebateStage(1);
     setConversation([]);
     
@@ -147,6 +150,12 @@ const BattleArenaScreen = ({ setCurrentScreen }) => {
   const processNextSpeaker = useCallback(() => {
     if (currentSpeaker === null || debateOrder.length === 0) return;
     
+    // Streamed text updates the conversation, which re-creates this callback;
+    // only request each turn once
+    const turnKey = `${debateStage}-${currentSpeaker}`;
+    if (activeTurnRef.current === turnKey) return;
+    activeTurnRef.current = turnKey;
+    
     const personaType = debateOrder[currentSpeaker];
     const personaInfo = getPersonaInfo(personaType);
     
@@ -179,51 +188,50 @@ const BattleArenaScreen = ({ setCurrentScreen }) => {
       messageType: messageType
     };
     
-    // Simulate typing delay (2-4 seconds)
-    const typingDelay = Math.floor(Math.random() * 2000) + 2000;
+    // Stream the response so the speaker's text appears as it is generated
+    const messageId = `${messageType}-${personaType}-${Date.now()}`;
+    let responseText = '';
     
-    setTimeout(() => {
-      // Make API call to get response
-      axios.post('http://localhost:5002/api/persona-response', apiData)
-        .then(response => {
-          const responseText = response.data.response;
-          
-          // Add message to conversation
-          const newMessage = {
-            persona: personaType,
-            character: personaInfo.character,
-            text: responseText,
-            type: messageType,
-            timestamp: new Date().toISOString()
-          };
-          
-          setConversation(prev => [...prev, newMessage]);
-          setIsTyping(false);
-          
-          // Move to next speaker or stage
-          moveToNextSpeaker();
-        })
-        .catch(err => {
-          console.error("Error getting persona response:", err);
-          
-          // Fallback response
-          const fallbackResponse = `As ${personaInfo.character}, I would approach this question with my typical ${personaType.replace('The ', '')} mindset. However, there seems to be a technical issue.`;
-          
-          const newMessage = {
-            persona: personaType,
-            character: personaInfo.character,
-            text: fallbackResponse,
-            type: messageType,
-            timestamp: new Date().toISOString()
-          };
-          
-          setConversation(prev => [...prev, newMessage]);
-          setIsTyping(false);
-          
-          // Move to next speaker or stage
-          moveToNextSpeaker();
-        });
-    }, typingDelay);
+    const showText = (text) => {
+      if (responseText === '') {
+        setIsTyping(false);
+        setConversation(prev => [...prev, {
+          id: messageId,
+          persona: personaType,
+          character: personaInfo.character,
+          text: text,
+          type: messageType,
+          timestamp: new Date().toISOString()
+        }]);
+      } else {
+        setConversation(prev => prev.map(msg => (
+          msg.id === messageId ? { ...msg, text: text } : msg
+        )));
+      }
+      responseText = text;
+    };
+    
+    postEventStream('http://localhost:5002/api/persona-response', apiData, (event, data) => {
+      if (event === 'delta') {
+        showText(responseText + data.text);
+      } else if (event === 'error') {
+        throw new Error(data.message);
+      }
+    })
+      .catch(err => {
+        console.error("Error getting persona response:", err);
+        
+        // Fallback response if nothing was streamed
+        if (responseText === '') {
+          showText(`As ${personaInfo.character}, I would approach this question with my typical ${personaType.replace('The ', '')} mindset. However, there seems to be a technical issue.`);
+        }
+      })
+      .finally(() => {
+        setIsTyping(false);
+        
+        // Move to next speaker or stage
+        moveToNextSpeaker();
+      });
   }, [currentSpeaker, debateOrder, debateStage, question, conversation]);
   
   // Move to the next speaker or stage
@@ -1,5 +1,6 @@
 import React, { useState, useEffect, useRef } from 'react';
 import { SendHorizontal } from 'lucide-react';
+import { postEventStream } from './streamEvents';
 
 const getImagePath = (imageName) => {
   try {
@@ -72,41 +73,41 @@ const ChatInterface = ({ character, persona, imagePath, onClose }) => {
     setIsTyping(true);
     
     try {
-      // Make API call to backend chat endpoint
-      const response = await fetch('http://localhost:5000/api/chat', {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json'
-        },
-        body: JSON.stringify({
-          message: input,
-          character: character,
-          persona: persona
-        })
-      });
-      
-      // Parse the JSON response
-      const data = await response.json();
+      // Stream the reply from the backend chat endpoint, showing text as it arrives
+      const replyId = `reply-${Date.now()}`;
+      let replyText = '';
       
-      // Check if we got a valid response
-      if (data && data.response) {
-        const botResponse = {
-          sender: 'character',
-          text: data.response,
-          timestamp: new Date().toISOString()
-        };
+      await postEventStream('http://localhost:5000/api/chat', {
+        message: input,
+        character: character,
+        persona: persona
+      }, (event, data) => {
+        if (event === 'error') {
+          throw new Error(data.message);
+        }
+        if (event !== 'delta') return;
         
-        setMessages(prevMessages => [...prevMessages, botResponse]);
-      } else {
-        // Handle error case
-        console.error('Invalid response format:', data);
-        const errorResponse = {
-          sender: 'character',
-          text: "I'm having trouble connecting right now. Could you try again?",
-          timestamp: new Date().toISOString()
-        };
+        const isFirstChunk = replyText === '';
+        replyText += data.text;
+        const text = replyText;
         
-        setMessages(prevMessages => [...prevMessages, errorResponse]);
+        if (isFirstChunk) {
+          setIsTyping(false);
+          setMessages(prevMessages => [...prevMessages, {
+            id: replyId,
+            sender: 'character',
+            text: text,
+            timestamp: new Date().toISOString()
+          }]);
+        } else {
+          setMessages(prevMessages => prevMessages.map(msg => (
+            msg.id === replyId ? { ...msg, text: text } : msg
+          )));
+        }
+      });
+      
+      if (replyText === '') {
+        throw new Error('Empty response');
       }
     } catch (error) {
       console.error('Error sending message:', error);
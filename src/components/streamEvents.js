@@ -0,0 +1,50 @@
+// streamEvents.js - Read server-sent events from the Flask backends
+//
+// The chat and battle endpoints stream when the request body has
+// `stream: true`: a series of `event: <name>` / `data: <json>` frames
+// (`delta` with a chunk of text, then `done`, or `error`).
+
+// Parse a fetch() Response body as SSE and call onEvent(name, data) per frame
+export const readEventStream = async (response, onEvent) => {
+  if (!response.ok || !response.body) {
+    throw new Error(`Request failed with status ${response.status}`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    // Frames are separated by a blank line
+    let boundary;
+    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+      const frame = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+
+      let event = 'message';
+      const data = [];
+      frame.split('\n').forEach(line => {
+        if (line.startsWith('event:')) event = line.slice(6).trim();
+        else if (line.startsWith('data:')) data.push(line.slice(5).trim());
+      });
+      if (data.length) onEvent(event, JSON.parse(data.join('\n')));
+    }
+  }
+};
+
+// POST a JSON body with streaming requested and dispatch its events
+export const postEventStream = async (url, body, onEvent) => {
+  const response = await fetch(url, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+      'Accept': 'text/event-stream'
+    },
+    body: JSON.stringify({ ...body, stream: true })
+  });
+  return readEventStream(response, onEvent);
+};